@@ -0,0 +1,245 @@
+"""
+This example demonstrates how to memoize dynamic instructions in agents_sdk.
+
+Recap (see _13_dynamic_instructions.py):
+- When instructions is a function, the SDK calls it at the start of EVERY turn (every LLM call) to build the system prompt.
+- In real applications that function often hits a database or an API (user profile, preferences, permissions).
+- A multi-turn run (tool call -> LLM again -> tool call -> ...) therefore rebuilds the same prompt again and again.
+
+Key Concepts:
+- cached_instructions(...) is a decorator that wraps your instructions function and remembers the rendered prompt.
+- The cache key is built from the context fields you declare (e.g. "name", "uid") plus the agent name,
+  so two users never share a prompt, but the same user gets the cached prompt on every turn and every run.
+- ttl_seconds makes a cached prompt expire, so changes in the database are eventually picked up.
+- max_entries caps the cache: when it is full, expired prompts are purged first, then the oldest ones.
+- invalidate(...) removes a prompt explicitly (e.g. right after the user updates their profile).
+- Both normal (def) and async (async def) instruction functions are supported.
+- If two turns ask for the same prompt at the same time, only one render happens and both wait for it.
+  If that render is cancelled (its run was cancelled), a waiting turn renders the prompt itself instead of failing.
+
+Important Note:
+- Only declare fields that actually change the prompt. If the prompt depends on a field that is not in the key,
+  users will see stale or wrong instructions.
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import time
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable
+from dotenv import load_dotenv, find_dotenv
+from agents import Agent, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, RunContextWrapper, function_tool, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key,
+    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.5-flash",
+    openai_client=external_client
+)
+
+
+@dataclass
+class UserInfo:
+    name: str
+    uid: int
+
+
+class InstructionsCache:
+    """Stores rendered system prompts keyed by (agent name, declared context fields)."""
+
+    def __init__(self, key_fields: tuple[str, ...], ttl_seconds: float | None = None, max_entries: int = 1024):
+        self.key_fields = key_fields
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._prompts: dict[tuple, tuple[float, str]] = {}  # key -> (expires_at, prompt)
+        self._in_flight: dict[tuple, asyncio.Future] = {}  # key -> render that is still running
+        self.hits = 0
+        self.misses = 0
+
+    def key_for(self, context: Any, agent_name: str) -> tuple:
+        return (agent_name, *(getattr(context, field) for field in self.key_fields))
+
+    def get(self, key: tuple) -> str | None:
+        entry = self._prompts.get(key)
+        if entry is None:
+            return None
+        expires_at, prompt = entry
+        if expires_at < time.monotonic():
+            del self._prompts[key]  # expired, treat it as a miss
+            return None
+        return prompt
+
+    def put(self, key: tuple, prompt: str) -> None:
+        now = time.monotonic()
+        expires_at = now + self.ttl_seconds if self.ttl_seconds is not None else float("inf")
+        self._prompts.pop(key, None)  # re-insert at the end, so the dict stays in insertion (age) order
+        self._prompts[key] = (expires_at, prompt)
+        if len(self._prompts) > self.max_entries:
+            for stale in [k for k, (expires, _) in self._prompts.items() if expires < now]:
+                del self._prompts[stale]
+            while len(self._prompts) > self.max_entries:
+                del self._prompts[next(iter(self._prompts))]  # the oldest prompt
+
+    def invalidate(self, agent_name: str | None = None, **fields: Any) -> int:
+        """Remove cached prompts. With no arguments everything is removed.
+
+        Pass an agent name and/or declared fields (e.g. uid=123) to remove only the matching prompts.
+        Returns the number of prompts removed.
+        """
+        unknown = set(fields) - set(self.key_fields)
+        if unknown:
+            raise ValueError(f"Cannot invalidate on undeclared fields: {sorted(unknown)}")
+
+        def matches(key: tuple) -> bool:
+            if agent_name is not None and key[0] != agent_name:
+                return False
+            values = dict(zip(self.key_fields, key[1:]))
+            return all(values[name] == value for name, value in fields.items())
+
+        stale = [key for key in self._prompts if matches(key)]
+        for key in stale:
+            del self._prompts[key]
+        return len(stale)
+
+
+def cached_instructions(*key_fields: str, ttl_seconds: float | None = None, max_entries: int = 1024):
+    """Decorator that memoizes a dynamic instructions function.
+
+    Usage:
+        @cached_instructions("name", "uid", ttl_seconds=300)
+        async def dynamic_instructions(context, agent) -> str: ...
+
+    The wrapped function keeps the (context, agent) signature the SDK expects and exposes
+    the cache as dynamic_instructions.cache (for invalidate(), hits and misses).
+    """
+    if not key_fields:
+        raise ValueError("Declare at least one context field to key the cache on")
+
+    def decorator(fn: Callable[[RunContextWrapper[Any], Agent[Any]], str | Awaitable[str]]):
+        cache = InstructionsCache(key_fields, ttl_seconds, max_entries)
+
+        @functools.wraps(fn)
+        async def wrapper(context: RunContextWrapper[Any], agent: Agent[Any]) -> str:
+            key = cache.key_for(context.context, agent.name)
+
+            while True:
+                prompt = cache.get(key)
+                if prompt is not None:
+                    cache.hits += 1
+                    return prompt
+
+                # Another turn is already rendering this prompt, wait for it instead of rendering twice.
+                # asyncio.wait() does not cancel the render if this turn is cancelled, and does not raise
+                # if the render was cancelled: then this turn loops and renders the prompt itself.
+                in_flight = cache._in_flight.get(key)
+                if in_flight is None:
+                    break
+                await asyncio.wait({in_flight})
+                if not in_flight.cancelled():
+                    cache.hits += 1
+                    return in_flight.result()
+
+            cache.misses += 1
+            future: asyncio.Future = asyncio.get_running_loop().create_future()
+            cache._in_flight[key] = future
+            try:
+                result = fn(context, agent)
+                if inspect.isawaitable(result):
+                    result = await result
+                cache.put(key, result)
+                future.set_result(result)
+                return result
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                future.set_exception(e)
+                future.exception()  # mark as retrieved so asyncio does not warn when nobody else waited
+                raise
+            finally:
+                del cache._in_flight[key]
+
+        wrapper.cache = cache
+        return wrapper
+
+    return decorator
+
+
+# Counts how many times the "database" was really queried
+profile_lookups = 0
+
+async def fetch_user_profile(uid: int) -> dict:
+    """Pretend database call. In a real app this would be a network round trip."""
+    global profile_lookups
+    profile_lookups += 1
+    await asyncio.sleep(0.2)
+    return {"plan": "premium", "language": "English"}
+
+
+# The prompt only depends on name and uid, so those are the declared key fields
+@cached_instructions("name", "uid", ttl_seconds=300)
+async def dynamic_instructions(
+    context: RunContextWrapper[UserInfo], agent: Agent[UserInfo]
+) -> str:
+    profile = await fetch_user_profile(context.context.uid)
+    return (
+        f"The user's name is {context.context.name}. They are on the {profile['plan']} plan "
+        f"and prefer {profile['language']}. Help them with their questions."
+    )
+
+
+@function_tool
+async def fetch_user_age(wrapper: RunContextWrapper[UserInfo]) -> str:
+    return f"User {wrapper.context.name} is 47 years old"
+
+
+agent = Agent[UserInfo](
+    name="Helper Agent",
+    instructions=dynamic_instructions,
+    tools=[fetch_user_age],
+    model=model,
+)
+
+
+async def main():
+    user_info = UserInfo(name="John", uid=123)
+
+    # Each question needs at least two turns (tool call + answer), and we ask several questions.
+    # Without the cache the profile would be fetched on every single turn.
+    for question in ["What is my name?", "How old am I?", "Which plan am I on?"]:
+        result = await Runner.run(
+            starting_agent=agent,
+            input=question,
+            context=user_info,
+        )
+        print(result.final_output)
+
+    cache = dynamic_instructions.cache
+    print(f"Profile lookups: {profile_lookups}, cache hits: {cache.hits}, cache misses: {cache.misses}")
+
+    # The user changed their profile: drop only their prompt, the next turn renders it again
+    removed = cache.invalidate(uid=123)
+    print(f"Invalidated {removed} cached prompt(s) for uid=123")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+
+# Scenario-based questions:
+# 1. How many times is the instructions function called in a run that makes three tool calls, with and without the cache?
+# 2. What goes wrong if the prompt uses a context field that is not declared in the cache key?
+# 3. When would you prefer a short ttl_seconds over explicit invalidate() calls, and vice versa?
+# 4. Why is agent.name part of the cache key?
+# 5. What would happen without the in-flight check if two runs for the same user start at the same time?
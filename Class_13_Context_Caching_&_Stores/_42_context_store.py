@@ -0,0 +1,325 @@
+"""
+This example demonstrates how to keep local context for many live sessions in a compact, per-session context store.
+
+Recap (see _12_local_&_agent_context.py, _26_is_enabled_2.py, _35_is_enabled.py):
+- UserInfo / UserContext are plain @dataclass objects, created for each run and passed as context=...
+- A plain dataclass instance keeps its fields in a per-instance __dict__, which costs memory on every object.
+- Strings that come from a database or a request (e.g. "admin", "true") are new string objects every time,
+  even when thousands of sessions share the same value.
+
+Key Concepts:
+- Slotted records: @dataclass(slots=True) stores fields in fixed slots instead of a __dict__, so each record is much smaller.
+- Interning: repeated strings (roles, flags) are mapped to one shared instance through an interning table.
+- Array-backed records: for very large numbers of sessions the fields can be stored column by column
+  (array('q') for numbers, one small code per role), and each session is just a row number.
+- Every row has a generation number that changes when its session is removed. A SessionView remembers the generation
+  it was created for, so a view of a removed session raises StaleSessionError instead of reading the data of the
+  next session that reuses the row.
+- ContextStore gives O(1) lookup by session id (a dict), so a request handler can fetch the context and pass it to Runner.run.
+- The records still look like normal context objects to tools, dynamic instructions and is_enabled functions
+  (context.context.user_role keeps working).
+
+How it works in this code:
+- SlottedContextStore keeps one slotted SessionContext per session.
+- ColumnarContextStore keeps the same data in columns and hands out a small SessionView for a session.
+- benchmark_memory() measures the bytes per session for plain dataclasses, slotted records and columns.
+"""
+
+import asyncio
+import os
+import sys
+import tracemalloc
+from array import array
+from dataclasses import dataclass
+from dotenv import load_dotenv, find_dotenv
+from agents import Agent, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, RunContextWrapper, function_tool, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key,
+    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+# The "before" picture: the same fields as UserInfo + UserContext from the earlier lessons, as a plain dataclass
+@dataclass
+class PlainUserContext:
+    name: str
+    uid: int
+    user_role: str
+    user_registered: str
+
+
+# The "after" picture: same fields, but slotted (no per-instance __dict__)
+@dataclass(slots=True)
+class SessionContext:
+    name: str
+    uid: int
+    user_role: str
+    user_registered: str
+
+
+class Interner:
+    """Interning table: equal strings are replaced by one shared instance."""
+
+    def __init__(self):
+        self._table: dict[str, str] = {}
+
+    def __call__(self, value: str) -> str:
+        return self._table.setdefault(value, value)
+
+    def __len__(self) -> int:
+        return len(self._table)
+
+
+class SlottedContextStore:
+    """Session id -> slotted SessionContext, with interned roles and flags."""
+
+    def __init__(self):
+        self._sessions: dict[str, SessionContext] = {}
+        self.intern = Interner()
+
+    def create(self, session_id: str, name: str, uid: int, user_role: str, user_registered: str) -> SessionContext:
+        context = SessionContext(
+            name=name,
+            uid=uid,
+            user_role=self.intern(user_role),
+            user_registered=self.intern(user_registered),
+        )
+        self._sessions[session_id] = context
+        return context
+
+    def get(self, session_id: str) -> SessionContext:
+        return self._sessions[session_id]
+
+    def remove(self, session_id: str) -> None:
+        self._sessions.pop(session_id, None)
+
+    def __len__(self) -> int:
+        return len(self._sessions)
+
+
+class StaleSessionError(LookupError):
+    """Raised when a SessionView is read after its session was removed from the store."""
+
+
+class SessionView:
+    """A tiny object that reads one row of a ColumnarContextStore, so it can be passed as context=..."""
+
+    __slots__ = ("_store", "_row", "_generation")
+
+    def __init__(self, store: "ColumnarContextStore", row: int):
+        self._store = store
+        self._row = row
+        self._generation = store._generations[row]
+
+    def _live_row(self) -> int:
+        if self._store._generations[self._row] != self._generation:
+            raise StaleSessionError(f"The session of row {self._row} was removed; this view must not be used any more")
+        return self._row
+
+    @property
+    def name(self) -> str:
+        return self._store._names[self._live_row()]
+
+    @property
+    def uid(self) -> int:
+        return self._store._uids[self._live_row()]
+
+    @property
+    def user_role(self) -> str:
+        return self._store._roles[self._store._role_codes[self._live_row()]]
+
+    @property
+    def user_registered(self) -> str:
+        return "true" if self._store._registered[self._live_row()] else "false"
+
+    def __repr__(self) -> str:
+        return f"SessionView(name={self.name!r}, uid={self.uid}, user_role={self.user_role!r}, user_registered={self.user_registered!r})"
+
+
+class ColumnarContextStore:
+    """Array-backed store: one column per field, one row per session.
+
+    - uids live in an array('q') (8 bytes each, no int objects)
+    - roles are stored as a 1-byte code into a small interned roles table
+    - user_registered is stored as a 1-byte flag
+    - removed rows are reused through a free list; a per-row generation makes old views of a reused row fail
+    """
+
+    def __init__(self):
+        self._rows: dict[str, int] = {}  # session id -> row number
+        self._names: list[str | None] = []
+        self._uids = array("q")
+        self._role_codes = array("B")
+        self._registered = array("B")
+        self._generations = array("Q")  # bumped when the row's session is removed
+        self._roles: list[str] = []  # role code -> role (the interning table)
+        self._role_index: dict[str, int] = {}
+        self._free_rows: list[int] = []
+
+    def _role_code(self, role: str) -> int:
+        code = self._role_index.get(role)
+        if code is None:
+            if len(self._roles) == 256:
+                raise ValueError("ColumnarContextStore supports at most 256 distinct roles")
+            code = len(self._roles)
+            self._roles.append(role)
+            self._role_index[role] = code
+        return code
+
+    def create(self, session_id: str, name: str, uid: int, user_role: str, user_registered: str) -> SessionView:
+        code = self._role_code(user_role)
+        flag = 1 if user_registered == "true" else 0
+        if session_id in self._rows:
+            row = self._rows[session_id]
+        elif self._free_rows:
+            row = self._free_rows.pop()
+        else:
+            row = len(self._names)
+            self._names.append(None)
+            self._uids.append(0)
+            self._role_codes.append(0)
+            self._registered.append(0)
+            self._generations.append(0)
+        self._names[row] = name
+        self._uids[row] = uid
+        self._role_codes[row] = code
+        self._registered[row] = flag
+        self._rows[session_id] = row
+        return SessionView(self, row)
+
+    def get(self, session_id: str) -> SessionView:
+        return SessionView(self, self._rows[session_id])
+
+    def remove(self, session_id: str) -> None:
+        row = self._rows.pop(session_id, None)
+        if row is not None:
+            self._names[row] = None
+            self._generations[row] += 1  # views of the removed session now raise StaleSessionError
+            self._free_rows.append(row)
+
+    def __len__(self) -> int:
+        return len(self._rows)
+
+
+def fresh_string(value: str) -> str:
+    """Return an equal but separate string object, like a value decoded from a database row or JSON body."""
+    return "".join(list(value))
+
+
+def fake_rows(count: int):
+    roles = ["student", "teacher", "admin"]
+    for i in range(count):
+        yield (
+            f"session-{i}",
+            f"user_{i}",
+            100_000 + i,
+            fresh_string(roles[i % len(roles)]),
+            fresh_string("true" if i % 4 else "false"),
+        )
+
+
+def measure(build) -> int:
+    """Bytes allocated (and still alive) while build() runs."""
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    kept = build()
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del kept
+    return after - before
+
+
+def benchmark_memory(count: int = 50_000) -> None:
+    rows = list(fake_rows(count))
+
+    def build_plain():
+        # Before: a dict of plain dataclasses, every role/flag string is its own object
+        return {sid: PlainUserContext(name, uid, fresh_string(role), fresh_string(flag)) for sid, name, uid, role, flag in rows}
+
+    def build_slotted():
+        store = SlottedContextStore()
+        for sid, name, uid, role, flag in rows:
+            store.create(sid, name, uid, fresh_string(role), fresh_string(flag))
+        return store
+
+    def build_columnar():
+        store = ColumnarContextStore()
+        for sid, name, uid, role, flag in rows:
+            store.create(sid, name, uid, fresh_string(role), fresh_string(flag))
+        return store
+
+    # The session ids and names already exist in `rows`, so every variant is measured on the per-session overhead only
+    print(f"Memory per session ({count} sessions, {sys.version.split()[0]}):")
+    baseline = None
+    for label, build in [("plain dataclass", build_plain), ("slotted + interned", build_slotted), ("array-backed columns", build_columnar)]:
+        per_session = measure(build) / count
+        baseline = baseline or per_session
+        print(f"  {label:<22} {per_session:7.1f} bytes/session  ({per_session / baseline:.0%} of plain)")
+
+
+store = SlottedContextStore()
+
+
+def is_user_admin(context: RunContextWrapper[SessionContext], agent: Agent) -> bool:
+    return context.context.user_role == "admin"
+
+
+@function_tool(is_enabled=is_user_admin)
+def delete_user_database() -> str:
+    """[ADMIN ONLY] Deletes the entire user database."""
+    return "Database has been deleted."
+
+
+@function_tool
+def whoami(wrapper: RunContextWrapper[SessionContext]) -> str:
+    """Returns the current user's name and role."""
+    return f"{wrapper.context.name} ({wrapper.context.user_role})"
+
+
+base_agent = Agent[SessionContext](
+    name="pirate_agent",
+    instructions="you are a helpful assistant. Use the tools to answer the questions. If the user is an admin, they can delete the user database.",
+    model=model,
+    tools=[whoami, delete_user_database],
+)
+
+
+async def handle_request(session_id: str, message: str) -> str:
+    # O(1) lookup of the session's context, no new context object per run
+    result = await Runner.run(base_agent, input=message, context=store.get(session_id))
+    return result.final_output
+
+
+async def main():
+    store.create("session-a", name="Ammar", uid=1, user_role="admin", user_registered="true")
+    store.create("session-b", name="Zain", uid=3, user_role="student", user_registered="true")
+
+    print(await handle_request("session-a", "Who am I? Then please delete the user database."))
+    print(await handle_request("session-b", "Who am I? Then please delete the user database."))
+
+    benchmark_memory()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why does a slotted dataclass use less memory than a plain dataclass? What do you lose (hint: adding new attributes at runtime)?
+2. Two sessions have user_role "admin". Without interning, how many string objects exist for that value? With interning?
+3. When would you pick the array-backed store over slotted records, and what does it cost in code complexity?
+4. What happens to a SessionView held by a running agent if its session is removed and the row is reused?
+5. How would you expire idle sessions from the store?
+"""
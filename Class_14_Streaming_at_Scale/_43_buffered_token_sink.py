@@ -0,0 +1,201 @@
+"""
+This example demonstrates how to write streamed tokens efficiently using a buffered token sink.
+
+Recap (see _15_streaming.py):
+- We iterate over result.stream_events() and call print(token) for every raw_response_event delta.
+- Every print is at least one write() system call, and on a terminal or with flush=True also one flush.
+- A fast model can produce hundreds of tokens per second; with many streams the process ends up busy doing tiny writes.
+
+Key Concepts:
+- BufferedTokenSink collects deltas in memory and writes them in one go (coalescing).
+- It flushes when the buffer reaches max_chars (size window) or when max_delay seconds have passed
+  since the first buffered token (time window, 16 ms by default ~ one frame at 60 FPS, so the user does not notice).
+- Tokens are never reordered: there is only one buffer and it is always written front to back.
+- end_message() flushes immediately at message boundaries, so a finished answer is never left sitting in the buffer.
+- The sink does not care where the bytes go: stdout, a file, or a socket (asyncio StreamWriter) all work.
+
+How it works in this code:
+- main() streams an essay like _15_streaming.py, but writes through the sink.
+- benchmark() replays a high-rate token stream to an unbuffered file and compares print-per-token against the sink.
+"""
+
+import asyncio
+import io
+import os
+import sys
+import tempfile
+import time
+from typing import Any, Callable, TextIO
+from dotenv import load_dotenv, find_dotenv
+from openai.types.responses import ResponseTextDeltaEvent
+from agents import Agent, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key,
+    base_url="https://generativelanguage.googleapis.com/v1beta/openai/",
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+class BufferedTokenSink:
+    """Coalesces streamed deltas and writes them by size or time window.
+
+    Args:
+        write: called with one coalesced string per flush (e.g. sys.stdout.write).
+        flush: optional, called after each write (e.g. sys.stdout.flush).
+        max_chars: flush as soon as this many characters are buffered.
+        max_delay: flush at most this many seconds after the first buffered token.
+    """
+
+    def __init__(
+        self,
+        write: Callable[[str], Any],
+        flush: Callable[[], Any] | None = None,
+        max_chars: int = 4096,
+        max_delay: float = 0.016,
+    ):
+        self._write = write
+        self._flush = flush
+        self.max_chars = max_chars
+        self.max_delay = max_delay
+        self._buffer: list[str] = []
+        self._buffered_chars = 0
+        self._timer: asyncio.TimerHandle | None = None
+        self.tokens_in = 0
+        self.writes_out = 0
+
+    @classmethod
+    def to_text_stream(cls, stream: TextIO, **kwargs) -> "BufferedTokenSink":
+        """Sink for stdout or any open text file."""
+        return cls(stream.write, stream.flush, **kwargs)
+
+    @classmethod
+    def to_socket(cls, writer: asyncio.StreamWriter, encoding: str = "utf-8", **kwargs) -> "BufferedTokenSink":
+        """Sink for an asyncio connection. Await writer.drain() at message boundaries for backpressure."""
+        return cls(lambda text: writer.write(text.encode(encoding)), **kwargs)
+
+    def write(self, token: str) -> None:
+        if not token:
+            return
+        self.tokens_in += 1
+        self._buffer.append(token)
+        self._buffered_chars += len(token)
+        if self._buffered_chars >= self.max_chars:
+            self.flush()
+        elif self._timer is None:
+            # First token in an empty buffer starts the time window
+            try:
+                loop = asyncio.get_running_loop()
+            except RuntimeError:
+                self.flush()  # no event loop (plain sync code): nothing would flush later, so write now
+                return
+            self._timer = loop.call_later(self.max_delay, self.flush)
+
+    def end_message(self) -> None:
+        """Message boundary: write everything that is buffered right now."""
+        self.flush()
+
+    def flush(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        chunk = "".join(self._buffer)
+        self._buffer.clear()
+        self._buffered_chars = 0
+        self._write(chunk)
+        if self._flush is not None:
+            self._flush()
+        self.writes_out += 1
+
+    def close(self) -> None:
+        self.flush()
+
+    def __enter__(self) -> "BufferedTokenSink":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+agent = Agent(
+    name="agent",
+    instructions="You are a helpful assistant",
+    model=model,
+)
+
+
+async def main():
+    result = Runner.run_streamed(
+        agent,
+        input="write an essay on programming in 500 words",
+    )
+
+    with BufferedTokenSink.to_text_stream(sys.stdout) as sink:
+        async for event in result.stream_events():
+            if event.type == "raw_response_event":
+                if isinstance(event.data, ResponseTextDeltaEvent):
+                    sink.write(event.data.delta)  # cheap: only appends to the buffer
+                elif event.data.type == "response.output_item.done":
+                    sink.end_message()  # the message is complete, show it right away
+        print()
+    print(f"{sink.tokens_in} tokens written with {sink.writes_out} writes")
+
+    await benchmark()
+
+
+async def token_stream(count: int, tokens_per_yield: int = 32):
+    """Simulates a very fast model: yields to the event loop every few tokens, like network chunks arriving."""
+    words = ["agents ", "stream ", "tokens ", "really ", "fast, ", "so ", "writes ", "matter. "]
+    for i in range(count):
+        if i % tokens_per_yield == 0:
+            await asyncio.sleep(0)
+        yield words[i % len(words)]
+
+
+async def benchmark(token_count: int = 200_000) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        path = os.path.join(tmp, "stream.txt")
+
+        # Before: print every token with a flush, into an unbuffered file (every write is a syscall, like a socket)
+        with io.TextIOWrapper(io.FileIO(path, "w"), write_through=True) as out:
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+            async for token in token_stream(token_count):
+                print(token, end="", file=out, flush=True)
+            naive_wall, naive_cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+        # After: the same stream through the sink
+        with io.TextIOWrapper(io.FileIO(path, "w"), write_through=True) as out:
+            start_wall, start_cpu = time.perf_counter(), time.process_time()
+            with BufferedTokenSink.to_text_stream(out) as sink:
+                async for token in token_stream(token_count):
+                    sink.write(token)
+            sink_wall, sink_cpu = time.perf_counter() - start_wall, time.process_time() - start_cpu
+
+    print(f"\nBenchmark: {token_count} tokens to an unbuffered file")
+    print(f"  print per token : {token_count:>7} writes, {naive_wall:.3f}s wall, {naive_cpu:.3f}s CPU, {token_count / naive_wall:,.0f} tokens/s")
+    print(f"  buffered sink   : {sink.writes_out:>7} writes, {sink_wall:.3f}s wall, {sink_cpu:.3f}s CPU, {token_count / sink_wall:,.0f} tokens/s")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why does print(token) for every delta become a problem only at high token rates or with many concurrent streams?
+2. How do max_chars and max_delay trade latency against the number of writes? What would 100 ms feel like to a user?
+3. Why must the sink flush at message boundaries instead of waiting for the time window?
+4. Why is it important that the sink never reorders tokens, and how does a single buffer guarantee that?
+5. For a socket sink, where would you await writer.drain() and why?
+"""
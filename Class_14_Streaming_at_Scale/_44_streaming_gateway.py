@@ -0,0 +1,437 @@
+"""
+This example demonstrates how to serve streamed agent runs to many browser clients over SSE and WebSocket.
+
+Recap (see _15_streaming.py and _16_streaming_with_tools.py):
+- Runner.run_streamed(...) returns a result, and ONE local loop consumes result.stream_events().
+- A web application needs to forward those events to thousands of browsers at the same time.
+
+Key Concepts:
+- StreamingGateway is a small asyncio HTTP server (standard library only) with three endpoints:
+    GET /runs/sse?input=...   -> Server-Sent Events, one run per request
+    GET /runs/ws              -> WebSocket, every text message from the client starts a run
+    GET /metrics              -> connection metrics as JSON
+- Every connection gets its own BOUNDED queue between the run and the socket.
+- Backpressure for slow consumers: when a client's queue is full, raw token deltas are dropped,
+  but run items (tool calls, tool outputs, complete messages) and the final "done" event are never dropped.
+  The complete message item still carries the full text, so a client that lost deltas can repaint the answer.
+- Cancellation on disconnect: when the browser goes away, the run is cancelled with result.cancel(),
+  so no more LLM tokens are paid for a reader that no longer exists.
+- Metrics: active/peak/total connections, runs completed/cancelled/failed, events sent, deltas dropped.
+
+How to run:
+- Serve:      python _44_streaming_gateway.py
+              curl -N "http://127.0.0.1:8080/runs/sse?input=Tell%20me%20some%20jokes"
+- Load test:  python _44_streaming_gateway.py --load-test
+              Starts the local model stand-in (Local_LLM_Server/local_llm_server.py), the gateway, and then
+              100 .. 1000 concurrent SSE clients (10% of them deliberately slow) plus a WebSocket round.
+              The cpu/run column shows where the time goes: once it dominates, the process is CPU-bound on
+              per-token SDK work (not on connections), and the next step is running more gateway processes.
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import statistics
+import struct
+import subprocess
+import sys
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from urllib.parse import parse_qs, quote, urlsplit
+from dotenv import load_dotenv, find_dotenv
+from openai.types.responses import ResponseTextDeltaEvent
+from agents import Agent, ItemHelpers, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, RunConfig, function_tool, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+WEBSOCKET_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+
+@function_tool
+def how_many_jokes() -> int:
+    return 3
+
+
+agent = Agent(
+    name="Joker",
+    instructions="First call the `how_many_jokes` tool, then tell that many jokes.",
+    tools=[how_many_jokes],
+    model=model,
+)
+
+
+@dataclass
+class GatewayMetrics:
+    active_connections: int = 0
+    peak_connections: int = 0
+    total_connections: int = 0
+    runs_completed: int = 0
+    runs_cancelled: int = 0
+    runs_failed: int = 0
+    events_sent: int = 0
+    deltas_dropped: int = 0
+    queue_high_watermark: int = 0
+
+
+def event_to_message(event) -> dict | None:
+    """Turns an SDK stream event into a small JSON-friendly dict (None = not forwarded)."""
+    if event.type == "raw_response_event":
+        if isinstance(event.data, ResponseTextDeltaEvent):
+            return {"type": "delta", "text": event.data.delta}
+        return None
+    if event.type == "agent_updated_stream_event":
+        return {"type": "agent_updated", "agent": event.new_agent.name}
+    if event.type == "run_item_stream_event":
+        item = event.item
+        message = {"type": "item", "item_type": item.type}
+        if item.type == "tool_call_item":
+            message["tool"] = getattr(item.raw_item, "name", None)
+        elif item.type == "tool_call_output_item":
+            message["output"] = str(item.output)
+        elif item.type == "message_output_item":
+            message["text"] = ItemHelpers.text_message_output(item)
+        return message
+    return None
+
+
+class StreamingGateway:
+    def __init__(self, agent: Agent, queue_size: int = 64, run_config: RunConfig | None = None):
+        self.agent = agent
+        self.queue_size = queue_size
+        self.run_config = run_config
+        self.metrics = GatewayMetrics()
+        self._server: asyncio.Server | None = None
+
+    async def start(self, host: str = "127.0.0.1", port: int = 8080) -> None:
+        self._server = await asyncio.start_server(self._handle_connection, host, port, backlog=8192)
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # ---------------- one run -> one bounded queue -> one client ----------------
+
+    async def _offer(self, queue: asyncio.Queue, message: dict) -> None:
+        if message["type"] == "delta":
+            if queue.full():
+                self.metrics.deltas_dropped += 1  # slow consumer: skip the delta, never block the run for it
+                return
+            queue.put_nowait(message)
+        else:
+            await queue.put(message)  # run items and the final event are always delivered
+        self.metrics.queue_high_watermark = max(self.metrics.queue_high_watermark, queue.qsize())
+
+    async def _pump(self, result, queue: asyncio.Queue) -> None:
+        try:
+            async for event in result.stream_events():
+                message = event_to_message(event)
+                if message is not None:
+                    await self._offer(queue, message)
+            await queue.put({"type": "done", "final_output": str(result.final_output)})
+            self.metrics.runs_completed += 1
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            self.metrics.runs_failed += 1
+            await queue.put({"type": "error", "message": f"{type(e).__name__}: {e}"})
+
+    async def stream_run(self, user_input: str, send, disconnected: asyncio.Event) -> None:
+        """Runs the agent and forwards its events with send(message) until done or the client disconnects."""
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        result = Runner.run_streamed(self.agent, input=user_input, run_config=self.run_config)
+        pump = asyncio.create_task(self._pump(result, queue))
+
+        async def forward() -> None:
+            while True:
+                message = await queue.get()
+                await send(message)
+                self.metrics.events_sent += 1
+                if message["type"] in ("done", "error"):
+                    return
+
+        forwarder = asyncio.create_task(forward())
+        gone = asyncio.create_task(disconnected.wait())
+        try:
+            await asyncio.wait({forwarder, gone}, return_when=asyncio.FIRST_COMPLETED)
+            if forwarder.done() and forwarder.exception() is None:
+                return
+            # The client disconnected (or the socket broke while sending): stop paying for the run
+            self.metrics.runs_cancelled += 1
+            result.cancel()
+        finally:
+            for task in (pump, forwarder, gone):
+                task.cancel()
+            await asyncio.gather(pump, forwarder, gone, return_exceptions=True)
+
+    # ---------------- HTTP / SSE / WebSocket plumbing ----------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        self.metrics.active_connections += 1
+        self.metrics.total_connections += 1
+        self.metrics.peak_connections = max(self.metrics.peak_connections, self.metrics.active_connections)
+        try:
+            request_line = await reader.readline()
+            method, target, _ = request_line.decode("latin-1").split(" ", 2)
+            headers = {}
+            while (line := await reader.readline()) not in (b"\r\n", b"\n", b""):
+                key, _, value = line.decode("latin-1").partition(":")
+                headers[key.strip().lower()] = value.strip()
+            url = urlsplit(target)
+            query = parse_qs(url.query)
+
+            if method == "GET" and url.path == "/metrics":
+                body = json.dumps(asdict(self.metrics)).encode()
+                writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: application/json\r\nConnection: close\r\n"
+                             + f"Content-Length: {len(body)}\r\n\r\n".encode() + body)
+            elif method == "GET" and url.path == "/runs/sse":
+                await self._serve_sse(query.get("input", [""])[0], reader, writer)
+            elif method == "GET" and url.path == "/runs/ws" and headers.get("upgrade", "").lower() == "websocket":
+                await self._serve_websocket(headers["sec-websocket-key"], reader, writer)
+            else:
+                writer.write(b"HTTP/1.1 404 Not Found\r\nContent-Length: 0\r\nConnection: close\r\n\r\n")
+            await writer.drain()
+        except (ConnectionError, ValueError, KeyError):
+            pass
+        finally:
+            self.metrics.active_connections -= 1
+            writer.close()
+
+    async def _serve_sse(self, user_input: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: close\r\n\r\n")
+        await writer.drain()
+        disconnected = asyncio.Event()
+
+        async def watch_disconnect() -> None:
+            await reader.read()  # an SSE client never sends more data, so EOF means it went away
+            disconnected.set()
+
+        async def send(message: dict) -> None:
+            writer.write(f"event: {message['type']}\ndata: {json.dumps(message)}\n\n".encode())
+            await writer.drain()
+
+        watcher = asyncio.create_task(watch_disconnect())
+        try:
+            await self.stream_run(user_input, send, disconnected)
+        finally:
+            watcher.cancel()
+
+    async def _serve_websocket(self, key: str, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        accept = base64.b64encode(hashlib.sha1((key + WEBSOCKET_GUID).encode()).digest()).decode()
+        writer.write(("HTTP/1.1 101 Switching Protocols\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Accept: {accept}\r\n\r\n").encode())
+        await writer.drain()
+
+        inbox: asyncio.Queue[str] = asyncio.Queue()
+        disconnected = asyncio.Event()
+
+        async def read_frames() -> None:
+            try:
+                while True:
+                    opcode, payload = await read_ws_frame(reader)
+                    if opcode == 0x1:
+                        inbox.put_nowait(payload.decode())
+                    elif opcode == 0x9:
+                        writer.write(ws_frame(payload, opcode=0xA))  # answer ping with pong
+                    elif opcode == 0x8:
+                        break
+            except (asyncio.IncompleteReadError, ConnectionError):
+                pass
+            disconnected.set()
+
+        async def send(message: dict) -> None:
+            writer.write(ws_frame(json.dumps(message).encode()))
+            await writer.drain()
+
+        frames = asyncio.create_task(read_frames())
+        try:
+            while not disconnected.is_set():
+                next_input = asyncio.create_task(inbox.get())
+                gone = asyncio.create_task(disconnected.wait())
+                await asyncio.wait({next_input, gone}, return_when=asyncio.FIRST_COMPLETED)
+                gone.cancel()
+                if not next_input.done():
+                    next_input.cancel()
+                    break
+                await self.stream_run(next_input.result(), send, disconnected)
+            writer.write(ws_frame(b"", opcode=0x8))
+        finally:
+            frames.cancel()
+
+
+def ws_frame(payload: bytes, opcode: int = 0x1, mask: bool = False) -> bytes:
+    """Encodes one WebSocket frame (servers send unmasked frames, clients must mask)."""
+    header = bytes([0x80 | opcode])
+    mask_bit = 0x80 if mask else 0
+    length = len(payload)
+    if length < 126:
+        header += bytes([mask_bit | length])
+    elif length < 65536:
+        header += bytes([mask_bit | 126]) + struct.pack("!H", length)
+    else:
+        header += bytes([mask_bit | 127]) + struct.pack("!Q", length)
+    if mask:
+        key = os.urandom(4)
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+        header += key
+    return header + payload
+
+
+async def read_ws_frame(reader: asyncio.StreamReader) -> tuple[int, bytes]:
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    key = await reader.readexactly(4) if second & 0x80 else None
+    payload = await reader.readexactly(length)
+    if key:
+        payload = bytes(b ^ key[i % 4] for i, b in enumerate(payload))
+    return first & 0x0F, payload
+
+
+# ---------------- load test ----------------
+
+async def sse_client(port: int, user_input: str, slow: bool) -> tuple[float, float] | None:
+    """Returns (seconds to first delta, seconds until done) or None on failure."""
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"GET /runs/sse?input={quote(user_input)} HTTP/1.1\r\nHost: gateway\r\n\r\n".encode())
+        await writer.drain()
+        first_delta = None
+        while line := await reader.readline():
+            if line.startswith(b"event: delta") and first_delta is None:
+                first_delta = time.perf_counter() - start
+            elif line.startswith(b"event: done"):
+                writer.close()
+                return (first_delta or 0.0), time.perf_counter() - start
+            if slow:
+                await asyncio.sleep(0.02)  # a phone on a bad network
+        writer.close()
+    except (ConnectionError, OSError):
+        pass
+    return None
+
+
+async def ws_client(port: int, user_input: str) -> tuple[float, float] | None:
+    start = time.perf_counter()
+    try:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        key = base64.b64encode(os.urandom(16)).decode()
+        writer.write((f"GET /runs/ws HTTP/1.1\r\nHost: gateway\r\nUpgrade: websocket\r\nConnection: Upgrade\r\n"
+                      f"Sec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n").encode())
+        while (await reader.readline()) not in (b"\r\n", b""):
+            pass
+        writer.write(ws_frame(user_input.encode(), mask=True))
+        first_delta = None
+        while True:
+            _, payload = await read_ws_frame(reader)
+            message = json.loads(payload)
+            if message["type"] == "delta" and first_delta is None:
+                first_delta = time.perf_counter() - start
+            if message["type"] == "done":
+                writer.write(ws_frame(b"", opcode=0x8, mask=True))
+                writer.close()
+                return (first_delta or 0.0), time.perf_counter() - start
+    except (ConnectionError, OSError, asyncio.IncompleteReadError):
+        return None
+
+
+def percentile(values: list[float], pct: float) -> float:
+    return statistics.quantiles(values, n=100)[pct - 1] if len(values) > 1 else (values[0] if values else 0.0)
+
+
+async def load_test(client_counts: list[int], gateway_port: int = 8080, model_port: int = 8001) -> None:
+    server_path = Path(__file__).resolve().parent.parent / "Local_LLM_Server" / "local_llm_server.py"
+    stand_in = subprocess.Popen(
+        [sys.executable, str(server_path), "--port", str(model_port), "--ttft-ms", "300", "--token-ms", "20", "--tokens", "20"],
+        stdout=subprocess.DEVNULL,
+    )
+    await asyncio.sleep(1.0)
+    try:
+        local_client = AsyncOpenAI(api_key="local", base_url=f"http://127.0.0.1:{model_port}/v1/")
+        local_agent = agent.clone(model=OpenAIChatCompletionsModel(model="local-model", openai_client=local_client))
+        gateway = StreamingGateway(local_agent, queue_size=32, run_config=RunConfig(tracing_disabled=True))
+        await gateway.start(port=gateway_port)
+
+        user_input = "Tell me some jokes, call how_many_jokes first"
+        print(f"{'clients':>8} {'proto':>5} {'ok':>6} {'p50 first':>10} {'p95 first':>10} {'p50 done':>9} {'wall':>7} {'cpu/run':>8} {'dropped':>8} {'peak':>6}")
+        rounds = [(count, "sse") for count in client_counts] + [(client_counts[-1], "ws")]
+        for count, protocol in rounds:
+            gateway.metrics = GatewayMetrics()
+            start, start_cpu = time.perf_counter(), time.process_time()
+            if protocol == "sse":
+                clients = [sse_client(gateway_port, user_input, slow=(i % 10 == 0)) for i in range(count)]
+            else:
+                clients = [ws_client(gateway_port, user_input) for _ in range(count)]
+            results = [r for r in await asyncio.gather(*clients) if r is not None]
+            wall = time.perf_counter() - start
+            cpu_per_run_ms = (time.process_time() - start_cpu) / count * 1000
+            firsts = [r[0] for r in results]
+            dones = [r[1] for r in results]
+            print(f"{count:>8} {protocol:>5} {len(results):>6} {percentile(firsts, 50):>9.3f}s {percentile(firsts, 95):>9.3f}s "
+                  f"{percentile(dones, 50):>8.3f}s {wall:>6.2f}s {cpu_per_run_ms:>6.1f}ms {gateway.metrics.deltas_dropped:>8} {gateway.metrics.peak_connections:>6}")
+
+        # Disconnect test: close the client early and check that the run was cancelled
+        gateway.metrics = GatewayMetrics()
+        reader, writer = await asyncio.open_connection("127.0.0.1", gateway_port)
+        writer.write(f"GET /runs/sse?input={quote(user_input)} HTTP/1.1\r\nHost: gateway\r\n\r\n".encode())
+        await reader.readline()
+        writer.close()
+        await asyncio.sleep(0.5)
+        print(f"Client disconnected mid-run -> runs cancelled: {gateway.metrics.runs_cancelled}")
+        await gateway.stop()
+    finally:
+        stand_in.terminate()
+
+
+async def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--load-test", action="store_true")
+    parser.add_argument("--clients", type=int, nargs="+", default=[100, 250, 500, 1000])
+    parser.add_argument("--port", type=int, default=8080)
+    args = parser.parse_args()
+
+    if args.load_test:
+        await load_test(args.clients, gateway_port=args.port)
+        return
+
+    gateway = StreamingGateway(agent)
+    await gateway.start(port=args.port)
+    print(f"Gateway on http://127.0.0.1:{args.port}  (/runs/sse?input=..., /runs/ws, /metrics)")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why does each connection need its own bounded queue instead of one shared queue for all clients?
+2. Why is it safe to drop token deltas for a slow client but not tool outputs or the final event?
+3. What would happen to your LLM bill if runs were NOT cancelled when the browser tab is closed?
+4. When would you choose WebSocket over SSE for an agent UI?
+5. Which metric would you alert on first in production, and why?
+"""
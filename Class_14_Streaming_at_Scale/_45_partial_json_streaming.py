@@ -0,0 +1,323 @@
+"""
+This example demonstrates how to use the fields of a structured output while it is still being streamed.
+
+Recap (see _28_structured_output_1.py and _29_structured_output_2.py):
+- With output_type=MeetingMinutes the model answers with ONE JSON object.
+- result.final_output only exists after the whole JSON has arrived, even though "attendees"
+  was generated seconds before "action_items".
+
+Key Concepts:
+- With Runner.run_streamed(...) the JSON arrives as text deltas (raw_response_event / ResponseTextDeltaEvent).
+- IncrementalJSONParser scans every character exactly once. It keeps a small stack of open objects/arrays
+  and notices when a top-level field (or one element of a top-level list) is complete.
+- Validation-on-complete: a finished field is validated on its own with a cached pydantic TypeAdapter,
+  straight from its JSON slice (validate_json). Invalid fields fail early, with the field name in the error.
+- The buffer is trimmed after every finished field, so we never re-parse (or even keep) text we already handled.
+- Every event carries a typed partial object (MeetingMinutes.model_construct with the fields we have so far),
+  so downstream code can start working on "attendees" while "action_items" is still being generated.
+
+How it works in this code:
+- stream_structured(result, MeetingMinutes) turns a streamed run into FieldEvents.
+- benchmark() compares our parser with re-parsing the whole buffer on every delta.
+"""
+
+import asyncio
+import json
+import os
+import time
+import typing
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Generic, List, Optional, TypeVar
+from dotenv import load_dotenv, find_dotenv
+from jiter import from_json
+from openai.types.responses import ResponseTextDeltaEvent
+from pydantic import BaseModel, TypeAdapter
+from agents import Agent, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+class ActionItem(BaseModel):
+    task: str
+    assignee: str
+    due_date: Optional[str] = None
+    priority: str = "medium"
+
+class Decision(BaseModel):
+    topic: str
+    decision: str
+    rationale: Optional[str] = None
+
+class MeetingMinutes(BaseModel):
+    meeting_title: str
+    date: str
+    attendees: List[str]
+    agenda_items: List[str]
+    key_decisions: List[Decision]
+    action_items: List[ActionItem]
+    next_meeting_date: Optional[str] = None
+    meeting_duration_minutes: int
+
+
+T = TypeVar("T", bound=BaseModel)
+
+
+@dataclass
+class FieldEvent(Generic[T]):
+    kind: str  # "item" (one element of a top-level list), "field" (a top-level field) or "complete"
+    field: str | None
+    value: Any
+    partial: T  # typed partial object with every field completed so far
+
+
+@dataclass
+class _Frame:
+    kind: str  # "{" or "["
+    key: str | None = None  # current key (objects only)
+    value_start: int | None = None  # absolute position where the current value started
+
+
+# TypeAdapters are expensive to build, so they are built once per model class and reused
+_adapter_cache: dict[type, dict[str, tuple[TypeAdapter, TypeAdapter | None]]] = {}
+
+
+def field_adapters(output_type: type[BaseModel]) -> dict[str, tuple[TypeAdapter, TypeAdapter | None]]:
+    """field name -> (adapter for the field, adapter for one list element or None)."""
+    if output_type not in _adapter_cache:
+        adapters = {}
+        for name, info in output_type.model_fields.items():
+            item_adapter = None
+            if typing.get_origin(info.annotation) in (list, List):
+                (item_type,) = typing.get_args(info.annotation)
+                item_adapter = TypeAdapter(item_type)
+            adapters[name] = (TypeAdapter(info.annotation), item_adapter)
+        _adapter_cache[output_type] = adapters
+    return _adapter_cache[output_type]
+
+
+class IncrementalJSONParser(Generic[T]):
+    """Feeds JSON text in chunks and reports completed top-level fields and list elements."""
+
+    def __init__(self, output_type: type[T]):
+        self.output_type = output_type
+        self.adapters = field_adapters(output_type)
+        self.fields: dict[str, Any] = {}
+        self.items: dict[str, list[Any]] = {}
+        self._buffer = ""  # only the text of the field that is in progress
+        self._base = 0  # absolute position of self._buffer[0]
+        self._position = 0  # absolute position of the next character to scan
+        self._stack: list[_Frame] = []
+        self._in_string = False
+        self._escape = False
+        self._string_start = 0
+        self._string_is_key = False
+        self.done = False
+
+    def partial(self) -> T:
+        return self.output_type.model_construct(**self.fields)
+
+    def _text(self, start: int, end: int) -> str:
+        return self._buffer[start - self._base:end - self._base]
+
+    def feed(self, chunk: str) -> list[FieldEvent[T]]:
+        events: list[FieldEvent[T]] = []
+        self._buffer += chunk
+        end = self._base + len(self._buffer)
+        while self._position < end and not self.done:
+            self._scan(self._position, self._buffer[self._position - self._base], events)
+            self._position += 1
+        return events
+
+    def _scan(self, i: int, ch: str, events: list) -> None:
+        if self._in_string:
+            if self._escape:
+                self._escape = False
+            elif ch == "\\":
+                self._escape = True
+            elif ch == '"':
+                self._in_string = False
+                if self._string_is_key:
+                    self._stack[-1].key = json.loads(self._text(self._string_start, i + 1))
+                else:
+                    self._value_done(i + 1, events)
+            return
+        if ch in " \t\r\n:":
+            return
+        if not self._stack:
+            if ch != "{":
+                raise ValueError(f"Expected a JSON object, got {ch!r}")
+            self._stack.append(_Frame("{"))
+            return
+
+        top = self._stack[-1]
+        if ch == '"':
+            self._in_string = True
+            self._string_start = i
+            self._string_is_key = top.kind == "{" and top.key is None
+            if not self._string_is_key:
+                top.value_start = i
+        elif ch in "{[":
+            top.value_start = i
+            self._stack.append(_Frame(ch))
+        elif ch in "}]":
+            closed = self._stack.pop()
+            if closed.value_start is not None:  # a number/true/false/null right before the bracket
+                self._value_done(i, events, frame=closed, depth=len(self._stack) + 1)
+            if self._stack:
+                self._value_done(i + 1, events)
+            else:
+                self.done = True
+                events.append(FieldEvent("complete", None, self.output_type.model_validate(self.fields), self.partial()))
+        elif ch == ",":
+            if top.value_start is not None:
+                self._value_done(i, events)
+        elif top.value_start is None:
+            top.value_start = i  # first character of a number/true/false/null
+
+    def _value_done(self, end: int, events: list, frame: _Frame | None = None, depth: int | None = None) -> None:
+        frame = frame or self._stack[-1]
+        depth = depth or len(self._stack)
+        start = frame.value_start
+        frame.value_start = None
+        name, frame.key = frame.key, None
+
+        if depth == 1:
+            if name not in self.adapters:
+                return  # unknown field: ignored, like pydantic does by default
+            field_adapter, _ = self.adapters[name]
+            try:
+                self.fields[name] = field_adapter.validate_json(self._text(start, end))
+            except ValueError as e:
+                raise ValueError(f"Field {name!r} is invalid: {e}") from e
+            # Everything before this point is handled: drop it from the buffer
+            self._buffer = self._buffer[end - self._base:]
+            self._base = end
+            events.append(FieldEvent("field", name, self.fields[name], self.partial()))
+        elif depth == 2 and frame.kind == "[":
+            name = self._stack[0].key
+            _, item_adapter = self.adapters.get(name, (None, None))
+            if item_adapter is not None:
+                item = item_adapter.validate_json(self._text(start, end))
+                self.items.setdefault(name, []).append(item)
+                events.append(FieldEvent("item", name, item, self.partial()))
+
+
+async def stream_structured(result, output_type: type[T]) -> AsyncIterator[FieldEvent[T]]:
+    """Yields FieldEvents while a streamed run with output_type is still generating its JSON."""
+    parser = IncrementalJSONParser(output_type)
+    async for event in result.stream_events():
+        if event.type == "raw_response_event" and isinstance(event.data, ResponseTextDeltaEvent):
+            for field_event in parser.feed(event.data.delta):
+                yield field_event
+        elif event.type == "agent_updated_stream_event":
+            parser = IncrementalJSONParser(output_type)  # a new agent starts a new answer
+
+
+base_agent = Agent(
+    name="MeetingSecretary",
+    instructions="""Extract structured meeting minutes from meeting transcripts.
+    Identify all key decisions, action items, and important details.""",
+    output_type=MeetingMinutes,
+    model=model,
+)
+
+meeting_transcript = """
+Marketing Strategy Meeting - January 15, 2024
+Attendees: Sarah (Marketing Manager), John (Product Manager), Lisa (Designer), Mike (Developer)
+Duration: 90 minutes
+
+Agenda:
+1. Q1 Campaign Review
+2. New Product Launch Strategy
+3. Budget Allocation
+4. Social Media Strategy
+
+Key Decisions:
+- Approved $50K budget for Q1 digital campaigns based on strong ROI data
+- Decided to launch new product in March instead of February for better market timing
+- Will focus social media efforts on Instagram and TikTok for younger demographics
+
+Action Items:
+- Sarah to create campaign timeline by January 20th (high priority)
+- John to finalize product features by January 25th
+- Lisa to design landing page mockups by January 22nd
+- Mike to review technical requirements by January 30th
+
+Next meeting: January 29, 2024
+"""
+
+
+def benchmark(action_items: int = 300, chunk_size: int = 8) -> None:
+    minutes = MeetingMinutes(
+        meeting_title="Planning", date="2024-01-15", attendees=[f"Person {i}" for i in range(50)],
+        agenda_items=[f"Topic {i}" for i in range(50)],
+        key_decisions=[Decision(topic=f"Topic {i}", decision="Approved", rationale="Strong ROI") for i in range(50)],
+        action_items=[ActionItem(task=f"Task {i}", assignee=f"Person {i % 50}", due_date="2024-02-01") for i in range(action_items)],
+        meeting_duration_minutes=90,
+    )
+    text = minutes.model_dump_json()
+    chunks = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+
+    # Before: re-parse the whole buffer (partial mode) on every delta to see what is there so far
+    start = time.perf_counter()
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        from_json(buffer.encode(), partial_mode="trailing-strings")
+    reparse_seconds = time.perf_counter() - start
+
+    # After: scan each character once, validate each field once
+    start = time.perf_counter()
+    parser = IncrementalJSONParser(MeetingMinutes)
+    for chunk in chunks:
+        parser.feed(chunk)
+    incremental_seconds = time.perf_counter() - start
+    assert parser.done and parser.partial() == minutes
+
+    print(f"Benchmark: {len(text):,} bytes of JSON in {len(chunks):,} deltas")
+    print(f"  re-parse full buffer per delta : {reparse_seconds * 1000:8.1f} ms")
+    print(f"  incremental parser             : {incremental_seconds * 1000:8.1f} ms")
+
+
+async def main():
+    result = Runner.run_streamed(base_agent, input=meeting_transcript)
+
+    start = time.perf_counter()
+    async for event in stream_structured(result, MeetingMinutes):
+        elapsed = time.perf_counter() - start
+        if event.kind == "field":
+            print(f"[{elapsed:5.2f}s] field {event.field!r} ready: {event.value}")
+        elif event.kind == "item":
+            print(f"[{elapsed:5.2f}s]   new {event.field} element: {event.value}")
+        else:
+            print(f"[{elapsed:5.2f}s] complete and validated: {type(event.value).__name__}")
+
+    benchmark()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why can't we call MeetingMinutes.model_validate_json on the buffer before the JSON is complete?
+2. What does "validation-on-complete per field" buy you compared to validating only at the end?
+3. Why does re-parsing the whole buffer on every delta get slower the longer the answer is?
+4. Which consumer in your application could start working as soon as "attendees" is ready?
+5. The order of fields in the JSON is decided by the model. How does that affect how early a field arrives?
+"""
@@ -0,0 +1,308 @@
+"""
+This example demonstrates how to measure streaming latency: time-to-first-token, inter-token latency, stalls and tool gaps.
+
+Recap (see _15_streaming.py, _16_streaming_with_tools.py and _40_run_hooks.py):
+- We iterate over result.stream_events(), but we cannot see HOW FAST the tokens arrive.
+- RunHooks tell us when each LLM call starts (on_llm_start) and when tools run (on_tool_start / on_tool_end).
+
+Key Concepts:
+- TTFT (time to first token): how long the user stares at an empty screen. Measured per run and per agent turn
+  (from the moment the LLM request is sent to the first text delta of that turn).
+- Inter-token latency (ITL): the time between two text deltas of the same turn, collected in a histogram.
+- Longest stall: the biggest ITL gap; a single 3 s stall feels broken even if the average is fine.
+- Tool gap: the silence between the end of a turn that called tools and the first token of the next turn.
+- Total stream duration and tokens/sec.
+
+How it works in this code:
+- StreamMeter is a RunHooks subclass: pass it as hooks=... and wrap the event loop with meter.observe(result).
+- observe() timestamps every event as the consumer sees it and attaches the numbers to the result as result.stream_stats.
+- Every turn is recorded as a custom span ("llm_turn_stream") and the run summary as a "stream_metrics" span,
+  so the numbers appear as span attributes in the OpenAI dashboard (or any trace processor you add).
+
+Note:
+- A "token" here is one text delta. Providers may put more than one token in a delta.
+"""
+
+import asyncio
+import bisect
+import os
+import statistics
+import time
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Optional
+from dotenv import load_dotenv, find_dotenv
+from openai.types.responses import ResponseTextDeltaEvent
+from agents import Agent, ItemHelpers, RunContextWrapper, RunHooks, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, TContext, TResponseInputItem, Tool, custom_span, function_tool, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+# Upper bounds of the inter-token latency histogram buckets, in milliseconds
+ITL_BUCKETS_MS = [1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, float("inf")]
+
+
+class LatencyHistogram:
+    def __init__(self, bounds_ms: list[float] = ITL_BUCKETS_MS):
+        self.bounds_ms = bounds_ms
+        self.counts = [0] * len(bounds_ms)
+        self.samples_ms: list[float] = []
+
+    def add(self, seconds: float) -> None:
+        ms = seconds * 1000
+        self.counts[bisect.bisect_left(self.bounds_ms, ms)] += 1
+        self.samples_ms.append(ms)
+
+    def percentile(self, pct: int) -> float | None:
+        if len(self.samples_ms) < 2:
+            return self.samples_ms[0] if self.samples_ms else None
+        return statistics.quantiles(self.samples_ms, n=100)[pct - 1]
+
+    def as_dict(self) -> dict[str, int]:
+        return {f"<={bound:g}ms": count for bound, count in zip(self.bounds_ms, self.counts) if count}
+
+
+@dataclass
+class TurnStats:
+    turn: int
+    agent: str
+    requested_at: float  # when the LLM request was sent (seconds since run start)
+    first_token_at: float | None = None
+    ended_at: float | None = None
+    tokens: int = 0
+    longest_stall_s: float = 0.0
+    tool_calls: int = 0
+    tool_gap_s: float | None = None  # silence after this turn's tool calls until the next turn's first token
+    itl: LatencyHistogram = field(default_factory=LatencyHistogram)
+    _last_token_at: float | None = None
+
+    @property
+    def ttft_s(self) -> float | None:
+        return None if self.first_token_at is None else self.first_token_at - self.requested_at
+
+    @property
+    def tokens_per_s(self) -> float | None:
+        if self.first_token_at is None or self._last_token_at is None or self.tokens < 2:
+            return None
+        return (self.tokens - 1) / max(self._last_token_at - self.first_token_at, 1e-9)
+
+    def attributes(self) -> dict[str, Any]:
+        return {
+            "agent": self.agent,
+            "turn": self.turn,
+            "ttft_ms": _ms(self.ttft_s),
+            "tokens": self.tokens,
+            "tokens_per_s": _round(self.tokens_per_s),
+            "itl_p50_ms": _round(self.itl.percentile(50)),
+            "itl_p95_ms": _round(self.itl.percentile(95)),
+            "longest_stall_ms": _ms(self.longest_stall_s),
+            "tool_calls": self.tool_calls,
+            "tool_gap_ms": _ms(self.tool_gap_s),
+            "itl_histogram": self.itl.as_dict(),
+        }
+
+
+@dataclass
+class StreamStats:
+    turns: list[TurnStats] = field(default_factory=list)
+    ttft_s: float | None = None  # run start -> first text delta of the whole run
+    total_s: float | None = None
+    tokens: int = 0
+    longest_stall_s: float = 0.0
+    tool_time_s: float = 0.0  # time spent inside tool functions (from on_tool_start/on_tool_end)
+    itl: LatencyHistogram = field(default_factory=LatencyHistogram)
+
+    @property
+    def tokens_per_s(self) -> float | None:
+        return self.tokens / self.total_s if self.total_s else None
+
+    def attributes(self) -> dict[str, Any]:
+        return {
+            "ttft_ms": _ms(self.ttft_s),
+            "total_ms": _ms(self.total_s),
+            "tokens": self.tokens,
+            "tokens_per_s": _round(self.tokens_per_s),
+            "turns": len(self.turns),
+            "itl_p50_ms": _round(self.itl.percentile(50)),
+            "itl_p95_ms": _round(self.itl.percentile(95)),
+            "longest_stall_ms": _ms(self.longest_stall_s),
+            "tool_time_ms": _ms(self.tool_time_s),
+            "tool_gap_ms": _ms(sum(t.tool_gap_s or 0.0 for t in self.turns)),
+            "itl_histogram": self.itl.as_dict(),
+        }
+
+    def summary(self) -> str:
+        lines = ["run: " + ", ".join(f"{k}={v}" for k, v in self.attributes().items() if k != "itl_histogram")]
+        for turn in self.turns:
+            attributes = turn.attributes()
+            lines.append(f"  turn {turn.turn} ({turn.agent}): " + ", ".join(
+                f"{k}={v}" for k, v in attributes.items() if k not in ("agent", "turn", "itl_histogram")))
+        lines.append(f"  ITL histogram: {self.itl.as_dict()}")
+        return "\n".join(lines)
+
+
+def _round(value: float | None) -> float | None:
+    return None if value is None else round(value, 2)
+
+
+def _ms(seconds: float | None) -> float | None:
+    return None if seconds is None else round(seconds * 1000, 2)
+
+
+class StreamMeter(RunHooks):
+    """Collects streaming latency metrics. Use: hooks=meter, then `async for event in meter.observe(result)`."""
+
+    def __init__(self):
+        self.stats = StreamStats()
+        self._start = time.perf_counter()
+        self._llm_requests: list[tuple[float, str]] = []  # (requested_at, agent name), in order
+        self._tool_started: dict[str, list[float]] = {}  # tool name -> start times of calls still running
+        self._trace = None
+        self._open_spans: dict[int, Any] = {}  # turn number -> span that is not finished yet
+
+    def _now(self) -> float:
+        return time.perf_counter() - self._start
+
+    # ----- producer side (hooks): when requests are sent and tools run -----
+
+    async def on_llm_start(self, context: RunContextWrapper[TContext], agent: Agent[TContext],
+                           system_prompt: Optional[str], input_items: list[TResponseInputItem]) -> None:
+        self._llm_requests.append((self._now(), agent.name))
+
+    async def on_tool_start(self, context: RunContextWrapper[TContext], agent: Agent[TContext], tool: Tool) -> None:
+        self._tool_started.setdefault(tool.name, []).append(self._now())
+
+    async def on_tool_end(self, context: RunContextWrapper[TContext], agent: Agent[TContext], tool: Tool, result: str) -> None:
+        started = self._tool_started.get(tool.name)
+        if started:
+            self.stats.tool_time_s += self._now() - started.pop(0)
+
+    # ----- consumer side: what the reader of stream_events() actually sees -----
+
+    def _begin_turn(self) -> TurnStats:
+        index = len(self.stats.turns)
+        requested_at, agent_name = self._llm_requests[index] if index < len(self._llm_requests) else (self._now(), "?")
+        turn = TurnStats(turn=index + 1, agent=agent_name, requested_at=requested_at)
+        self.stats.turns.append(turn)
+        span = custom_span("llm_turn_stream", parent=self._trace, disabled=self._trace is None)
+        span.start()
+        self._open_spans[turn.turn] = span
+        return turn
+
+    def _finish_span(self, turn: TurnStats) -> None:
+        span = self._open_spans.pop(turn.turn)
+        span.span_data.data.update(turn.attributes())
+        span.finish()
+
+    async def observe(self, result) -> AsyncIterator[Any]:
+        """Yields the events of result.stream_events() unchanged, while timing them."""
+        self._trace = result.trace
+        result.stream_stats = self.stats
+        turn: TurnStats | None = None
+        waiting_for_tools: TurnStats | None = None
+        try:
+            async for event in result.stream_events():
+                now = self._now()
+                if event.type == "raw_response_event":
+                    if event.data.type == "response.created":
+                        turn = self._begin_turn()
+                    elif event.data.type == "response.completed" and turn is not None:
+                        turn.ended_at = now
+                        if turn.tool_calls:
+                            waiting_for_tools = turn  # its span is finished once the tool gap is known
+                        else:
+                            self._finish_span(turn)
+                        turn = None
+                    elif isinstance(event.data, ResponseTextDeltaEvent) and turn is not None:
+                        self._record_token(turn, now)
+                        if waiting_for_tools is not None:
+                            waiting_for_tools.tool_gap_s = now - waiting_for_tools.ended_at
+                            self._finish_span(waiting_for_tools)
+                            waiting_for_tools = None
+                    elif event.data.type == "response.output_item.added" and getattr(event.data.item, "type", "") == "function_call" and turn is not None:
+                        turn.tool_calls += 1
+                yield event
+        finally:
+            self.stats.total_s = self._now()
+            for unfinished in [t for t in self.stats.turns if t.turn in self._open_spans]:
+                self._finish_span(unfinished)
+            with custom_span("stream_metrics", data=self.stats.attributes(), parent=self._trace, disabled=self._trace is None):
+                pass
+
+    def _record_token(self, turn: TurnStats, now: float) -> None:
+        stats = self.stats
+        turn.tokens += 1
+        stats.tokens += 1
+        if turn.first_token_at is None:
+            turn.first_token_at = now
+        if stats.ttft_s is None:
+            stats.ttft_s = now
+        if turn._last_token_at is not None:
+            gap = now - turn._last_token_at
+            turn.itl.add(gap)
+            stats.itl.add(gap)
+            turn.longest_stall_s = max(turn.longest_stall_s, gap)
+            stats.longest_stall_s = max(stats.longest_stall_s, gap)
+        turn._last_token_at = now
+
+
+@function_tool
+async def how_many_jokes() -> int:
+    await asyncio.sleep(0.3)  # a slow backend call, it shows up as a tool gap
+    return 10
+
+
+agent = Agent(
+    name="Joker",
+    instructions="First call the `how_many_jokes` tool, then tell that many jokes.",
+    tools=[how_many_jokes],
+    model=model,
+)
+
+
+async def main():
+    meter = StreamMeter()
+    result = Runner.run_streamed(
+        agent,
+        input="Tell me some jokes, call how_many_jokes first",
+        hooks=meter,
+    )
+    print("=== Run starting ===")
+
+    async for event in meter.observe(result):
+        if event.type == "run_item_stream_event":
+            if event.item.type == "tool_call_item":
+                print("-- Tool was called")
+            elif event.item.type == "tool_call_output_item":
+                print(f"-- Tool output: {event.item.output}")
+            elif event.item.type == "message_output_item":
+                print(f"-- Message output:\n {ItemHelpers.text_message_output(event.item)}")
+
+    print("=== Run complete ===")
+    print(result.stream_stats.summary())
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why is TTFT usually more important for user experience than total duration?
+2. Two turns have the same average inter-token latency, but one has a 2 s stall. Which number reveals it?
+3. Why is TTFT measured from on_llm_start (request sent) and not from the first raw event?
+4. What could cause a long tool gap even if the tool itself is fast?
+5. Which of these attributes would you put on a production dashboard and alert on?
+"""
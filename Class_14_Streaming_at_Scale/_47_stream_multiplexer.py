@@ -0,0 +1,203 @@
+"""
+This example demonstrates how to consume many streamed agent runs with ONE async loop using a stream multiplexer.
+
+Recap (see _04_agent_level_02.py, _15_streaming.py and _19_agent_as_tool.py):
+- Each Runner.run_streamed(...) result has its own stream_events() iterator.
+- Running the Spanish, French and Italian translators (or a batch of independent calls) in parallel
+  would need one consumer loop (one task) per result.
+
+Key Concepts:
+- StreamMultiplexer merges N streamed runs into a single async iterator.
+- Every event is tagged with the run id it belongs to (TaggedEvent.run_id).
+- Fair interleaving: the multiplexer takes at most `quantum` events from a run before moving on to the next run
+  (round-robin), so one very chatty run cannot starve the others.
+- Bounded buffering: each run has a small queue (`buffer_size`). When the consumer is slower than the runs,
+  the queues fill up and the pumps wait, instead of buffering without limit.
+- Failure isolation: if one run fails (exception, guardrail tripwire, ...), the multiplexer reports a
+  RunFinished event with the error for that run id, and the other runs keep streaming.
+- Runs can be added while the iteration is already in progress.
+"""
+
+import asyncio
+import itertools
+import os
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator
+from dotenv import load_dotenv, find_dotenv
+from openai.types.responses import ResponseTextDeltaEvent
+from agents import Agent, GuardrailFunctionOutput, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, RunContextWrapper, TResponseInputItem, input_guardrail, set_tracing_export_api_key
+from agents.result import RunResultStreaming
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+@dataclass
+class TaggedEvent:
+    run_id: str
+    event: Any  # the original StreamEvent
+
+
+@dataclass
+class RunFinished:
+    run_id: str
+    result: RunResultStreaming
+    error: BaseException | None = None  # None means the run completed successfully
+
+
+_DONE = object()
+
+
+class StreamMultiplexer:
+    """Merges several RunResultStreaming objects into one fair, bounded async iterator."""
+
+    def __init__(self, buffer_size: int = 16, quantum: int = 4):
+        self.buffer_size = buffer_size
+        self.quantum = quantum
+        self._queues: dict[str, asyncio.Queue] = {}
+        self._results: dict[str, RunResultStreaming] = {}
+        self._errors: dict[str, BaseException] = {}
+        self._pumps: dict[str, asyncio.Task] = {}
+        self._order: deque[str] = deque()  # round-robin order of runs that are still active
+        self._ready = asyncio.Event()
+        self._ids = itertools.count(1)
+
+    def add(self, result: RunResultStreaming, run_id: str | None = None) -> str:
+        run_id = run_id or f"run-{next(self._ids)}"
+        if run_id in self._queues:
+            raise ValueError(f"Duplicate run id {run_id!r}")
+        self._queues[run_id] = asyncio.Queue(maxsize=self.buffer_size)
+        self._results[run_id] = result
+        self._order.append(run_id)
+        self._pumps[run_id] = asyncio.create_task(self._pump(run_id, result))
+        return run_id
+
+    async def _pump(self, run_id: str, result: RunResultStreaming) -> None:
+        queue = self._queues[run_id]
+        try:
+            async for event in result.stream_events():
+                await queue.put(event)  # waits when the consumer is behind (bounded buffering)
+                self._ready.set()
+        except Exception as e:
+            self._errors[run_id] = e  # only this run fails, the others are untouched
+        await queue.put(_DONE)
+        self._ready.set()
+
+    def __aiter__(self) -> AsyncIterator[TaggedEvent | RunFinished]:
+        return self._iterate()
+
+    async def _iterate(self) -> AsyncIterator[TaggedEvent | RunFinished]:
+        try:
+            while self._order:
+                self._ready.clear()
+                progressed = False
+                for _ in range(len(self._order)):
+                    run_id = self._order[0]
+                    self._order.rotate(-1)
+                    queue = self._queues[run_id]
+                    for _ in range(self.quantum):
+                        if queue.empty():
+                            break
+                        event = queue.get_nowait()
+                        progressed = True
+                        if event is _DONE:
+                            self._order.remove(run_id)
+                            yield RunFinished(run_id, self._results[run_id], self._errors.get(run_id))
+                            break
+                        yield TaggedEvent(run_id, event)
+                if not progressed:
+                    await self._ready.wait()
+        finally:
+            await self.aclose()
+
+    async def aclose(self) -> None:
+        """Cancels every run that is still streaming (e.g. the consumer stopped early)."""
+        for run_id, pump in self._pumps.items():
+            if not pump.done():
+                self._results[run_id].cancel()
+                pump.cancel()
+        await asyncio.gather(*self._pumps.values(), return_exceptions=True)
+
+
+spanish_agent = Agent(
+    name="spanish_agent",
+    instructions="You translate the user's message to Spanish",
+    model=model
+)
+
+french_agent = Agent(
+    name="french_agent",
+    instructions="You translate the user's message to French",
+    model=model
+)
+
+italian_agent = Agent(
+    name="italian_agent",
+    instructions="You translate the user's message to Italian",
+    model=model
+)
+
+
+# A guardrail that always trips, to show that one failing run does not stop the others
+@input_guardrail
+async def no_german_guardrail(ctx: RunContextWrapper[None], agent: Agent, input: str | list[TResponseInputItem]):
+    return GuardrailFunctionOutput(output_info="German is not supported", tripwire_triggered=True)
+
+
+german_agent = Agent(
+    name="german_agent",
+    instructions="You translate the user's message to German",
+    model=model,
+    input_guardrails=[no_german_guardrail],
+)
+
+
+async def main():
+    text = "Good morning, have a nice day!"
+    mux = StreamMultiplexer(buffer_size=16, quantum=4)
+    for agent in [spanish_agent, french_agent, italian_agent, german_agent]:
+        mux.add(Runner.run_streamed(agent, input=text), run_id=agent.name)
+
+    # One consumer loop serves all four streams
+    texts: dict[str, list[str]] = {}
+    interleaving: list[str] = []
+    async for tagged in mux:
+        if isinstance(tagged, RunFinished):
+            if tagged.error is None:
+                print(f"[{tagged.run_id}] finished: {tagged.result.final_output}")
+            else:
+                print(f"[{tagged.run_id}] failed with {type(tagged.error).__name__} (the other runs continue)")
+        elif tagged.event.type == "raw_response_event" and isinstance(tagged.event.data, ResponseTextDeltaEvent):
+            texts.setdefault(tagged.run_id, []).append(tagged.event.data.delta)
+            interleaving.append(tagged.run_id[:2])
+
+    print("Order in which token deltas were delivered:", " ".join(interleaving[:40]), "...")
+    print("Deltas per run:", {run_id: len(deltas) for run_id, deltas in texts.items()})
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. What happens to memory if the consumer is slow and the per-run buffers are unbounded?
+2. Why does round-robin with a small quantum give better fairness than "drain one run completely, then the next"?
+3. If one run raises an exception inside its pump, why do the other runs keep streaming?
+4. What should happen to the remaining runs if the consumer stops iterating early (e.g. the user closes the page)?
+5. How would you add a per-run priority so that some streams get a bigger share?
+"""
@@ -0,0 +1,382 @@
+"""
+This example demonstrates how to replace the dashboard trace export with a sampled, batched,
+background trace processor that writes to rotating, compressed JSONL files.
+
+Recap (see _01.py and _17_openai_tracing.py):
+- set_tracing_export_api_key(...) sends EVERY trace and span to the OpenAI dashboard.
+- That is great while learning, but with many runs per second it costs a lot and adds jitter.
+
+Key Concepts:
+- A trace processor (TracingProcessor) receives on_trace_start / on_span_end / on_trace_end callbacks.
+  set_trace_processors([...]) replaces the default dashboard processor, add_trace_processor(...) adds one.
+- Head sampling: the keep/drop decision is made from the trace id alone (hash -> 0..1 < head_rate).
+  It is deterministic, so a span that arrives late can still be judged.
+- Tail sampling: spans are held per trace until the trace ends. Then a trace is ALWAYS kept if one of its
+  spans has an error or the run was slower than slow_run_seconds, even if head sampling said "drop".
+- In-memory batching: kept traces go into a bounded queue; a background thread serializes them and writes
+  one batch at a time. The callbacks on the agent's hot path only append to lists.
+- Local sink: RotatingJSONLSink writes gzip-compressed JSON lines and rotates files by size
+  (traces.jsonl.gz, traces.1.jsonl.gz, ...). Each batch is a complete gzip member, so files stay readable
+  even if the process dies between batches.
+- Write errors (disk full, no permission, ...) do not kill the writer thread: the batch is dropped and counted in
+  stats["write_errors"] / stats["traces_dropped_write_error"], and the next batch is tried again.
+- Shutdown safety: shutdown() moves traces that are still open into the queue and writes everything that is left,
+  so buffered spans are not lost. The SDK already calls the provider's shutdown() at exit.
+
+How it works in this code:
+- main() runs a weather agent several times (some runs fail in the tool, some are slow) and shows what was kept.
+- benchmark() measures the overhead per span on the agent's thread.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+import zlib
+from collections import Counter, deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+from dotenv import load_dotenv, find_dotenv
+from agents import Agent, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, custom_span, function_tool, set_trace_processors, trace
+from agents.tracing import Span, Trace, TracingProcessor
+
+_: bool = load_dotenv(find_dotenv())
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+@dataclass
+class SamplingPolicy:
+    head_rate: float = 0.1  # share of normal runs that are kept
+    keep_errors: bool = True  # tail rule: keep every run with a failed span
+    slow_run_seconds: float | None = 5.0  # tail rule: keep every run slower than this
+
+    def head_sampled(self, trace_id: str) -> bool:
+        # Hash the id: custom ids passed to trace(...) need not be hex, and the decision must be the same for every span
+        return zlib.crc32(trace_id.encode()) / 0xFFFFFFFF < self.head_rate
+
+    def decide(self, trace_id: str, spans: list[Span[Any]], duration: float) -> str | None:
+        """Returns why the trace is kept ("error", "slow", "head") or None to drop it."""
+        if self.keep_errors and any(span.error for span in spans):
+            return "error"
+        if self.slow_run_seconds is not None and duration >= self.slow_run_seconds:
+            return "slow"
+        if self.head_sampled(trace_id):
+            return "head"
+        return None
+
+
+class RotatingJSONLSink:
+    """Appends JSON lines to gzip files and rotates them by size, like logging.RotatingFileHandler."""
+
+    def __init__(self, directory: str | Path, prefix: str = "traces", max_bytes: int = 5_000_000, backup_count: int = 5):
+        self.directory = Path(directory)
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.prefix = prefix
+        self.max_bytes = max_bytes
+        self.backup_count = backup_count
+        self.bytes_written = 0
+
+    def path(self, index: int = 0) -> Path:
+        return self.directory / (f"{self.prefix}.jsonl.gz" if index == 0 else f"{self.prefix}.{index}.jsonl.gz")
+
+    def write_lines(self, lines: list[str]) -> None:
+        # One gzip member per batch: gzip readers read concatenated members as one stream
+        data = gzip.compress(("\n".join(lines) + "\n").encode(), compresslevel=6)
+        current = self.path()
+        if current.exists() and current.stat().st_size + len(data) > self.max_bytes:
+            self._rotate()
+        with open(current, "ab") as file:
+            file.write(data)
+        self.bytes_written += len(data)
+
+    def _rotate(self) -> None:
+        self.path(self.backup_count).unlink(missing_ok=True)
+        for index in range(self.backup_count - 1, -1, -1):
+            if self.path(index).exists():
+                self.path(index).rename(self.path(index + 1))
+
+    def files(self) -> list[Path]:
+        return [self.path(i) for i in range(self.backup_count + 1) if self.path(i).exists()]
+
+    def read_all(self) -> list[dict]:
+        """Reads every record back, oldest file first."""
+        records = []
+        for path in reversed(self.files()):
+            with gzip.open(path, "rt") as file:
+                records.extend(json.loads(line) for line in file)
+        return records
+
+
+class SampledBatchTraceProcessor(TracingProcessor):
+    """Head + tail sampling, bounded in-memory batching and a background writer thread."""
+
+    def __init__(
+        self,
+        sink: RotatingJSONLSink,
+        policy: SamplingPolicy | None = None,
+        max_queue_traces: int = 2048,
+        max_batch_traces: int = 64,
+        schedule_delay: float = 1.0,
+        max_spans_per_trace: int = 1000,
+    ):
+        self.sink = sink
+        self.policy = policy or SamplingPolicy()
+        self.max_queue_traces = max_queue_traces
+        self.max_batch_traces = max_batch_traces
+        self.schedule_delay = schedule_delay
+        self.max_spans_per_trace = max_spans_per_trace
+        self.stats: Counter[str] = Counter()
+
+        self._open: dict[str, tuple[Trace, float, list[Span[Any]]]] = {}  # trace id -> (trace, start, spans)
+        self._queue: deque[tuple[Trace | None, str, float, list[Span[Any]]]] = deque()
+        self._write_lock = threading.Lock()  # one writer at a time (worker thread, force_flush, shutdown)
+        self._stats_lock = threading.Lock()  # stats are counted from the agent's thread and the writer thread
+        self._wakeup = threading.Event()
+        self._stopped = threading.Event()
+        self._worker: threading.Thread | None = None
+
+    # ---------------- hot path: called on the agent's thread ----------------
+
+    def on_trace_start(self, trace: Trace) -> None:
+        self._open[trace.trace_id] = (trace, time.monotonic(), [])
+
+    def on_span_start(self, span: Span[Any]) -> None:
+        pass
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        entry = self._open.get(span.trace_id)
+        if entry is not None:
+            spans = entry[2]
+            if len(spans) < self.max_spans_per_trace:
+                spans.append(span)
+            else:
+                self._count("spans_dropped_trace_full")
+        elif self.policy.head_sampled(span.trace_id) or span.error:
+            # A late span (its trace already ended, or started before this processor was installed)
+            self._enqueue(None, "late", 0.0, [span])
+
+    def on_trace_end(self, trace: Trace) -> None:
+        entry = self._open.pop(trace.trace_id, None)
+        if entry is None:
+            return
+        _, started, spans = entry
+        duration = time.monotonic() - started
+        reason = self.policy.decide(trace.trace_id, spans, duration)
+        if reason is None:
+            self._count("traces_sampled_out")
+            return
+        self._enqueue(trace, reason, duration, spans)
+
+    def _enqueue(self, trace: Trace | None, reason: str, duration: float, spans: list[Span[Any]]) -> None:
+        if len(self._queue) >= self.max_queue_traces:
+            self._count("traces_dropped_queue_full")
+            return
+        self._queue.append((trace, reason, duration, spans))
+        self._ensure_worker()
+        if len(self._queue) >= self.max_batch_traces:
+            self._wakeup.set()
+
+    def _count(self, key: str, n: int = 1) -> None:
+        # A separate small lock: taking _write_lock here would block the agent's thread during a file write
+        with self._stats_lock:
+            self.stats[key] += n
+
+    # ---------------- background work ----------------
+
+    def _ensure_worker(self) -> None:
+        if self._worker is None and not self._stopped.is_set():
+            self._worker = threading.Thread(target=self._run, name="trace-writer", daemon=True)
+            self._worker.start()
+
+    def _run(self) -> None:
+        while not self._stopped.is_set():
+            self._wakeup.wait(self.schedule_delay)
+            self._wakeup.clear()
+            self._drain()
+
+    def _drain(self) -> None:
+        with self._write_lock:
+            while self._queue:
+                lines: list[str] = []
+                kept: Counter[str] = Counter()
+                for _ in range(min(self.max_batch_traces, len(self._queue))):
+                    trace, reason, duration, spans = self._queue.popleft()
+                    lines.extend(self._serialize(trace, reason, duration, spans))
+                    kept[f"traces_kept_{reason}"] += 1
+                    kept["spans_exported"] += len(spans)
+                try:
+                    self.sink.write_lines(lines)
+                except Exception:
+                    # Keep the writer alive; re-queueing would only fill memory while the disk stays full
+                    self._count("write_errors")
+                    self._count("traces_dropped_write_error", sum(n for key, n in kept.items() if key.startswith("traces_kept_")))
+                    continue
+                with self._stats_lock:
+                    self.stats.update(kept)
+                    self.stats["batches"] += 1
+
+    @staticmethod
+    def _serialize(trace: Trace | None, reason: str, duration: float, spans: list[Span[Any]]) -> list[str]:
+        lines = []
+        if trace is not None:
+            record = trace.export() or {}
+            record["sample_reason"] = reason
+            record["duration_ms"] = round(duration * 1000, 3)
+            lines.append(json.dumps(record, default=str))
+        for span in spans:
+            record = span.export()
+            if record is not None:
+                lines.append(json.dumps(record, default=str))
+        return lines
+
+    def force_flush(self) -> None:
+        self._drain()
+
+    def shutdown(self) -> None:
+        if self._stopped.is_set():
+            return
+        # Traces that never ended (e.g. the app is stopping mid-run) are kept as "incomplete"
+        for trace_id in list(self._open):
+            trace, started, spans = self._open.pop(trace_id)
+            self._queue.append((trace, "incomplete", time.monotonic() - started, spans))
+        self._stopped.set()
+        self._wakeup.set()
+        if self._worker is not None:
+            self._worker.join()
+        self._drain()
+
+
+@function_tool
+async def get_weather(city: str) -> str:
+    """A simple function to get the weather for a user."""
+    if "atlantis" in city.lower():
+        raise ValueError(f"No weather station in {city}")
+    if "slow" in city.lower():
+        await asyncio.sleep(1.2)
+    return f"The weather for {city} is sunny."
+
+
+base_agent = Agent(
+    name="WeatherAgent",
+    instructions="You are a helpful assistant. Always use get_weather.",
+    model=model,
+    tools=[get_weather]
+)
+
+
+class SyncJSONLProcessor(TracingProcessor):
+    """The naive version for the benchmark: serialize and write every span on the agent's thread."""
+
+    def __init__(self, path: Path):
+        self.file = gzip.open(path, "at")
+
+    def on_trace_start(self, trace: Trace) -> None:
+        self.file.write(json.dumps(trace.export(), default=str) + "\n")
+
+    def on_trace_end(self, trace: Trace) -> None:
+        pass
+
+    def on_span_start(self, span: Span[Any]) -> None:
+        pass
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        self.file.write(json.dumps(span.export(), default=str) + "\n")
+        self.file.flush()
+
+    def shutdown(self) -> None:
+        self.file.close()
+
+    def force_flush(self) -> None:
+        self.file.flush()
+
+
+def benchmark(traces: int = 2000, spans_per_trace: int = 10) -> None:
+    def workload() -> float:
+        start = time.perf_counter()
+        for t in range(traces):
+            with trace("bench"):
+                for s in range(spans_per_trace):
+                    with custom_span("step", {"index": s, "payload": "x" * 200}) as span:
+                        if t % 50 == 0 and s == 0:
+                            span.set_error({"message": "boom", "data": None})
+        return time.perf_counter() - start
+
+    total_spans = traces * spans_per_trace
+    with tempfile.TemporaryDirectory() as directory:
+        set_trace_processors([])
+        baseline = workload()
+
+        naive = SyncJSONLProcessor(Path(directory) / "naive.jsonl.gz")
+        set_trace_processors([naive])
+        naive_seconds = workload()
+        naive.shutdown()
+
+        sink = RotatingJSONLSink(directory, max_bytes=200_000)
+        sampled = SampledBatchTraceProcessor(sink, SamplingPolicy(head_rate=0.1))
+        set_trace_processors([sampled])
+        sampled_seconds = workload()
+        sampled.shutdown()
+        set_trace_processors([])
+
+        print(f"Benchmark: {traces} traces x {spans_per_trace} spans")
+        print(f"  no processor            : {baseline / total_spans * 1e6:6.2f} us/span")
+        print(f"  sync JSONL per span     : {naive_seconds / total_spans * 1e6:6.2f} us/span")
+        print(f"  sampled batch processor : {sampled_seconds / total_spans * 1e6:6.2f} us/span (writer thread: "
+              f"{sampled.stats['spans_exported']} spans in {sampled.stats['batches']} batches, "
+              f"{sampled.stats['traces_kept_error']} error traces, {len(sink.files())} files)")
+
+
+async def main():
+    directory = Path(__file__).parent / "local_traces"
+    sink = RotatingJSONLSink(directory, max_bytes=1_000_000, backup_count=3)
+    for path in sink.files():  # start the demo with empty files
+        path.unlink()
+    processor = SampledBatchTraceProcessor(sink, SamplingPolicy(head_rate=0.25, slow_run_seconds=1.0))
+    set_trace_processors([processor])  # replaces the dashboard exporter
+
+    cities = ["Karachi", "Lahore", "Atlantis", "Islamabad", "Slowtown", "Quetta", "Multan", "Peshawar"]
+    random.shuffle(cities)
+    for city in cities:
+        result = await Runner.run(base_agent, f"Use get_weather for {city}")
+        print(f"{city:10} -> {result.final_output[:70]}")
+
+    # Nothing was force-flushed: shutdown() must write everything that is still buffered
+    processor.shutdown()
+    records = sink.read_all()
+    kept = [r for r in records if r.get("object") == "trace"]
+    print(f"\nKept {len(kept)} of {len(cities)} runs:", Counter(r["sample_reason"] for r in kept))
+    print(f"Spans on disk: {sum(r.get('object') == 'trace.span' for r in records)}, "
+          f"exported: {processor.stats['spans_exported']}, files: {[p.name for p in sink.files()]}")
+    print("Stats:", dict(processor.stats))
+
+    benchmark()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why is head sampling alone not enough to debug rare failures?
+2. Why must tail sampling hold spans in memory until the trace ends, and how is that memory bounded here?
+3. What would happen to the agent's latency if every span were serialized and written on the agent's thread?
+4. Why is each batch written as a complete gzip member instead of keeping one gzip stream open?
+5. Which spans could be lost if the process is killed with SIGKILL, and which are safe after shutdown()?
+"""
@@ -0,0 +1,383 @@
+"""
+This example demonstrates a low-overhead, structured replacement for enable_verbose_stdout_logging().
+
+Recap (see _18_terminal_tracing.py, _19_agent_as_tool.py and _20_handoff.py):
+- enable_verbose_stdout_logging() sets the "openai.agents" logger to DEBUG and prints to stdout.
+- Every LLM call is then logged with the full input and tools as indented JSON, every tool call with its
+  arguments and output. The formatting and printing happen synchronously, inside the run.
+- Note: the SDK builds the "full input as JSON" debug message with an f-string, so the json.dumps(...) of the
+  whole conversation runs on every LLM call even when DEBUG logging is OFF.
+  Setting OPENAI_AGENTS_DONT_LOG_MODEL_DATA=1 / OPENAI_AGENTS_DONT_LOG_TOOL_DATA=1 switches that off.
+
+Key Concepts:
+- Structured records: every record has the same fields (seq, time, category, level, event, name, error, data).
+  Nothing is turned into text when a record is written; `data` only keeps a reference to the span data.
+- Ring buffer: a fixed-size list plus a counter. Writing is one counter increment and one list assignment,
+  there is no lock, and old records are overwritten, so memory never grows.
+- Lazy formatting: records become text only when someone reads them (dump(), dump_on_error()).
+- Per-category levels: "agent", "llm", "tool", "handoff", "guardrail" and "sdk" (the SDK's own warnings).
+  At INFO only the summary is kept (model, tool name, duration). At DEBUG the payload (input/output) is kept too.
+- Dump on error: the last N records are printed when a run raises, which is usually when you need them.
+
+How it works in this code:
+- StructuredDebugLogger is a TracingProcessor: the SDK already creates a span for every agent, LLM call,
+  tool call, handoff and guardrail, so we only have to record them. (With tracing_disabled=True nothing is recorded.)
+- main() runs a handoff, a tool call and a run that trips a guardrail, then dumps the buffer.
+- install() changes process-wide settings (the SDK's DONT_LOG_* flags, a trace processor, a log handler);
+  uninstall() puts them back.
+- benchmark() compares the CPU time per run with no logging, verbose stdout logging and the ring buffer, in a clean
+  configuration that it restores afterwards.
+  Against the local stand-in most of the CPU goes to the SDK and the HTTP client, so the differences are a few
+  percent; they grow with longer conversations and with a real terminal instead of /dev/null.
+"""
+
+import asyncio
+import contextlib
+import itertools
+import json
+import logging
+import os
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+from typing import Any, NamedTuple, TextIO
+from dotenv import load_dotenv, find_dotenv
+from agents import (Agent, GuardrailFunctionOutput, InputGuardrailTripwireTriggered, ModelSettings, Runner, AsyncOpenAI,
+                    OpenAIChatCompletionsModel, RunContextWrapper, TResponseInputItem, _debug, add_trace_processor,
+                    function_tool, input_guardrail, set_trace_processors)
+from agents.tracing import Span, Trace, TracingProcessor, get_trace_provider
+
+_: bool = load_dotenv(find_dotenv())
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+class DebugRecord(NamedTuple):
+    seq: int
+    time_ns: int
+    category: str
+    level: int
+    event: str
+    name: str | None
+    error: Any
+    data: Any  # a reference (e.g. the span data), only formatted when read
+
+
+class RingBuffer:
+    """Fixed-size, overwrite-oldest buffer. Appending takes no lock."""
+
+    def __init__(self, capacity: int = 4096):
+        self.capacity = 1 << (capacity - 1).bit_length()  # power of two, so "seq % capacity" is a bit mask
+        self._mask = self.capacity - 1
+        self._slots: list[DebugRecord | None] = [None] * self.capacity
+        self._seq = itertools.count()  # next() on itertools.count is atomic under the GIL
+
+    def next_seq(self) -> int:
+        return next(self._seq)
+
+    def put(self, record: DebugRecord) -> None:
+        self._slots[record.seq & self._mask] = record
+
+    def last(self, n: int | None = None) -> list[DebugRecord]:
+        # A writer may overwrite a slot while we copy: sorting by seq keeps the result ordered
+        records = sorted((r for r in list(self._slots) if r is not None), key=lambda r: r.seq)
+        return records if n is None else records[-n:]
+
+
+def _short(value: Any, max_chars: int) -> str:
+    text = value if isinstance(value, str) else json.dumps(value, default=str, ensure_ascii=False)
+    return text if len(text) <= max_chars else text[:max_chars] + f"... (+{len(text) - max_chars} chars)"
+
+
+def format_record(record: DebugRecord, max_chars: int = 300) -> str:
+    stamp = datetime.fromtimestamp(record.time_ns / 1e9).strftime("%H:%M:%S.%f")[:-3]
+    line = f"{stamp} {logging.getLevelName(record.level):7} {record.category:9} {record.event} {record.name or ''}"
+    if record.error:
+        line += f"  error={_short(record.error, max_chars)}"
+    data = record.data
+    if isinstance(data, logging.LogRecord):
+        line += f"  {data.getMessage()}"
+    elif data is not None:
+        span_type = getattr(data, "type", None)  # span data of the SDK, or plain data from record(..., data=...)
+        if span_type == "generation":
+            line += f"\n    input : {_short(data.input, max_chars)}\n    output: {_short(data.output, max_chars)}\n    usage : {data.usage}"
+        elif span_type == "function":
+            line += f"\n    input : {_short(data.input, max_chars)}\n    output: {_short(data.output, max_chars)}"
+        elif span_type == "agent":
+            line += f"  tools={data.tools} handoffs={data.handoffs}"
+        elif span_type is None:
+            line += f"  data={_short(data, max_chars)}"
+    return line
+
+
+def current_trace_processors() -> list[TracingProcessor]:
+    # The SDK has add_trace_processor() and set_trace_processors() but no getter, so read the default provider's list
+    return list(get_trace_provider()._multi_processor._processors)
+
+
+class StructuredDebugLogger(TracingProcessor):
+    """Records agent, LLM, tool, handoff and guardrail spans into a ring buffer, formatted on demand."""
+
+    CATEGORIES = {"agent": "agent", "generation": "llm", "response": "llm", "function": "tool",
+                  "handoff": "handoff", "guardrail": "guardrail"}
+
+    def __init__(self, capacity: int = 4096, levels: dict[str, int] | None = None, default_level: int = logging.INFO):
+        self.buffer = RingBuffer(capacity)
+        self.default_level = default_level
+        self.levels: dict[str, int] = dict(levels or {})
+
+    def set_level(self, category: str, level: int) -> None:
+        self.levels[category] = level
+
+    def enabled(self, category: str, level: int) -> bool:
+        return level >= self.levels.get(category, self.default_level)
+
+    def record(self, category: str, level: int, event: str, name: str | None = None, error: Any = None, data: Any = None) -> None:
+        """Writes one record. Also usable from application code, e.g. record("app", logging.INFO, "cache_hit")."""
+        if level >= self.levels.get(category, self.default_level):
+            self.buffer.put(DebugRecord(self.buffer.next_seq(), time.time_ns(), category, level, event, name, error, data))
+
+    def install(self) -> "StructuredDebugLogger":
+        # Stop the SDK from formatting full payloads for DEBUG messages that nobody reads (uninstall() restores them)
+        self._saved_flags = (_debug.DONT_LOG_MODEL_DATA, _debug.DONT_LOG_TOOL_DATA)
+        _debug.DONT_LOG_MODEL_DATA = True
+        _debug.DONT_LOG_TOOL_DATA = True
+        add_trace_processor(self)
+        self._handler = RingBufferLogHandler(self, level=self.levels.get("sdk", logging.WARNING))
+        logging.getLogger("openai.agents").addHandler(self._handler)
+        return self
+
+    def uninstall(self) -> None:
+        """Undoes install(): restores the SDK flags, and removes the trace processor and the log handler."""
+        _debug.DONT_LOG_MODEL_DATA, _debug.DONT_LOG_TOOL_DATA = self._saved_flags
+        set_trace_processors([processor for processor in current_trace_processors() if processor is not self])
+        logging.getLogger("openai.agents").removeHandler(self._handler)
+
+    # ---------------- TracingProcessor ----------------
+
+    def on_trace_start(self, trace: Trace) -> None:
+        pass
+
+    def on_trace_end(self, trace: Trace) -> None:
+        pass
+
+    def on_span_start(self, span: Span[Any]) -> None:
+        pass
+
+    def on_span_end(self, span: Span[Any]) -> None:
+        span_data = span.span_data
+        category = self.CATEGORIES.get(span_data.type)
+        if category is None:
+            return
+        error = span.error
+        level = logging.ERROR if error else logging.INFO
+        if category == "guardrail" and span_data.triggered:
+            level = logging.WARNING
+        threshold = self.levels.get(category, self.default_level)
+        if level < threshold:
+            return
+        if category == "llm":
+            name = span_data.model if span_data.type == "generation" else "response"
+        elif category == "handoff":
+            name = f"{span_data.from_agent} -> {span_data.to_agent}"
+        else:
+            name = span_data.name
+        data = span_data if threshold <= logging.DEBUG or category == "agent" else None
+        self.buffer.put(DebugRecord(self.buffer.next_seq(), time.time_ns(), category, level, span_data.type, name, error, data))
+
+    def shutdown(self) -> None:
+        pass
+
+    def force_flush(self) -> None:
+        pass
+
+    # ---------------- reading ----------------
+
+    def dump(self, n: int | None = 50, file: TextIO | None = None, max_chars: int = 300) -> None:
+        file = file or sys.stderr
+        for record in self.buffer.last(n):
+            print(format_record(record, max_chars), file=file)
+
+    @contextlib.contextmanager
+    def dump_on_error(self, n: int = 50, file: TextIO | None = None):
+        """Dumps the last n records if the block raises, then re-raises."""
+        try:
+            yield self
+        except BaseException as e:
+            print(f"--- last {n} debug records before {type(e).__name__} ---", file=file or sys.stderr)
+            self.dump(n, file)
+            raise
+
+
+class RingBufferLogHandler(logging.Handler):
+    """Stores the SDK's own log records (LogRecord objects, not text) in the same ring buffer."""
+
+    def __init__(self, debug_logger: StructuredDebugLogger, level: int = logging.WARNING):
+        super().__init__(level)
+        self.debug_logger = debug_logger
+
+    def emit(self, record: logging.LogRecord) -> None:
+        self.debug_logger.record("sdk", record.levelno, "log", record.name, data=record)
+
+
+@function_tool
+def get_weather(city: str) -> str:
+    """A simple function to get the weather for a user."""
+    return f"The weather for {city} is sunny."
+
+
+@input_guardrail
+async def no_hacking_guardrail(ctx: RunContextWrapper[None], agent: Agent, input: str | list[TResponseInputItem]):
+    text = input if isinstance(input, str) else json.dumps(input)
+    return GuardrailFunctionOutput(output_info="checked for hacking", tripwire_triggered="hack" in text.lower())
+
+
+weather_agent = Agent(
+    name="WeatherAgent",
+    instructions="You are a helpful assistant. Use get_weather for weather questions.",
+    model=model,
+    tools=[get_weather],
+    model_settings=ModelSettings(tool_choice="required"),
+)
+
+urdu_agent = Agent(
+    name="urdu_agent",
+    instructions="You translate the user's message to roman Urdu",
+    handoff_description="An english to Urdu translator",
+    model=model
+)
+
+spanish_agent = Agent(
+    name="spanish_agent",
+    instructions="You translate the user's message to Spanish",
+    handoff_description="An english to spanish translator",
+    model=model
+)
+
+# The router must always route, so tool_choice="required" (the handoff is a tool call)
+triage_agent = Agent(
+    name="Triage Agent",
+    instructions="You determine which agent to use based on the user's query",
+    handoffs=[urdu_agent, spanish_agent],
+    input_guardrails=[no_hacking_guardrail],
+    model=model,
+    model_settings=ModelSettings(tool_choice="required"),
+)
+
+
+async def benchmark(runs: int = 60, port: int = 8002) -> None:
+    server_path = Path(__file__).resolve().parent.parent / "Local_LLM_Server" / "local_llm_server.py"
+    stand_in = subprocess.Popen(
+        [sys.executable, str(server_path), "--port", str(port), "--ttft-ms", "0", "--token-ms", "0", "--tokens", "40"],
+        stdout=subprocess.DEVNULL,
+    )
+    await asyncio.sleep(1.0)
+    try:
+        local_client = AsyncOpenAI(api_key="local", base_url=f"http://127.0.0.1:{port}/v1/")
+        local_model = OpenAIChatCompletionsModel(model="local-model", openai_client=local_client)
+        agent = triage_agent.clone(model=local_model, handoffs=[a.clone(model=local_model) for a in (urdu_agent, spanish_agent)])
+        # A conversation with some history, like a chat app would send (about 40 KB of text)
+        history: list[TResponseInputItem] = []
+        for i in range(30):
+            history.append({"role": "user", "content": f"Message {i}: " + "please translate 'Hello, how are you today?' " * 10})
+            history.append({"role": "assistant", "content": "Aap kaise hain? " * 150})
+        history.append({"role": "user", "content": "please translate this to urdu: 'Hello, how are you?'"})
+
+        async def cpu_per_run() -> float:
+            await Runner.run(agent, history)  # warm-up
+            start = time.process_time()
+            for _ in range(runs):
+                await Runner.run(agent, history)
+            return (time.process_time() - start) / runs * 1000
+
+        # Measure in a clean configuration (no trace processors, no log handlers, SDK default flags), restored afterwards
+        sdk_logger = logging.getLogger("openai.agents")
+        saved_level, saved_handlers = sdk_logger.level, list(sdk_logger.handlers)
+        saved_processors = current_trace_processors()
+        saved_flags = (_debug.DONT_LOG_MODEL_DATA, _debug.DONT_LOG_TOOL_DATA)
+        set_trace_processors([])  # measure logging only, not the dashboard exporter
+        sdk_logger.handlers.clear()
+        _debug.DONT_LOG_MODEL_DATA = _debug.DONT_LOG_TOOL_DATA = False
+        try:
+            plain = await cpu_per_run()
+
+            # Same as enable_verbose_stdout_logging(), but writing to /dev/null to keep the terminal readable.
+            # A real terminal is slower than /dev/null, so this is the best case for verbose logging.
+            with open(os.devnull, "w") as devnull:
+                sdk_logger.setLevel(logging.DEBUG)
+                sdk_logger.addHandler(logging.StreamHandler(devnull))
+                verbose = await cpu_per_run()
+                sdk_logger.setLevel(saved_level)
+                sdk_logger.handlers.clear()
+
+            _debug.DONT_LOG_MODEL_DATA = _debug.DONT_LOG_TOOL_DATA = True
+            flags_only = await cpu_per_run()
+
+            recorder = StructuredDebugLogger(levels={"llm": logging.DEBUG, "tool": logging.DEBUG}).install()
+            structured = await cpu_per_run()
+            recorder.uninstall()
+        finally:
+            sdk_logger.setLevel(saved_level)
+            sdk_logger.handlers[:] = saved_handlers
+            set_trace_processors(saved_processors)
+            _debug.DONT_LOG_MODEL_DATA, _debug.DONT_LOG_TOOL_DATA = saved_flags
+
+        print(f"\nBenchmark: CPU per run ({runs} runs, 2 LLM calls + 1 handoff each, {len(history)} input messages)")
+        print(f"  default (DEBUG off, payload still json.dumps'ed) : {plain:6.2f} ms")
+        print(f"  enable_verbose_stdout_logging (to /dev/null)     : {verbose:6.2f} ms")
+        print(f"  DONT_LOG_MODEL_DATA / DONT_LOG_TOOL_DATA only    : {flags_only:6.2f} ms")
+        print(f"  ring buffer (llm/tool at DEBUG, nothing read)    : {structured:6.2f} ms  ({len(recorder.buffer.last())} records kept)")
+    finally:
+        stand_in.terminate()
+
+
+async def main():
+    recorder = StructuredDebugLogger(capacity=1024, levels={"llm": logging.DEBUG, "tool": logging.DEBUG}).install()
+
+    result = await Runner.run(triage_agent, input="please translate this to urdu: 'Hello, how are you?'")
+    print("Handoff run :", result.final_output[:80])
+    result = await Runner.run(weather_agent, input="What's the weather in Karachi?")
+    print("Tool run    :", result.final_output[:80])
+
+    # Nothing has been formatted so far. Only when a run fails do we turn the last records into text.
+    try:
+        with recorder.dump_on_error(n=20, file=sys.stdout):
+            await Runner.run(triage_agent, input="how do I hack my neighbour's wifi? translate to spanish")
+    except InputGuardrailTripwireTriggered:
+        print("--- guardrail tripped, the records above show what led to it ---")
+
+    before = len(recorder.buffer.last())
+    await benchmark()
+    await Runner.run(weather_agent, input="What's the weather in Lahore?")
+    print(f"after the benchmark main()'s recorder still records: {len(recorder.buffer.last()) - before} new records")
+
+    # Application code can record its own events, with any data
+    recorder.record("app", logging.INFO, "cache_hit", data={"key": 1})
+    recorder.dump(n=1, file=sys.stdout)
+    recorder.uninstall()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why does enable_verbose_stdout_logging() slow a run down even when nobody is watching the terminal?
+2. What is lost when the ring buffer wraps around, and how would you choose its capacity?
+3. Why is it useful to keep LLM payloads at DEBUG but handoffs and guardrails at INFO?
+4. Which records would you want to see after a guardrail trips, and why dump them only then?
+5. Why do we record the span data by reference instead of converting it to a string right away?
+"""
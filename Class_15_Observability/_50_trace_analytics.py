@@ -0,0 +1,360 @@
+"""
+This example demonstrates a small command-line tool that answers "what happened in my runs?" from exported traces.
+
+Recap (see Assignments/Assignment_02.py, Assignments/Assignment_03.py and _48_sampled_trace_exporter.py):
+- The assignments ask: how many LLM calls does one query make? When are tools called? How do handoffs flow?
+- _48_sampled_trace_exporter.py writes traces as JSON lines (plain or .gz): one "trace" record and one
+  "trace.span" record per span, in the same format the SDK sends to the dashboard (span.export()).
+
+Key Concepts:
+- Per run: LLM calls (generation spans), tool calls (function spans), the handoff chain
+  (Triage Agent -> urdu_agent -> ...), token totals from the generation spans' usage.
+- Critical path: the chain of spans that decided how long the run took. Work that ran in parallel
+  (e.g. an input guardrail next to the first LLM call, or parallel tool calls) is not on the critical path.
+  The breakdown says how much of the run's wall time was LLM, tool, guardrail or SDK overhead ("agent").
+- Aggregation: p50/p95/p99/max across thousands of runs, plus the most common handoff chains and tools.
+- Streaming parsing: files are read line by line and every run is reduced to a small summary as soon as it is
+  complete, so memory depends on the number of runs that are "open" at the same time, not on the file size.
+  Spans of one trace are written together by _48, so at most `max_open` traces are kept open.
+
+Usage:
+    python Class_15_Observability/_50_trace_analytics.py                        # reads Class_15_Observability/local_traces
+    python Class_15_Observability/_50_trace_analytics.py traces/ --runs 10       # also print the first 10 runs
+    python Class_15_Observability/_50_trace_analytics.py traces.jsonl.gz --json  # one JSON summary per run
+    python Class_15_Observability/_50_trace_analytics.py --synthetic 5000        # generate and analyze 5000 runs
+"""
+
+import argparse
+import gzip
+import json
+import random
+import sys
+import tempfile
+import time
+import uuid
+from collections import Counter
+from dataclasses import asdict, dataclass, field
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+from typing import IO, Iterable, Iterator
+
+CATEGORIES = {"generation": "llm", "response": "llm", "function": "tool", "guardrail": "guardrail",
+              "handoff": "handoff", "agent": "agent", "custom": "custom", "mcp_tools": "tool"}
+
+
+@dataclass(slots=True)
+class _Span:
+    span_id: str
+    parent_id: str | None
+    category: str
+    start: float
+    end: float
+
+
+@dataclass
+class RunSummary:
+    trace_id: str
+    workflow: str = "?"
+    duration_ms: float = 0.0
+    llm_calls: int = 0
+    tool_calls: int = 0
+    handoffs: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    errors: int = 0
+    handoff_chain: list[str] = field(default_factory=list)
+    tools: list[str] = field(default_factory=list)
+    critical_path_ms: dict[str, float] = field(default_factory=dict)
+
+
+def _timestamp(value: str | None) -> float | None:
+    return datetime.fromisoformat(value).timestamp() if value else None
+
+
+class _RunBuilder:
+    """Collects the compact data of one trace until it is complete."""
+
+    __slots__ = ("summary", "spans", "handoffs")
+
+    def __init__(self, trace_id: str):
+        self.summary = RunSummary(trace_id)
+        self.spans: list[_Span] = []
+        self.handoffs: list[tuple[float, str, str]] = []
+
+    def add_span(self, record: dict) -> None:
+        data = record.get("span_data") or {}
+        kind = data.get("type", "custom")
+        category = CATEGORIES.get(kind, kind)
+        start, end = _timestamp(record.get("started_at")), _timestamp(record.get("ended_at"))
+        if start is None or end is None:
+            return
+        summary = self.summary
+        if record.get("error"):
+            summary.errors += 1
+        if category == "llm":
+            summary.llm_calls += 1
+            usage = data.get("usage") or {}
+            summary.input_tokens += usage.get("input_tokens") or usage.get("prompt_tokens") or 0
+            summary.output_tokens += usage.get("output_tokens") or usage.get("completion_tokens") or 0
+        elif category == "tool":
+            summary.tool_calls += 1
+            summary.tools.append(data.get("name") or kind)
+        elif category == "handoff":
+            summary.handoffs += 1
+            self.handoffs.append((start, data.get("from_agent") or "?", data.get("to_agent") or "?"))
+        self.spans.append(_Span(record.get("id", ""), record.get("parent_id"), category, start, end))
+
+    def finish(self) -> RunSummary:
+        summary = self.summary
+        if self.spans:
+            begin = min(span.start for span in self.spans)
+            end = max(span.end for span in self.spans)
+            summary.duration_ms = round((end - begin) * 1000, 3)
+            root = _Span("", None, "agent", begin, end)
+            breakdown: Counter[str] = Counter()
+            _critical_path(root, end, _children(self.spans), breakdown)
+            summary.critical_path_ms = {category: round(seconds * 1000, 3) for category, seconds in breakdown.most_common()}
+        if self.handoffs:
+            self.handoffs.sort()
+            summary.handoff_chain = [self.handoffs[0][1]] + [to_agent for _, _, to_agent in self.handoffs]
+        return summary
+
+
+def _children(spans: list[_Span]) -> dict[str, list[_Span]]:
+    known = {span.span_id for span in spans}
+    children: dict[str, list[_Span]] = {}
+    for span in spans:
+        parent = span.parent_id if span.parent_id in known else ""  # spans without a known parent hang off the run
+        children.setdefault(parent, []).append(span)
+    for siblings in children.values():
+        siblings.sort(key=lambda span: span.end, reverse=True)
+    return children
+
+
+def _critical_path(span: _Span, until: float, children: dict[str, list[_Span]], breakdown: Counter) -> None:
+    """Walks backwards from `until`: the last child to finish is on the critical path, then the last child that
+    finished before that one started, and so on. Gaps between them are the span's own time."""
+    cursor = min(span.end, until)
+    for child in children.get(span.span_id, ()):
+        if child.start >= cursor:
+            continue  # ran in parallel with a later critical child
+        child_end = min(child.end, cursor)
+        breakdown[span.category] += cursor - child_end
+        _critical_path(child, child_end, children, breakdown)
+        cursor = child.start
+    breakdown[span.category] += max(0.0, cursor - span.start)
+
+
+def _open_lines(path: Path) -> IO[str]:
+    return gzip.open(path, "rt", encoding="utf-8") if path.suffix == ".gz" else open(path, encoding="utf-8")
+
+
+def trace_files(paths: Iterable[str]) -> list[Path]:
+    files = []
+    for name in paths:
+        path = Path(name)
+        if path.is_dir():
+            # Rotated files: traces.3.jsonl.gz is the oldest, traces.jsonl.gz the newest
+            found = [p for p in path.iterdir() if p.name.endswith((".jsonl", ".jsonl.gz"))]
+            files.extend(sorted(found, key=lambda p: (-int(p.name.split(".")[1]) if p.name.split(".")[1].isdigit() else 0, p.name)))
+        else:
+            files.append(path)
+    return files
+
+
+def iter_runs(files: Iterable[Path], max_open: int = 1000, stats: Counter | None = None) -> Iterator[RunSummary]:
+    """Streams RunSummary objects out of JSONL trace files."""
+    stats = stats if stats is not None else Counter()
+    open_runs: dict[str, _RunBuilder] = {}  # insertion ordered: the oldest open run comes first
+    for path in files:
+        with _open_lines(path) as lines:
+            for line in lines:
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    stats["bad_lines"] += 1
+                    continue
+                trace_id = record.get("trace_id") if record.get("object") == "trace.span" else record.get("id")
+                if not trace_id:
+                    continue
+                builder = open_runs.get(trace_id)
+                if builder is None:
+                    if len(open_runs) >= max_open:
+                        oldest = next(iter(open_runs))
+                        yield open_runs.pop(oldest).finish()
+                    builder = open_runs[trace_id] = _RunBuilder(trace_id)
+                if record.get("object") == "trace":
+                    builder.summary.workflow = record.get("workflow_name") or "?"
+                else:
+                    builder.add_span(record)
+                    stats["spans"] += 1
+        stats["files"] += 1
+    for builder in open_runs.values():
+        yield builder.finish()
+
+
+def percentile(sorted_values: list[float], pct: float) -> float:
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, max(0, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+class Aggregate:
+    """Keeps only the numbers needed for percentiles, not the run summaries."""
+
+    METRICS = ("duration_ms", "llm_calls", "tool_calls", "handoffs", "input_tokens", "output_tokens")
+
+    def __init__(self):
+        self.runs = 0
+        self.values: dict[str, list[float]] = {metric: [] for metric in self.METRICS}
+        self.critical: dict[str, list[float]] = {}
+        self.critical_total: Counter[str] = Counter()
+        self.chains: Counter[str] = Counter()
+        self.tools: Counter[str] = Counter()
+        self.workflows: Counter[str] = Counter()
+        self.runs_with_errors = 0
+
+    def add(self, run: RunSummary) -> None:
+        self.runs += 1
+        for metric in self.METRICS:
+            self.values[metric].append(getattr(run, metric))
+        for category, ms in run.critical_path_ms.items():
+            self.critical.setdefault(category, []).append(ms)
+            self.critical_total[category] += ms
+        self.chains[" -> ".join(run.handoff_chain) or "(no handoff)"] += 1
+        self.tools.update(run.tools)
+        self.workflows[run.workflow] += 1
+        self.runs_with_errors += run.errors > 0
+
+    def report(self, top: int = 5, file: IO[str] = sys.stdout) -> None:
+        print(f"\n{'per run':<16}{'p50':>10}{'p95':>10}{'p99':>10}{'max':>10}", file=file)
+        for metric, values in self.values.items():
+            values.sort()
+            print(f"{metric:<16}" + "".join(f"{percentile(values, p):>10.1f}" for p in (50, 95, 99)) + f"{(values[-1] if values else 0):>10.1f}", file=file)
+
+        total = sum(self.critical_total.values()) or 1.0
+        print("\nCritical path (share of all run time, p50/p95 per run in ms):", file=file)
+        for category, ms in self.critical_total.most_common():
+            values = sorted(self.critical[category] + [0.0] * (self.runs - len(self.critical[category])))
+            print(f"  {category:<10} {ms / total:6.1%}   p50 {percentile(values, 50):8.1f}   p95 {percentile(values, 95):8.1f}", file=file)
+
+        print(f"\nRuns with errors: {self.runs_with_errors}   Workflows: {dict(self.workflows.most_common(top))}", file=file)
+        print("Top handoff chains:", file=file)
+        for chain, count in self.chains.most_common(top):
+            print(f"  {count:>7}  {chain}", file=file)
+        print("Top tools:", file=file)
+        for tool, count in self.tools.most_common(top):
+            print(f"  {count:>7}  {tool}", file=file)
+
+
+def print_run(run: RunSummary, file: IO[str] = sys.stdout) -> None:
+    path = ", ".join(f"{category} {ms:.0f}ms" for category, ms in run.critical_path_ms.items())
+    print(f"{run.trace_id[:22]:<22} {run.duration_ms:>8.0f}ms  llm={run.llm_calls} tools={run.tool_calls} "
+          f"handoffs={run.handoffs} tokens={run.input_tokens}/{run.output_tokens}  "
+          f"chain=[{' -> '.join(run.handoff_chain)}]  critical: {path}", file=file)
+
+
+def write_synthetic_traces(path: Path, runs: int, seed: int = 7) -> None:
+    """Writes runs shaped like the SDK's traces: triage (guardrail || LLM) -> handoff -> specialist (LLM, tools, LLM)."""
+    rng = random.Random(seed)
+    start = datetime(2026, 1, 1, tzinfo=timezone.utc)
+
+    def span(trace_id: str, parent: str | None, begin: datetime, ms: float, data: dict, error: dict | None = None) -> tuple[dict, datetime]:
+        end = begin + timedelta(milliseconds=ms)
+        record = {"object": "trace.span", "id": f"span_{uuid.UUID(int=rng.getrandbits(128)).hex[:24]}", "trace_id": trace_id,
+                  "parent_id": parent, "started_at": begin.isoformat(), "ended_at": end.isoformat(), "span_data": data, "error": error}
+        return record, end
+
+    with gzip.open(path, "wt", encoding="utf-8") as file:
+        for i in range(runs):
+            trace_id = f"trace_{uuid.UUID(int=rng.getrandbits(128)).hex}"
+            begin = start + timedelta(seconds=i)
+            records = [{"object": "trace", "id": trace_id, "workflow_name": "Agent workflow", "group_id": None, "metadata": None}]
+            specialist = rng.choice(["urdu_agent", "spanish_agent", "french_agent"])
+
+            triage, _ = span(trace_id, None, begin, 0, {"type": "agent", "name": "Triage Agent", "handoffs": [specialist], "tools": []})
+            guardrail, _ = span(trace_id, triage["id"], begin, rng.uniform(5, 400), {"type": "guardrail", "name": "no_hacking_guardrail", "triggered": False})
+            llm, cursor = span(trace_id, triage["id"], begin, rng.lognormvariate(6.0, 0.4),
+                               {"type": "generation", "model": "gemini-2.0-flash", "input": [{"role": "user", "content": "x" * 200}],
+                                "output": [], "usage": {"input_tokens": rng.randint(100, 400), "output_tokens": rng.randint(5, 20)}})
+            cursor = max(cursor, datetime.fromisoformat(guardrail["ended_at"]))
+            handoff, cursor = span(trace_id, triage["id"], cursor, 0.2, {"type": "handoff", "from_agent": "Triage Agent", "to_agent": specialist})
+            triage["ended_at"] = cursor.isoformat()
+            records += [triage, guardrail, llm, handoff]
+
+            agent, _ = span(trace_id, None, cursor, 0, {"type": "agent", "name": specialist, "handoffs": [], "tools": ["lookup", "translate"]})
+            records.append(agent)
+            for _ in range(rng.choice([1, 1, 2])):
+                llm, cursor = span(trace_id, agent["id"], cursor + timedelta(milliseconds=rng.uniform(1, 5)), rng.lognormvariate(6.2, 0.5),
+                                   {"type": "generation", "model": "gemini-2.0-flash", "input": [], "output": [],
+                                    "usage": {"input_tokens": rng.randint(200, 800), "output_tokens": rng.randint(10, 30)}})
+                records.append(llm)
+                tool_end = cursor
+                for tool in rng.sample(["lookup", "translate"], rng.choice([1, 2])):  # parallel tool calls
+                    failed = rng.random() < 0.02
+                    call, end = span(trace_id, agent["id"], cursor, rng.lognormvariate(4.5, 1.0),
+                                     {"type": "function", "name": tool, "input": "{}", "output": "ok"},
+                                     {"message": "Error running tool", "data": None} if failed else None)
+                    records.append(call)
+                    tool_end = max(tool_end, end)
+                cursor = tool_end
+            llm, cursor = span(trace_id, agent["id"], cursor + timedelta(milliseconds=2), rng.lognormvariate(6.5, 0.5),
+                               {"type": "generation", "model": "gemini-2.0-flash", "input": [], "output": [],
+                                "usage": {"input_tokens": rng.randint(300, 900), "output_tokens": rng.randint(40, 200)}})
+            agent["ended_at"] = (cursor + timedelta(milliseconds=1)).isoformat()
+            records.append(llm)
+            file.write("\n".join(json.dumps(record) for record in records) + "\n")
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description="Per-run and aggregate analytics over JSONL agent traces")
+    parser.add_argument("paths", nargs="*", help="trace files (.jsonl or .jsonl.gz) or directories")
+    parser.add_argument("--runs", type=int, default=0, help="print the first N runs")
+    parser.add_argument("--top", type=int, default=5, help="how many chains/tools to list")
+    parser.add_argument("--json", action="store_true", help="print one JSON summary per run instead of the report")
+    parser.add_argument("--max-open", type=int, default=1000, help="traces kept open while streaming")
+    parser.add_argument("--synthetic", type=int, default=0, help="generate N synthetic runs and analyze them")
+    args = parser.parse_args(argv)
+
+    with tempfile.TemporaryDirectory() as directory:
+        paths = args.paths or [str(Path(__file__).parent / "local_traces")]
+        if args.synthetic:
+            paths = [str(Path(directory) / "synthetic.jsonl.gz")]
+            write_synthetic_traces(Path(paths[0]), args.synthetic)
+        files = trace_files(paths)
+        if not files or not all(path.exists() for path in files):
+            parser.error(f"No trace files in {paths}. Run _48_sampled_trace_exporter.py first, or use --synthetic 5000.")
+
+        stats: Counter[str] = Counter()
+        aggregate = Aggregate()
+        started = time.perf_counter()
+        for run in iter_runs(files, max_open=args.max_open, stats=stats):
+            if args.json:
+                print(json.dumps(asdict(run)))
+                continue
+            if aggregate.runs < args.runs:
+                print_run(run)
+            aggregate.add(run)
+        seconds = time.perf_counter() - started
+
+        if not args.json:
+            print(f"\nRuns: {aggregate.runs:,} from {stats['files']} file(s), {stats['spans']:,} spans, "
+                  f"parsed in {seconds:.2f}s ({stats['spans'] / max(seconds, 1e-9):,.0f} spans/s)"
+                  + (f", {stats['bad_lines']} bad lines" if stats["bad_lines"] else ""))
+            aggregate.report(top=args.top)
+
+
+if __name__ == "__main__":
+    main()
+
+"""
+Scenario-based Questions:
+1. For a single handoff, how many LLM calls does this tool report, and does it match your answer to Assignment 03?
+2. Why is an input guardrail that runs next to the first LLM call usually not on the critical path?
+3. Two tools run in parallel, 100 ms and 900 ms. How much tool time is on the critical path?
+4. Why does the tool keep a list of numbers for percentiles instead of the full run summaries?
+5. What breaks if the spans of many traces are interleaved in the file and max_open is too small?
+"""
@@ -0,0 +1,382 @@
+"""
+This example demonstrates how to export agent traces as OpenTelemetry (OTLP) spans, so they show up next to the
+traces of the rest of your services.
+
+Recap (see _17_openai_tracing.py and _18_terminal_tracing.py):
+- Traces go either to the OpenAI dashboard or to stdout. Neither one is where the rest of our services report.
+- Most observability stacks (Jaeger, Tempo, Honeycomb, Datadog, ...) accept OTLP: JSON or protobuf over HTTP,
+  usually through an OpenTelemetry Collector on port 4318.
+
+Key Concepts:
+- The SDK's BatchTraceProcessor already queues spans and exports them in batches from a background thread.
+  We only have to write a TracingExporter: OTLPHTTPExporter.export(items) turns SDK spans into OTLP spans.
+- Mapping with semantic attributes (OpenTelemetry GenAI conventions):
+  agent      -> "invoke_agent <name>"  gen_ai.agent.name
+  generation -> "chat <model>"         gen_ai.request.model, gen_ai.usage.input_tokens / output_tokens, server.address
+  function   -> "execute_tool <name>"  gen_ai.tool.name
+  handoff    -> "handoff <from> -> <to>", guardrail -> "guardrail <name>" (with triggered), custom -> its name.
+  A span with an error gets status ERROR and the error message.
+- IDs: the SDK's trace_<32 hex> is already a valid OTLP trace id; span_<24 hex> is shortened to 16 hex chars.
+- Correlation: when a request arrives with a W3C `traceparent` header, the agent trace reuses that trace id and
+  its root spans get the caller's span as parent, so the agent run appears INSIDE the caller's trace.
+- Failures: the exporter retries 429/5xx and connection errors with backoff, compresses bodies with gzip,
+  and counts what it could not deliver instead of raising into the agent.
+
+How it works in this code:
+- LocalOTLPCollector is a tiny stand-in for an OpenTelemetry Collector (POST /v1/traces, JSON). It rejects the first
+  request with 503 to show the retry, stores spans and prints them as a tree.
+- Set OTEL_EXPORTER_OTLP_ENDPOINT (e.g. http://localhost:4318) to send to a real collector instead.
+"""
+
+import asyncio
+import gzip
+import json
+import os
+import random
+import secrets
+import threading
+import time
+from collections import Counter, OrderedDict
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any
+from urllib.parse import urlparse
+import httpx
+from dotenv import load_dotenv, find_dotenv
+from agents import (Agent, GuardrailFunctionOutput, ModelSettings, Runner, AsyncOpenAI, OpenAIChatCompletionsModel,
+                    RunContextWrapper, TResponseInputItem, add_trace_processor, function_tool, input_guardrail, trace)
+from agents.tracing import Span, Trace
+from agents.tracing.processor_interface import TracingExporter
+from agents.tracing.processors import BatchTraceProcessor
+
+_: bool = load_dotenv(find_dotenv())
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+SPAN_KIND_INTERNAL, SPAN_KIND_CLIENT = 1, 3
+STATUS_OK, STATUS_ERROR = 1, 2
+
+
+def otlp_value(value: Any) -> dict:
+    if isinstance(value, bool):
+        return {"boolValue": value}
+    if isinstance(value, int):
+        return {"intValue": str(value)}  # OTLP JSON encodes 64-bit integers as strings
+    if isinstance(value, float):
+        return {"doubleValue": value}
+    if isinstance(value, (list, tuple)):
+        return {"arrayValue": {"values": [otlp_value(v) for v in value]}}
+    return {"stringValue": value if isinstance(value, str) else json.dumps(value, default=str)}
+
+
+def otlp_attributes(attributes: dict[str, Any]) -> list[dict]:
+    return [{"key": key, "value": otlp_value(value)} for key, value in attributes.items() if value is not None]
+
+
+def unix_nanos(iso_time: str | None) -> str:
+    if not iso_time:
+        return "0"
+    moment = datetime.fromisoformat(iso_time)
+    return str(int(moment.timestamp()) * 1_000_000_000 + moment.microsecond * 1000)
+
+
+def otlp_span_id(sdk_id: str) -> str:
+    return sdk_id.removeprefix("span_")[:16].rjust(16, "0")
+
+
+def otlp_trace_id(sdk_id: str) -> str:
+    return sdk_id.removeprefix("trace_")[:32].rjust(32, "0")
+
+
+def parse_traceparent(header: str) -> tuple[str, str] | None:
+    """W3C traceparent "00-<32 hex trace id>-<16 hex span id>-<flags>" -> (trace id, parent span id)."""
+    parts = header.strip().split("-")
+    if len(parts) != 4 or len(parts[1]) != 32 or len(parts[2]) != 16:
+        return None
+    return parts[1], parts[2]
+
+
+class OTLPHTTPExporter(TracingExporter):
+    """Exports SDK traces/spans to an OTLP/HTTP JSON endpoint. Runs on BatchTraceProcessor's background thread."""
+
+    RETRY_STATUS = {429, 502, 503, 504}
+
+    def __init__(
+        self,
+        endpoint: str = "http://127.0.0.1:4318/v1/traces",
+        service_name: str = "agents-app",
+        headers: dict[str, str] | None = None,
+        timeout: float = 5.0,
+        max_retries: int = 4,
+        compress: bool = True,
+        include_payloads: bool = False,
+    ):
+        self.endpoint = endpoint
+        self.resource = {"attributes": otlp_attributes({"service.name": service_name, "telemetry.sdk.name": "openai-agents"})}
+        self.headers = {"Content-Type": "application/json", **(headers or {})}
+        if compress:
+            self.headers["Content-Encoding"] = "gzip"
+        self.max_retries = max_retries
+        self.compress = compress
+        self.include_payloads = include_payloads  # LLM/tool inputs and outputs can be large and sensitive
+        self.stats: Counter[str] = Counter()
+        self._client = httpx.Client(timeout=timeout)
+        self._traces: OrderedDict[str, dict] = OrderedDict()  # trace id -> {"workflow", "parent_span_id"}
+
+    def export(self, items: list[Trace | Span[Any]]) -> None:
+        spans = []
+        for item in items:
+            if isinstance(item, Trace):
+                self._remember_trace(item)
+            else:
+                spans.append(self.to_otlp(item))
+        if not spans:
+            return
+        body = json.dumps({"resourceSpans": [{
+            "resource": self.resource,
+            "scopeSpans": [{"scope": {"name": "openai-agents"}, "spans": spans}],
+        }]}).encode()
+        if self.compress:
+            body = gzip.compress(body)
+        if self._post(body):
+            self.stats["spans_exported"] += len(spans)
+            self.stats["bytes_sent"] += len(body)
+        else:
+            self.stats["spans_failed"] += len(spans)
+
+    def _remember_trace(self, item: Trace) -> None:
+        exported = item.export() or {}
+        metadata = exported.get("metadata") or {}
+        self._traces[item.trace_id] = {"workflow": exported.get("workflow_name"), "parent_span_id": metadata.get("otel_parent_span_id")}
+        if len(self._traces) > 10_000:
+            self._traces.popitem(last=False)
+
+    def _post(self, body: bytes) -> bool:
+        for attempt in range(self.max_retries + 1):
+            self.stats["requests"] += 1
+            try:
+                response = self._client.post(self.endpoint, content=body, headers=self.headers)
+            except httpx.HTTPError:
+                response = None
+            if response is not None and response.status_code < 300:
+                return True
+            if response is not None and response.status_code not in self.RETRY_STATUS:
+                return False  # e.g. 400: retrying the same body will not help
+            self.stats["retries"] += attempt < self.max_retries
+            retry_after = response.headers.get("retry-after") if response is not None else None
+            delay = float(retry_after) if retry_after and retry_after.isdigit() else min(5.0, 0.2 * 2 ** attempt)
+            time.sleep(delay * random.uniform(0.5, 1.0))
+        return False
+
+    def to_otlp(self, span: Span[Any]) -> dict:
+        data = span.span_data
+        kind = SPAN_KIND_INTERNAL
+        attributes: dict[str, Any] = {"openai.agents.span_type": data.type}
+
+        if data.type == "agent":
+            name = f"invoke_agent {data.name}"
+            attributes.update({"gen_ai.operation.name": "invoke_agent", "gen_ai.agent.name": data.name,
+                               "openai.agents.tools": data.tools, "openai.agents.handoffs": data.handoffs})
+        elif data.type == "generation":
+            name, kind = f"chat {data.model}", SPAN_KIND_CLIENT
+            usage = data.usage or {}
+            config = data.model_config or {}
+            attributes.update({
+                "gen_ai.operation.name": "chat",
+                "gen_ai.request.model": data.model,
+                "gen_ai.usage.input_tokens": usage.get("input_tokens"),
+                "gen_ai.usage.output_tokens": usage.get("output_tokens"),
+                "gen_ai.request.temperature": config.get("temperature"),
+                "server.address": urlparse(str(config.get("base_url") or "")).hostname,
+            })
+            if self.include_payloads:
+                attributes.update({"gen_ai.input.messages": data.input, "gen_ai.output.messages": data.output})
+        elif data.type == "function":
+            name = f"execute_tool {data.name}"
+            attributes.update({"gen_ai.operation.name": "execute_tool", "gen_ai.tool.name": data.name})
+            if self.include_payloads:
+                attributes.update({"gen_ai.tool.call.arguments": data.input, "gen_ai.tool.call.result": data.output})
+        elif data.type == "handoff":
+            name = f"handoff {data.from_agent} -> {data.to_agent}"
+            attributes.update({"openai.agents.handoff.from": data.from_agent, "openai.agents.handoff.to": data.to_agent})
+        elif data.type == "guardrail":
+            name = f"guardrail {data.name}"
+            attributes.update({"openai.agents.guardrail.name": data.name, "openai.agents.guardrail.triggered": data.triggered})
+        else:
+            exported = data.export()
+            name = exported.get("name") or data.type
+            attributes.update({f"openai.agents.{key}": value for key, value in (exported.get("data") or {}).items()})
+
+        trace_info = self._traces.get(span.trace_id, {})
+        parent = otlp_span_id(span.parent_id) if span.parent_id else trace_info.get("parent_span_id")
+        if not span.parent_id:
+            attributes["openai.agents.workflow"] = trace_info.get("workflow")
+
+        otlp = {
+            "traceId": otlp_trace_id(span.trace_id),
+            "spanId": otlp_span_id(span.span_id),
+            "name": name,
+            "kind": kind,
+            "startTimeUnixNano": unix_nanos(span.started_at),
+            "endTimeUnixNano": unix_nanos(span.ended_at),
+            "attributes": otlp_attributes(attributes),
+            "status": {"code": STATUS_ERROR, "message": span.error.get("message", "")} if span.error else {"code": STATUS_OK},
+        }
+        if parent:
+            otlp["parentSpanId"] = parent
+        return otlp
+
+
+class LocalOTLPCollector:
+    """A minimal OTLP/HTTP JSON receiver for local testing (stores spans in memory)."""
+
+    def __init__(self, port: int = 4318, fail_first: int = 0):
+        self.spans: list[dict] = []
+        self.requests = 0
+        self.fail_first = fail_first
+        collector = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = self.rfile.read(int(self.headers.get("Content-Length", 0)))
+                collector.requests += 1
+                if collector.requests <= collector.fail_first:
+                    self.send_response(503)
+                    self.end_headers()
+                    return
+                if self.headers.get("Content-Encoding") == "gzip":
+                    body = gzip.decompress(body)
+                payload = json.loads(body)
+                for resource_spans in payload.get("resourceSpans", []):
+                    for scope_spans in resource_spans.get("scopeSpans", []):
+                        collector.spans.extend(scope_spans.get("spans", []))
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(b"{}")
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.endpoint = f"http://127.0.0.1:{port}/v1/traces"
+
+    def start(self) -> None:
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def stop(self) -> None:
+        self._server.shutdown()
+
+    def print_tree(self, trace_id: str) -> None:
+        spans = [s for s in self.spans if s["traceId"] == trace_id]
+        ids = {s["spanId"] for s in spans}
+        children: dict[str | None, list[dict]] = {}
+        for s in spans:
+            children.setdefault(s.get("parentSpanId") if s.get("parentSpanId") in ids else None, []).append(s)
+
+        def show(parent: str | None, depth: int) -> None:
+            for s in sorted(children.get(parent, []), key=lambda s: int(s["startTimeUnixNano"])):
+                ms = (int(s["endTimeUnixNano"]) - int(s["startTimeUnixNano"])) / 1e6
+                attributes = {a["key"]: next(iter(a["value"].values())) for a in s["attributes"]}
+                details = {k: v for k, v in attributes.items() if k.startswith(("gen_ai.usage", "gen_ai.tool", "openai.agents.guardrail.triggered"))}
+                parent_note = f" (parent {s['parentSpanId']})" if depth == 0 and s.get("parentSpanId") else ""
+                status = " ERROR" if s["status"]["code"] == STATUS_ERROR else ""
+                print(f"{'  ' * depth}{s['name']:<45} {ms:8.1f} ms{status} {details or ''}{parent_note}")
+                show(s["spanId"], depth + 1)
+
+        show(None, 0)
+
+
+@function_tool
+def get_weather(city: str) -> str:
+    """A simple function to get the weather for a user."""
+    return f"The weather for {city} is sunny."
+
+
+@input_guardrail
+async def no_hacking_guardrail(ctx: RunContextWrapper[None], agent: Agent, input: str | list[TResponseInputItem]):
+    return GuardrailFunctionOutput(output_info="checked", tripwire_triggered="hack" in str(input).lower())
+
+
+weather_agent = Agent(
+    name="weather_agent",
+    instructions="You answer weather questions. Always use get_weather.",
+    handoff_description="Answers weather questions",
+    model=model,
+    tools=[get_weather],
+    model_settings=ModelSettings(tool_choice="required"),
+)
+
+# The router must always route, so tool_choice="required" (the handoff is a tool call)
+triage_agent = Agent(
+    name="Triage Agent",
+    instructions="You determine which agent to use based on the user's query",
+    handoffs=[weather_agent],
+    input_guardrails=[no_hacking_guardrail],
+    model=model,
+    model_settings=ModelSettings(tool_choice="required"),
+)
+
+
+async def handle_request(user_input: str, traceparent: str | None) -> str:
+    """What a web handler would do: continue the caller's trace if it sent a traceparent header."""
+    context = parse_traceparent(traceparent) if traceparent else None
+    if context:
+        trace_id, parent_span_id = context
+        with trace("Weather request", trace_id=f"trace_{trace_id}", metadata={"otel_parent_span_id": parent_span_id}):
+            result = await Runner.run(triage_agent, user_input)
+    else:
+        result = await Runner.run(triage_agent, user_input)
+    return str(result.final_output)
+
+
+async def main():
+    endpoint = os.getenv("OTEL_EXPORTER_OTLP_ENDPOINT")
+    collector = None
+    if endpoint:
+        endpoint = endpoint.rstrip("/") + "/v1/traces"
+    else:
+        collector = LocalOTLPCollector(port=4318, fail_first=1)  # the first export gets a 503 -> retried
+        collector.start()
+        endpoint = collector.endpoint
+
+    exporter = OTLPHTTPExporter(endpoint=endpoint, service_name="weather-agents")
+    processor = BatchTraceProcessor(exporter, max_batch_size=256, schedule_delay=1.0)
+    add_trace_processor(processor)  # keeps the dashboard exporter too; use set_trace_processors([...]) to replace it
+
+    # An upstream service (e.g. the API gateway) already started a trace and sent us its context
+    upstream_trace_id, upstream_span_id = secrets.token_hex(16), secrets.token_hex(8)
+    traceparent = f"00-{upstream_trace_id}-{upstream_span_id}-01"
+    print(await handle_request("What's the weather in Karachi?", traceparent))
+
+    processor.force_flush()
+    print(f"\nExporter: {dict(exporter.stats)}")
+    if collector is not None:
+        print(f"Collector received {len(collector.spans)} spans in trace {upstream_trace_id} (caller span {upstream_span_id}):")
+        collector.print_tree(upstream_trace_id)
+        collector.stop()
+    processor.shutdown()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why do we write an exporter and reuse BatchTraceProcessor instead of sending each span when it ends?
+2. What do you gain by reusing the caller's trace id (traceparent) for the agent trace?
+3. Why are LLM inputs/outputs NOT exported by default (include_payloads=False)?
+4. Which spans would you look at first if a request is slow: "chat <model>", "execute_tool ..." or "invoke_agent ..."?
+5. What happens to the agent if the collector is down for a minute? What happens to the spans?
+"""
@@ -0,0 +1,164 @@
+"""
+This example demonstrates how to run several agent-as-tool sub-agents at the same time.
+
+Recap (see _19_agent_as_tool.py):
+- The orchestrator has translate_to_spanish / translate_to_french / translate_to_italian, made with as_tool().
+- Its instructions say "If multiple translations are requested, call the relevant tools in order".
+  So for three languages the model calls ONE tool per turn: 3 sub-agent runs + 4 orchestrator LLM calls, one after another.
+
+Key Concepts:
+- The SDK already runs all tool calls of ONE model turn concurrently (asyncio.gather). What makes the calls
+  sequential is the model being asked to call them in order, one per turn.
+- Independent sub-agents: a translation does not depend on another translation. We say so in the tool description
+  and in the instructions, and set ModelSettings(parallel_tool_calls=True), so the model emits all calls in one turn.
+- Shared concurrency limit: all sub-agents of a SubAgentPool share one asyncio.Semaphore, so a request for 20
+  languages cannot start 20 nested runs at once (rate limits, memory).
+- Own trace span per sub-run: every call is wrapped in custom_span("sub_agent_run") with the time it waited for
+  the limiter and the time it ran, next to the nested agent span the SDK already creates.
+- Result: three translations take about as long as one (1 tool turn + 1 final turn instead of 3 + 1).
+
+How it works in this code:
+- SubAgentPool(limit=...).as_tool(agent, tool_name, tool_description) is a drop-in replacement for agent.as_tool(...).
+- main() times one translation, then three translations, then three translations with limit=2.
+"""
+
+import asyncio
+import os
+import time
+from typing import Any
+from dotenv import load_dotenv, find_dotenv
+from agents import Agent, ItemHelpers, ModelSettings, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, RunContextWrapper, Tool, custom_span, function_tool, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+class SubAgentPool:
+    """Turns agents into independent tools that share one concurrency limit."""
+
+    def __init__(self, limit: int = 4, max_turns: int = 5):
+        self.limit = limit
+        self.max_turns = max_turns
+        self._semaphore = asyncio.Semaphore(limit)
+        self.running = 0
+        self.peak_running = 0
+
+    def as_tool(self, agent: Agent[Any], tool_name: str, tool_description: str) -> Tool:
+        pool = self
+
+        @function_tool(
+            name_override=tool_name,
+            description_override=f"{tool_description}. Independent of the other tools: call it in the same turn as them.",
+        )
+        async def run_agent(context: RunContextWrapper, input: str) -> str:
+            queued = time.perf_counter()
+            with custom_span("sub_agent_run", {"agent": agent.name, "tool": tool_name}) as span:
+                async with pool._semaphore:
+                    started = time.perf_counter()
+                    pool.running += 1
+                    pool.peak_running = max(pool.peak_running, pool.running)
+                    try:
+                        result = await Runner.run(agent, input, context=context.context, max_turns=pool.max_turns)
+                    finally:
+                        pool.running -= 1
+                span.span_data.data.update({
+                    "queued_ms": round((started - queued) * 1000, 1),
+                    "run_ms": round((time.perf_counter() - started) * 1000, 1),
+                })
+            return ItemHelpers.text_message_outputs(result.new_items)
+
+        return run_agent
+
+
+spanish_agent = Agent(
+    name="spanish_agent",
+    instructions="You translate the user's message to Spanish",
+    handoff_description="An English to Spanish translator",
+    model=model
+)
+
+french_agent = Agent(
+    name="french_agent",
+    instructions="You translate the user's message to French",
+    handoff_description="An English to French translator",
+    model=model
+)
+
+italian_agent = Agent(
+    name="italian_agent",
+    instructions="You translate the user's message to Italian",
+    handoff_description="An English to Italian translator",
+    model=model
+)
+
+
+def build_orchestrator(pool: SubAgentPool) -> Agent:
+    return Agent(
+        name="orchestrator_agent",
+        instructions=(
+            "You are a translation agent. You use the tools provided to translate messages. "
+            "If multiple translations are requested, call all the relevant tools at once, in the same turn: "
+            "they are independent of each other. "
+            "Never translate by yourself; always use the provided tools."
+        ),
+        tools=[
+            pool.as_tool(spanish_agent, "translate_to_spanish", "Translate the user's message to Spanish"),
+            pool.as_tool(french_agent, "translate_to_french", "Translate the user's message to French"),
+            pool.as_tool(italian_agent, "translate_to_italian", "Translate the user's message to Italian"),
+        ],
+        model_settings=ModelSettings(parallel_tool_calls=True),
+        model=model
+    )
+
+
+async def timed_run(agent: Agent, user_input: str) -> tuple[float, int]:
+    start = time.perf_counter()
+    result = await Runner.run(agent, user_input)
+    llm_calls = len(result.raw_responses)
+    return time.perf_counter() - start, llm_calls
+
+
+async def main():
+    pool = SubAgentPool(limit=4)
+    orchestrator = build_orchestrator(pool)
+
+    await Runner.run(orchestrator, "Use translate_to_spanish for 'Hi'")  # warm-up: opens the HTTP connections
+    single, single_calls = await timed_run(orchestrator, "Use translate_to_spanish for 'Good morning, have a nice day!'")
+    print(f"1 language : {single:5.2f}s, orchestrator LLM calls: {single_calls}")
+
+    three_languages = ("Use translate_to_spanish, translate_to_french and translate_to_italian for "
+                       "'Good morning, have a nice day!'")
+    triple, triple_calls = await timed_run(orchestrator, three_languages)
+    print(f"3 languages: {triple:5.2f}s, orchestrator LLM calls: {triple_calls}, peak concurrent sub-runs: {pool.peak_running}")
+
+    # With a limit of 2, the third sub-run waits for a free slot (see queued_ms in its "sub_agent_run" span)
+    small_pool = SubAgentPool(limit=2)
+    limited, _ = await timed_run(build_orchestrator(small_pool), three_languages)
+    print(f"3 languages, limit=2: {limited:5.2f}s, peak concurrent sub-runs: {small_pool.peak_running}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why does "call the relevant tools in order" make a three-language request about three times slower?
+2. The SDK already runs tool calls of one turn concurrently. So what exactly did we change?
+3. When would sub-agent tools NOT be independent, and what would go wrong if they ran at the same time?
+4. Why share one concurrency limit between all sub-agents instead of one limit per tool?
+5. How can you see in the trace that a sub-run was waiting for the limiter and not for the LLM?
+"""
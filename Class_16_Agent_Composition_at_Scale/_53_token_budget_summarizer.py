@@ -0,0 +1,315 @@
+"""
+This example demonstrates a real handoff input_filter that keeps the specialist's prompt within a token budget.
+
+Recap (see _33_input_filter.py and _34_prefix.py):
+- summarize_convo(handoff_input) returned the hard-coded text "this guy has chest pain.".
+- Without a filter, the Cardiologist receives the WHOLE conversation: the longer the patient chats with the
+  Receptionist, the bigger (slower, more expensive) every Cardiologist call becomes.
+- HandoffInputData has input_history (the run's input), pre_handoff_items (items of earlier turns of this run)
+  and new_items (this turn, including the handoff call and its output).
+
+Key Concepts:
+- Token budget: the filter returns at most `budget_tokens` (estimated) for the Cardiologist, however long the chat is.
+- Recent turns verbatim: the newest turns (a user message and everything after it) are kept as they are, up to
+  `recent_tokens`. Turns are never split, so a tool call always stays next to its output.
+- Older turns are summarized by a small summarizer agent into one "Summary of the earlier conversation" message.
+- Incremental summaries: on the next handoff only the turns that aged out since then are summarized, on top of
+  the earlier summary. Earlier turns are never summarized twice. The earlier summary is found in one of two ways:
+  - the app passes the compacted history back (result.to_input_list()): it starts with the filter's own
+    "Summary of the earlier conversation" message, which is used as the summary of everything before it;
+  - the app keeps the original history: every summary is cached under a running hash of the items it covers,
+    and the longest already-summarized prefix is looked up.
+- The filter is async (the SDK awaits input filters), so summarizing does not block other runs.
+
+How it works in this code:
+- TokenBudgetSummarizer(...) is passed as input_filter=... to handoff(...).
+- main() chats with the Receptionist, hands off to the Cardiologist twice, and then shows how the prompt size
+  stays bounded for longer and longer conversations.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+from collections import Counter, OrderedDict
+from typing import Any
+from dotenv import load_dotenv, find_dotenv
+from pydantic import BaseModel
+from agents import Agent, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, RunContextWrapper, TResponseInputItem, handoff, set_tracing_export_api_key
+from agents.handoffs import HandoffInputData
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+SUMMARY_PREFIX = "Summary of the earlier conversation:\n"
+
+
+def estimate_tokens(item: Any) -> int:
+    """About 4 characters per token: good enough for a budget, and much cheaper than a tokenizer."""
+    text = item if isinstance(item, str) else json.dumps(item, ensure_ascii=False, default=str)
+    return len(text) // 4 + 1
+
+
+def item_text(item: TResponseInputItem) -> str:
+    content = item.get("content") if isinstance(item, dict) else None
+    if isinstance(content, list):
+        content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    if content:
+        return f"{item.get('role', 'assistant')}: {content}"
+    if isinstance(item, dict) and item.get("type") == "function_call":
+        return f"tool call {item.get('name')}({item.get('arguments')})"
+    if isinstance(item, dict) and item.get("type") == "function_call_output":
+        return f"tool result: {item.get('output')}"
+    return json.dumps(item, ensure_ascii=False, default=str)
+
+
+def is_summary(item: TResponseInputItem) -> bool:
+    """The summary message this filter put at the start of a compacted history."""
+    return (isinstance(item, dict) and item.get("role") == "system"
+            and isinstance(item.get("content"), str) and item["content"].startswith(SUMMARY_PREFIX))
+
+
+def split_turns(items: list[TResponseInputItem]) -> list[list[TResponseInputItem]]:
+    """A turn starts at a user message and contains everything up to the next user message."""
+    turns: list[list[TResponseInputItem]] = []
+    for item in items:
+        if not turns or (isinstance(item, dict) and item.get("role") == "user"):
+            turns.append([])
+        turns[-1].append(item)
+    return turns
+
+
+summarizer_agent = Agent(
+    name="ConversationSummarizer",
+    instructions=(
+        "You keep a running summary of a patient's conversation with a clinic. You get the current summary "
+        "and new messages. Return the updated summary: symptoms, timeline, medications, allergies, decisions "
+        "and open questions. Be factual and short. Return only the summary."
+    ),
+    model=model,
+)
+
+
+class TokenBudgetSummarizer:
+    """Handoff input_filter: recent turns verbatim, older turns as an incrementally updated summary."""
+
+    def __init__(
+        self,
+        budget_tokens: int = 1200,
+        recent_tokens: int = 600,
+        summarizer: Agent = summarizer_agent,
+        cache_size: int = 256,
+    ):
+        self.budget_tokens = budget_tokens
+        self.recent_tokens = recent_tokens
+        self.summarizer = summarizer
+        self.cache_size = cache_size
+        self._summaries: OrderedDict[str, str] = OrderedDict()  # running hash of covered items -> summary
+        self.stats: Counter[str] = Counter()
+
+    async def __call__(self, handoff_input: HandoffInputData) -> HandoffInputData:
+        history = handoff_input.input_history
+        items: list[TResponseInputItem] = (
+            [{"role": "user", "content": history}] if isinstance(history, str) else list(history)
+        )
+        items += [run_item.to_input_item() for run_item in handoff_input.pre_handoff_items]
+        # new_items hold this turn's handoff call and output: they are kept, and count against the budget
+        new_tokens = sum(estimate_tokens(run_item.to_input_item()) for run_item in handoff_input.new_items)
+
+        compacted = await self.compact(items, self.budget_tokens - new_tokens)
+        self.stats["tokens_in"] += sum(map(estimate_tokens, items)) + new_tokens
+        self.stats["tokens_out"] += sum(map(estimate_tokens, compacted)) + new_tokens
+        return handoff_input.clone(input_history=tuple(compacted), pre_handoff_items=())
+
+    async def compact(self, items: list[TResponseInputItem], budget: int) -> list[TResponseInputItem]:
+        turns = split_turns(items)
+        recent: list[list[TResponseInputItem]] = []
+        used = 0
+        for turn in reversed(turns):
+            cost = sum(map(estimate_tokens, turn))
+            if recent and used + cost > min(self.recent_tokens, budget):
+                break
+            recent.insert(0, turn)
+            used += cost
+        older = [item for turn in turns[: len(turns) - len(recent)] for item in turn]
+        kept = [item for turn in recent for item in turn]
+
+        if used > budget:  # even the newest turn alone is too big: shorten its longest messages, then drop items
+            kept = self._truncate(kept, budget)
+            used = sum(map(estimate_tokens, kept))
+        if not older:
+            return kept
+
+        # The summary message gets only the room that is left; without room, the older turns are dropped
+        room = budget - used
+        overhead = estimate_tokens({"role": "system", "content": SUMMARY_PREFIX})
+        if room - overhead < 10:
+            self.stats["summaries_dropped_no_room"] += 1
+            return kept
+        summary = await self.summarize(older, max_tokens=room - overhead)
+        message = {"role": "system", "content": SUMMARY_PREFIX + summary}
+        while estimate_tokens(message) > room:  # a cached summary may have been made for more room
+            summary = summary[: len(summary) - (estimate_tokens(message) - room) * 4]
+            message = {"role": "system", "content": SUMMARY_PREFIX + summary}
+        return [message] + kept
+
+    async def summarize(self, older: list[TResponseInputItem], max_tokens: int) -> str:
+        # Running hashes: hashes[i] identifies older[:i]. The longest cached prefix is reused.
+        hashes = [""]
+        digest = hashlib.blake2b(digest_size=16)
+        for item in older:
+            digest.update(json.dumps(item, sort_keys=True, default=str).encode())
+            hashes.append(digest.copy().hexdigest())
+
+        covered, summary = 0, ""
+        if is_summary(older[0]):  # a history compacted by this filter before: its summary covers everything before it
+            covered, summary = 1, older[0]["content"][len(SUMMARY_PREFIX):]
+        for i in range(len(older), covered, -1):
+            if hashes[i] in self._summaries:
+                covered, summary = i, self._summaries[hashes[i]]
+                self._summaries.move_to_end(hashes[i])
+                break
+        if covered == len(older):
+            self.stats["summary_cache_hits"] += 1
+            return summary
+        if covered:
+            self.stats["summary_prefix_hits"] += 1
+
+        new_text = "\n".join(item_text(item) for item in older[covered:])
+        prompt = f"Current summary:\n{summary or '(empty)'}\n\nNew messages:\n{new_text}\n\nKeep it under {max_tokens * 3 // 4} words."
+        result = await Runner.run(self.summarizer, prompt, max_turns=1)
+        self.stats["summarizer_calls"] += 1
+        self.stats["items_summarized"] += len(older) - covered
+        summary = str(result.final_output)[: max_tokens * 4]  # hard cap, whatever the model returned
+
+        self._summaries[hashes[-1]] = summary
+        if len(self._summaries) > self.cache_size:
+            self._summaries.popitem(last=False)
+        return summary
+
+    @staticmethod
+    def _truncate(items: list[TResponseInputItem], budget: int) -> list[TResponseInputItem]:
+        items = [dict(item) for item in items]
+        while sum(map(estimate_tokens, items)) > budget:
+            longest = max((i for i, item in enumerate(items) if isinstance(item.get("content"), str)),
+                          key=lambda i: len(items[i]["content"]), default=None)
+            if longest is None or len(items[longest]["content"]) < 200:
+                break
+            text = items[longest]["content"]
+            cut = len(text) // 4
+            items[longest]["content"] = text[: len(text) // 2 - cut] + " [...] " + text[len(text) // 2 + cut:]
+        # Still too big (many short messages): drop the oldest items, and tool results whose call was dropped
+        while len(items) > 1 and sum(map(estimate_tokens, items)) > budget:
+            items.pop(0)
+            while len(items) > 1 and items[0].get("type") == "function_call_output":
+                items.pop(0)
+        last = items[-1]
+        if estimate_tokens(last) > budget and isinstance(last.get("content"), str):  # one message left: hard cut
+            last["content"] = last["content"][: max(0, len(last["content"]) - (estimate_tokens(last) - budget) * 4)]
+        return items
+
+
+class ProblemEscalation(BaseModel):
+    problem: str
+    details: str | None = None
+
+
+cardiologist_agent = Agent(
+    name="Cardiologist",
+    handoff_description="Handles cardiac and heart-related patient issues",
+    instructions=(
+        "You are a cardiologist. You will receive a structured problem description "
+        "your job is to handle the patient's issue."
+    ),
+    model=model,
+)
+
+
+def on_cardiologist_handoff(ctx: RunContextWrapper[None], input: ProblemEscalation):
+    print(f"Handoff to Cardiologist: {input.problem}")
+
+
+summarize_convo = TokenBudgetSummarizer(budget_tokens=1200, recent_tokens=600)
+
+receptionist_agent = Agent(
+    name="Receptionist",
+    instructions=(
+        "You answer general patient questions. If the patient's issue is heart-related "
+        "(e.g., chest pain, palpitations, shortness of breath), escalate to the Cardiologist "
+        "by producing the required JSON for the handoff."
+    ),
+    handoffs=[
+        handoff(
+            agent=cardiologist_agent,
+            input_type=ProblemEscalation,
+            on_handoff=on_cardiologist_handoff,
+            input_filter=summarize_convo,
+        )
+    ],
+    model=model,
+)
+
+
+def long_conversation(turns: int) -> list[TResponseInputItem]:
+    conversation: list[TResponseInputItem] = []
+    for i in range(turns):
+        conversation.append({"role": "user", "content": f"Question {i}: can I change my appointment on day {i} and is parking free that day?"})
+        conversation.append({"role": "assistant", "content": f"Yes, day {i} works. Parking is free for patients. " * 5})
+    return conversation
+
+
+async def main():
+    # 1) A long chat with the Receptionist, then a heart-related message -> handoff with the filter
+    convo = long_conversation(20)
+    convo.append({"role": "user", "content": "I have chest pain and palpitations since this morning. Can I see the cardiologist?"})
+    result = await Runner.run(receptionist_agent, input=convo)
+    print(f"Cardiologist: {str(result.final_output)[:80]}...")
+    print(f"  stats after 1st handoff: {dict(summarize_convo.stats)}")
+    first_items = summarize_convo.stats["items_summarized"]
+
+    # 2) The chat goes on, and there is a second handoff: only the newly aged turns are summarized
+    convo = result.to_input_list()
+    for i in range(4):
+        convo.append({"role": "user", "content": f"Follow-up {i}: the pain is worse when I climb stairs."})
+        convo.append({"role": "assistant", "content": "Please rest and avoid exertion until you are seen. " * 3})
+    convo.append({"role": "user", "content": "It is getting worse, please connect me to the cardiologist again."})
+    result = await Runner.run(receptionist_agent, input=convo)
+    print(f"  stats after 2nd handoff: {dict(summarize_convo.stats)}")
+    print(f"  the 2nd handoff reused the 1st summary (summary_prefix_hits={summarize_convo.stats['summary_prefix_hits']}) "
+          f"and summarized {summarize_convo.stats['items_summarized'] - first_items} newly aged items")
+
+    # 3) The prompt the Cardiologist receives stays bounded, however long the conversation is
+    print(f"\n{'turns':>6} {'tokens in':>10} {'tokens out':>11} {'summarizer calls':>17} {'prefix hits':>12}")
+    for turns in (5, 50, 500):
+        summarizer = TokenBudgetSummarizer(budget_tokens=1200, recent_tokens=600)
+        items = long_conversation(turns)
+        compacted = await summarizer.compact(items, summarizer.budget_tokens)
+        await summarizer.compact(items + long_conversation(1), summarizer.budget_tokens)  # one more turn
+        print(f"{turns:>6} {sum(map(estimate_tokens, items)):>10} {sum(map(estimate_tokens, compacted)):>11} {summarizer.stats['summarizer_calls']:>17} {summarizer.stats['summary_prefix_hits']:>12}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. What does the Cardiologist lose when the older turns are summarized, and how do the recent turns help?
+2. Why must a tool call and its output stay in the same (kept or summarized) part of the history?
+3. How does the running hash let the filter reuse a summary without knowing which conversation it belongs to?
+4. Why is the summary length capped in code even though the summarizer is asked to keep it short?
+5. Where else could you use the same filter (hint: RunConfig(handoff_input_filter=...))?
+"""
@@ -0,0 +1,283 @@
+"""
+This example demonstrates how to cache the results of agent-as-tool sub-agents.
+
+Recap (see _19_agent_as_tool.py):
+- agent.as_tool(...) wraps a sub-agent in a function tool. Every call starts a NEW nested run of the sub-agent.
+- The sub-agent only gets the tool input (not the orchestrator's conversation), so the same input to the same
+  sub-agent gives (practically) the same answer.
+- In a translation pipeline the same phrases come back again and again ("Thank you", "Order shipped", ...),
+  and every one of them costs a full nested LLM run.
+
+Key Concepts:
+- Cache key = (fingerprint of the sub-agent's config, normalized input). The fingerprint covers everything that can
+  change the answer: name, instructions, model, model_settings, output_type, tools and handoffs. Change one of
+  them (or use a different agent) and the old results are simply never found again.
+- LRU + TTL: at most `max_entries` results are kept (least recently used go first) and each result expires after
+  `ttl_seconds`, so the cache cannot grow forever or serve very old answers.
+- Negative caching: errors that will happen again for the same input (max turns exceeded, a guardrail tripwire,
+  an invalid model answer) are remembered for a shorter `negative_ttl_seconds` and raised again without a run.
+  Transient errors (timeouts, rate limits, connection errors) are NOT cached: the next call should retry.
+  Every negative hit raises a fresh copy of the cached error, so callers never share one traceback.
+- In-flight sharing: if the same phrase is requested twice at the same time, only one nested run happens.
+  If that run is cancelled, a waiting call starts its own run instead of failing.
+- Per-tool metrics: hits, misses, negative hits, errors, evictions and the run time saved, for each tool.
+
+Important Note:
+- Only cache sub-agents whose answer depends on the input alone. Dynamic instructions or tools that read the
+  run context make the answer depend on the context too, so AgentToolCache.as_tool(...) refuses dynamic instructions.
+- The fingerprint is taken when the tool is built. Use agent.clone(...) for a changed agent instead of mutating it.
+
+How it works in this code:
+- AgentToolCache(...).as_tool(agent, tool_name, tool_description) is an opt-in replacement for agent.as_tool(...).
+- main() translates a batch of support messages with many repeated phrases and prints the per-tool metrics.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import Counter, OrderedDict
+from typing import Any
+from dotenv import load_dotenv, find_dotenv
+from agents import (
+    Agent, InputGuardrailTripwireTriggered, ItemHelpers, MaxTurnsExceeded, ModelBehaviorError,
+    OutputGuardrailTripwireTriggered, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, RunContextWrapper, Tool,
+    function_tool, set_tracing_export_api_key,
+)
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+# Errors that depend only on the input: running again would fail again
+CACHEABLE_ERRORS: tuple[type[Exception], ...] = (
+    MaxTurnsExceeded, ModelBehaviorError, InputGuardrailTripwireTriggered, OutputGuardrailTripwireTriggered,
+)
+
+
+def agent_fingerprint(agent: Agent[Any]) -> str:
+    """A short hash of everything in the agent's config that can change its answer."""
+    if callable(agent.instructions):
+        raise ValueError(f"{agent.name} has dynamic instructions: its answer depends on the context, do not cache it")
+    agent_model = agent.model if isinstance(agent.model, str) or agent.model is None else getattr(agent.model, "model", repr(agent.model))
+    config = {
+        "name": agent.name,
+        "instructions": agent.instructions,
+        "model": agent_model,
+        "model_settings": agent.model_settings.to_json_dict(),
+        "output_type": getattr(agent.output_type, "__qualname__", repr(agent.output_type)),
+        "tools": sorted(tool.name for tool in agent.tools),
+        "handoffs": sorted(getattr(h, "agent_name", None) or getattr(h, "name", repr(h)) for h in agent.handoffs),
+    }
+    return hashlib.blake2b(json.dumps(config, sort_keys=True, default=str).encode(), digest_size=12).hexdigest()
+
+
+def fresh_exception(error: Exception) -> Exception:
+    """A new exception of the same type, args and attributes (with its own traceback), to raise a cached error again."""
+    # Not copy.copy(): it calls __init__(*args), and e.g. the guardrail exceptions take a result object, not a message
+    fresh = type(error).__new__(type(error), *error.args)
+    fresh.__dict__.update(error.__dict__)
+    return fresh
+
+
+def normalize_input(text: str) -> str:
+    """Whitespace differences do not change a translation; letter case can, so it is kept."""
+    return " ".join(text.split())
+
+
+class AgentToolCache:
+    """LRU/TTL cache of sub-agent results, shared by all tools built with as_tool(...)."""
+
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl_seconds: float | None = 3600,
+        negative_ttl_seconds: float = 60,
+        max_turns: int = 5,
+    ):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.negative_ttl_seconds = negative_ttl_seconds
+        self.max_turns = max_turns
+        # key -> (expires_at, result or exception, run seconds, tool name)
+        self._entries: OrderedDict[tuple[str, str], tuple[float, str | Exception, float, str]] = OrderedDict()
+        self._in_flight: dict[tuple[str, str], asyncio.Future] = {}
+        self.metrics: dict[str, Counter[str]] = {}
+
+    def get(self, key: tuple[str, str]) -> tuple[str | Exception, float] | None:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value, run_seconds, _ = entry
+        if expires_at < time.monotonic():
+            del self._entries[key]  # expired, treat it as a miss
+            return None
+        self._entries.move_to_end(key)
+        return value, run_seconds
+
+    def put(self, key: tuple[str, str], value: str | Exception, run_seconds: float, tool_name: str) -> None:
+        ttl = self.negative_ttl_seconds if isinstance(value, Exception) else self.ttl_seconds
+        expires_at = time.monotonic() + ttl if ttl is not None else float("inf")
+        self._entries[key] = (expires_at, value, run_seconds, tool_name)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            _, (_, _, _, evicted_tool) = self._entries.popitem(last=False)
+            self.metrics[evicted_tool]["evictions"] += 1
+
+    def invalidate(self, agent: Agent[Any] | None = None) -> int:
+        """Remove the results of one agent (all results if agent is None). Returns the number removed."""
+        fingerprint = agent_fingerprint(agent) if agent is not None else None
+        stale = [key for key in self._entries if fingerprint is None or key[0] == fingerprint]
+        for key in stale:
+            del self._entries[key]
+        return len(stale)
+
+    def as_tool(self, agent: Agent[Any], tool_name: str, tool_description: str) -> Tool:
+        cache = self
+        fingerprint = agent_fingerprint(agent)
+        metrics = self.metrics.setdefault(tool_name, Counter())
+
+        @function_tool(name_override=tool_name, description_override=tool_description)
+        async def run_agent(context: RunContextWrapper, input: str) -> str:
+            key = (fingerprint, normalize_input(input))
+
+            while True:
+                cached = cache.get(key)
+                if cached is not None:
+                    value, run_seconds = cached
+                    metrics["saved_ms"] += round(run_seconds * 1000)
+                    if isinstance(value, Exception):
+                        metrics["negative_hits"] += 1
+                        raise fresh_exception(value) from value
+                    metrics["hits"] += 1
+                    return value
+
+                # The same phrase is already being translated: wait for that run instead of starting another.
+                # asyncio.wait() neither cancels that run nor raises if it was cancelled: then loop and run it here.
+                in_flight = cache._in_flight.get(key)
+                if in_flight is None:
+                    break
+                await asyncio.wait({in_flight})
+                if not in_flight.cancelled():
+                    metrics["shared"] += 1
+                    error = in_flight.exception()
+                    if error is not None:
+                        raise fresh_exception(error) from error
+                    return in_flight.result()
+
+            metrics["misses"] += 1
+            future: asyncio.Future = asyncio.get_running_loop().create_future()
+            cache._in_flight[key] = future
+            started = time.perf_counter()
+            try:
+                result = await Runner.run(agent, input, context=context.context, max_turns=cache.max_turns)
+                output = ItemHelpers.text_message_outputs(result.new_items)
+                cache.put(key, output, time.perf_counter() - started, tool_name)
+                future.set_result(output)
+                return output
+            except asyncio.CancelledError:
+                future.cancel()
+                raise
+            except Exception as e:
+                metrics["errors"] += 1
+                if isinstance(e, CACHEABLE_ERRORS):
+                    cache.put(key, e, time.perf_counter() - started, tool_name)
+                future.set_exception(e)
+                future.exception()  # mark it retrieved: nobody may be waiting on it
+                raise
+            finally:
+                del cache._in_flight[key]
+
+        return run_agent
+
+
+spanish_agent = Agent(
+    name="spanish_agent",
+    instructions="You translate the user's message to Spanish",
+    handoff_description="An English to Spanish translator",
+    model=model
+)
+
+french_agent = Agent(
+    name="french_agent",
+    instructions="You translate the user's message to French",
+    handoff_description="An English to French translator",
+    model=model
+)
+
+tool_cache = AgentToolCache(max_entries=256, ttl_seconds=600, negative_ttl_seconds=30)
+
+orchestrator_agent = Agent(
+    name="orchestrator_agent",
+    instructions=(
+        "You are a translation agent. You use the tools provided to translate messages. "
+        "If multiple translations are requested, call all the relevant tools in the same turn. "
+        "Never translate by yourself; always use the provided tools."
+    ),
+    tools=[
+        tool_cache.as_tool(spanish_agent, "translate_to_spanish", "Translate the user's message to Spanish"),
+        tool_cache.as_tool(french_agent, "translate_to_french", "Translate the user's message to French"),
+    ],
+    model=model
+)
+
+support_messages = [
+    "Thank you for your order!",
+    "Your package has shipped.",
+    "Thank you for your order!",
+    "Thank   you for your order!",  # same phrase, different whitespace
+    "Your package has shipped.",
+    "We are sorry for the delay.",
+    "Thank you for your order!",
+    "Your package has shipped.",
+]
+
+
+async def main():
+    start = time.perf_counter()
+    for message in support_messages:
+        result = await Runner.run(orchestrator_agent, f"Use translate_to_spanish and translate_to_french for '{message}'")
+        print(f"{message!r:32} -> {str(result.final_output)[:60]!r}")
+    print(f"\n{len(support_messages)} messages in {time.perf_counter() - start:.2f}s")
+
+    # The same phrases, requested at the same moment, share one nested run per tool
+    await asyncio.gather(*(
+        Runner.run(orchestrator_agent, "Use translate_to_spanish for 'See you soon!'") for _ in range(3)
+    ))
+
+    print(f"\n{'tool':22} {'hits':>5} {'misses':>7} {'shared':>7} {'neg hits':>9} {'errors':>7} {'evictions':>10} {'saved ms':>9}")
+    for tool_name, m in tool_cache.metrics.items():
+        print(f"{tool_name:22} {m['hits']:>5} {m['misses']:>7} {m['shared']:>7} {m['negative_hits']:>9} "
+              f"{m['errors']:>7} {m['evictions']:>10} {m['saved_ms']:>9}")
+
+    # After changing the sub-agent, build a new tool from a clone: old results are never reused for it
+    formal_spanish = spanish_agent.clone(instructions="You translate the user's message to formal Spanish (usted)")
+    print(f"\nfingerprint before: {agent_fingerprint(spanish_agent)}, after: {agent_fingerprint(formal_spanish)}")
+    print(f"removed {tool_cache.invalidate(spanish_agent)} cached Spanish results")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why is the sub-agent's config part of the cache key, and not only the tool name and the input?
+2. Which errors are worth caching, and why would caching a rate-limit error make things worse?
+3. Why does AgentToolCache.as_tool refuse agents with dynamic instructions? What else could make a sub-agent unsafe to cache?
+4. Two orchestrator runs ask for the same phrase at the same moment. How many nested runs happen, and why?
+5. How would you pick max_entries and ttl_seconds for a pipeline that translates product descriptions every night?
+"""
@@ -0,0 +1,271 @@
+"""
+This example demonstrates a dispatcher that decides, per request, whether a specialist is used as a tool or as a handoff.
+
+Recap (see _19_agent_as_tool.py, _20_handoff.py and Assignments/Assignment_03.py):
+- Agent-as-tool: the specialist gets only the tool input. The orchestrator then needs one MORE LLM call to relay
+  the answer, and that call reads the whole conversation again. Every follow-up goes through the orchestrator again.
+- Handoff: the specialist gets the WHOLE conversation, on every one of its LLM calls, but answers directly and
+  keeps the conversation: follow-ups go straight to it.
+- So neither pattern is always cheaper. It depends on the request.
+
+Key Concepts:
+- Cost model (in input tokens, plus `call_overhead_tokens` per LLM call for latency and the system prompt):
+    H = tokens of the shared history, c = LLM calls per specialist run, t = tokens of a tool input,
+    F = expected follow-up turns, O = call overhead
+    as tool : c*(t+O) + (H+O)             + F * (2*(H+O) + c*(t+O))   (relay call, follow-ups go through the triage)
+    handoff : c*(H+O)                     + F * c*(H+O)               (specialist reads H on every call)
+  Short history or many follow-ups -> handoff. Long history and a specialist that needs several calls -> tool.
+- Measured, not guessed: c, t and F are moving averages per specialist, updated from real runs. RunHooks.on_llm_start
+  counts the LLM calls (and their input tokens) of every agent, including the nested runs of tool specialists.
+- Decisions and outcomes are written to a JSONL log and to a "dispatch_decision" trace span. load(...) replays the
+  log at startup, so the policy keeps what it learned.
+
+How it works in this code:
+- HybridDispatcher(specialists).build_triage(triage, history) returns a clone of the triage agent with every
+  specialist attached as a tool OR a handoff, whichever is estimated cheaper for this history.
+- run_session(...) dispatches the first message, sends follow-ups to whoever should answer them, and reports the
+  outcome (calls, measured tokens, follow-ups) back to the dispatcher.
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Any
+from dotenv import load_dotenv, find_dotenv
+from agents import Agent, ItemHelpers, ModelSettings, Runner, RunHooks, AsyncOpenAI, OpenAIChatCompletionsModel, RunContextWrapper, TResponseInputItem, Tool, custom_span, function_tool, set_tracing_export_api_key, trace
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+def estimate_tokens(item: Any) -> int:
+    """About 4 characters per token: good enough to compare two patterns."""
+    text = item if isinstance(item, str) else json.dumps(item, ensure_ascii=False, default=str)
+    return len(text) // 4 + 1
+
+
+class CallMeter(RunHooks):
+    """Counts LLM calls and their input tokens per agent. Also passed to the nested runs of tool specialists."""
+
+    def __init__(self):
+        self.calls: dict[str, int] = {}
+        self.input_tokens: dict[str, int] = {}
+
+    async def on_llm_start(self, context: RunContextWrapper, agent: Agent, system_prompt: str | None, input_items: list[TResponseInputItem]) -> None:
+        self.calls[agent.name] = self.calls.get(agent.name, 0) + 1
+        tokens = estimate_tokens(system_prompt or "") + sum(map(estimate_tokens, input_items))
+        self.input_tokens[agent.name] = self.input_tokens.get(agent.name, 0) + tokens
+
+
+@dataclass
+class SpecialistStats:
+    """Moving averages for one specialist. The defaults are used until the first real run."""
+    calls_per_run: float = 1.0
+    tool_input_tokens: float = 100.0
+    followups: float = 0.0
+    runs: int = 0
+
+
+class HybridDispatcher:
+    """Attaches each specialist as a tool or a handoff, whichever the cost model estimates to be cheaper."""
+
+    def __init__(
+        self,
+        specialists: list[Agent],
+        call_overhead_tokens: int = 200,
+        alpha: float = 0.3,
+        log_path: str | Path | None = None,
+    ):
+        self.specialists = {agent.name: agent for agent in specialists}
+        self.call_overhead_tokens = call_overhead_tokens
+        self.alpha = alpha  # weight of the newest measurement in the moving averages
+        self.log_path = Path(log_path) if log_path else None
+        self.stats: dict[str, SpecialistStats] = {name: SpecialistStats() for name in self.specialists}
+
+    # ---------------- Cost model ----------------
+
+    def estimate(self, name: str, history_tokens: int) -> dict[str, float]:
+        s, O, H = self.stats[name], self.call_overhead_tokens, history_tokens
+        sub_run = s.calls_per_run * (s.tool_input_tokens + O)
+        return {
+            "tool": sub_run + (H + O) + s.followups * (2 * (H + O) + sub_run),
+            "handoff": (1 + s.followups) * s.calls_per_run * (H + O),
+        }
+
+    def choose(self, history: list[TResponseInputItem]) -> dict[str, dict[str, Any]]:
+        history_tokens = sum(map(estimate_tokens, history))
+        decisions = {}
+        for name in self.specialists:
+            costs = self.estimate(name, history_tokens)
+            decisions[name] = {
+                "specialist": name,
+                "mode": min(costs, key=costs.__getitem__),
+                "history_tokens": history_tokens,
+                "estimated": {mode: round(cost) for mode, cost in costs.items()},
+            }
+        return decisions
+
+    def build_triage(self, triage: Agent, history: list[TResponseInputItem], meter: CallMeter) -> tuple[Agent, dict[str, dict[str, Any]]]:
+        decisions = self.choose(history)
+        tools = [self._as_tool(self.specialists[name], meter) for name, d in decisions.items() if d["mode"] == "tool"]
+        handoffs = [self.specialists[name] for name, d in decisions.items() if d["mode"] == "handoff"]
+        return triage.clone(tools=[*triage.tools, *tools], handoffs=[*triage.handoffs, *handoffs]), decisions
+
+    def _as_tool(self, agent: Agent, meter: CallMeter) -> Tool:
+        dispatcher = self
+
+        @function_tool(name_override=agent.name, description_override=agent.handoff_description or agent.name)
+        async def run_agent(context: RunContextWrapper, input: str) -> str:
+            stats = dispatcher.stats[agent.name]
+            stats.tool_input_tokens += dispatcher.alpha * (estimate_tokens(input) - stats.tool_input_tokens)
+            result = await Runner.run(agent, input, context=context.context, hooks=meter)
+            return ItemHelpers.text_message_outputs(result.new_items)
+
+        return run_agent
+
+    # ---------------- Outcomes ----------------
+
+    def record_outcome(self, decision: dict[str, Any], meter: CallMeter, followups: int, seconds: float) -> None:
+        """Update the moving averages from one finished session of the specialist that was used."""
+        name = decision["specialist"]
+        stats = self.stats[name]
+        turns = followups + 1
+        calls_per_run = meter.calls.get(name, 0) / turns
+        stats.calls_per_run += self.alpha * (calls_per_run - stats.calls_per_run)
+        stats.followups += self.alpha * (followups - stats.followups)
+        stats.runs += 1
+
+        record = {
+            **decision,
+            "time": time.time(),
+            "seconds": round(seconds, 3),
+            "followups": followups,
+            "measured": {"llm_calls": sum(meter.calls.values()), "input_tokens": sum(meter.input_tokens.values())},
+            "stats": asdict(stats),
+        }
+        with custom_span("dispatch_decision", record):
+            pass
+        if self.log_path:
+            with self.log_path.open("a", encoding="utf-8") as f:
+                f.write(json.dumps(record) + "\n")
+
+    def load(self, path: str | Path) -> int:
+        """Replay a decision log, so a restarted process keeps what was learned. Returns the number of records."""
+        count = 0
+        for line in Path(path).read_text(encoding="utf-8").splitlines():
+            record = json.loads(line)
+            if record.get("specialist") in self.stats:
+                self.stats[record["specialist"]] = SpecialistStats(**record["stats"])
+                count += 1
+        return count
+
+
+@function_tool
+def lookup_glossary(term: str) -> str:
+    """Look up the course glossary definition of a term."""
+    return f"{term}: defined in the course glossary"
+
+
+summarizer_agent = Agent(
+    name="summarizer_agent",
+    instructions="You summarize the text you are given in three sentences.",
+    handoff_description="Summarizes an article or a paragraph",
+    model=model,
+)
+
+keyword_agent = Agent(
+    name="keyword_agent",
+    instructions="You list the key terms of the text. Use lookup_glossary to define each key term.",
+    handoff_description="Extracts key terms and defines them with the glossary",
+    tools=[lookup_glossary],
+    model_settings=ModelSettings(tool_choice="required"),  # always looks terms up: at least 2 LLM calls per run
+    model=model,
+)
+
+triage_agent = Agent(
+    name="triage_agent",
+    instructions=(
+        "You route study requests. Use the specialist tools, or hand off to a specialist, "
+        "depending on what is available. Never answer by yourself."
+    ),
+    model=model,
+)
+
+ARTICLE = ("Agents are programs that use a language model to decide what to do next. " * 60).strip()
+
+
+async def run_session(dispatcher: HybridDispatcher, history: list[TResponseInputItem], specialist: str, followups: list[str]) -> None:
+    meter = CallMeter()
+    start = time.perf_counter()
+    triage, decisions = dispatcher.build_triage(triage_agent, history, meter)
+    decision = decisions[specialist]
+
+    with trace("dispatch_session"):
+        result = await Runner.run(triage, history, hooks=meter)
+        for message in followups:
+            # After a handoff the specialist keeps the conversation; after a tool call the triage answers again
+            next_agent = result.last_agent if result.last_agent.name == specialist else triage
+            result = await Runner.run(next_agent, result.to_input_list() + [{"role": "user", "content": message}], hooks=meter)
+        dispatcher.record_outcome(decision, meter, len(followups), time.perf_counter() - start)
+    est = decision["estimated"]
+    print(f"{specialist:17} {decision['history_tokens']:>8} {est['tool']:>9} {est['handoff']:>12} {decision['mode']:>8} "
+          f"{sum(meter.calls.values()):>6} {sum(meter.input_tokens.values()):>9}")
+
+
+async def main():
+    log_path = Path(__file__).with_name("dispatch_log.jsonl")
+    log_path.unlink(missing_ok=True)
+    dispatcher = HybridDispatcher([summarizer_agent, keyword_agent], log_path=log_path)
+
+    print(f"{'specialist':17} {'history':>8} {'est tool':>9} {'est handoff':>12} {'chosen':>8} {'calls':>6} {'measured':>9}")
+    short_chat: list[TResponseInputItem] = [{"role": "user", "content": "Ask summarizer_agent to summarize: agents decide what to do next."}]
+    long_chat: list[TResponseInputItem] = [
+        {"role": "user", "content": f"Here is the article we discussed: {ARTICLE}"},
+        {"role": "assistant", "content": "Got it, what would you like to do with it?"},
+        {"role": "user", "content": "Ask keyword_agent to list the key terms and lookup_glossary each one: agents, language model."},
+    ]
+
+    # 1) Short chats with follow-ups: the specialist should keep the conversation -> handoff
+    for _ in range(2):
+        await run_session(dispatcher, short_chat, "summarizer_agent", ["Shorter please.", "Now in one sentence."])
+
+    # 2) A long history and a specialist that needs several calls (it uses a tool) -> tool
+    for _ in range(3):
+        await run_session(dispatcher, long_chat, "keyword_agent", [])
+
+    print("\nlearned:", {name: {k: round(v, 2) for k, v in asdict(s).items()} for name, s in dispatcher.stats.items()})
+
+    # 3) A new process replays the log and starts with the same policy
+    restarted = HybridDispatcher([summarizer_agent, keyword_agent])
+    print(f"replayed {restarted.load(log_path)} decisions; keyword_agent now as:",
+          restarted.choose(long_chat)["keyword_agent"]["mode"])
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why does the as-tool pattern pay for the history once more per turn, even though the specialist never sees it?
+2. A specialist answers in one LLM call and users rarely ask follow-ups. Which pattern does the cost model pick, and why?
+3. The estimates use characters/4 for tokens. When could that make the dispatcher pick the wrong pattern?
+4. Why is it important to measure calls per run for each specialist instead of assuming one call?
+5. What would you add to the cost model if the specialist used a more expensive model than the triage agent?
+"""
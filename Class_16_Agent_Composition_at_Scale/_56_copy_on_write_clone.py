@@ -0,0 +1,336 @@
+"""
+This example demonstrates a copy-on-write agent clone: clones share their lists and settings until one of them changes.
+
+Recap (see _22_agent_clone_2.py):
+- agent.clone(...) is dataclasses.replace(...): a SHALLOW copy. If you do not pass tools=[...], the clone and the base
+  agent use the SAME list object, so cloned_agent.tools.append(new_tool) also adds the tool to the base agent.
+- The usual fixes cost memory: clone(tools=list(base.tools)) copies every list for every clone, and copy.deepcopy
+  also copies every tool object. With thousands of per-tenant clones that adds up.
+
+Key Concepts:
+- Copy-on-write: make_cow_base(agent) returns a CowAgent: a copy of the agent whose lists are CowLists that only
+  point at one shared, read-only tuple (a snapshot of the agent's lists). The input agent is not changed.
+  Every cow_agent.clone(...) gets its OWN CowList wrappers around the same tuples. Reading (iterating, len, indexing,
+  comparing) reads the tuple. The FIRST change on a list (append, insert, remove, ...) copies the tuple into that
+  list only. The other agents never see the change, and clones of clones stay copy-on-write too.
+- cow_clone(agent, ...) is the one-off version: make_cow_base(agent).clone(...). For many clones of one agent, call
+  make_cow_base once and clone the CowAgent, so all clones share one snapshot.
+- CowList is still a list (the SDK checks isinstance(agent.tools, list)), but it keeps no items of its own until it
+  is changed, so a shared list costs the same small size whether the agent has 2 or 200 tools.
+- Model settings: CowModelSettings reads every field from the shared ModelSettings until a field is set on the clone.
+  Only that field is stored on the clone (temperature, for example); the other fields stay shared.
+- memory_report(agents) shows how many lists are still shared and how many bytes the copied parts use.
+
+Important Note:
+- Copy-on-write protects the containers (the lists and the settings object). The tools themselves and values such as
+  model_settings.extra_args (a dict) are still shared objects: replace them, do not change them in place.
+
+How it works in this code:
+- main() repeats the aliasing bug of _22_agent_clone_2.py, fixes it with cow_clone(...), runs both agents, and then
+  compares the memory and time of 5000 clones made with deepcopy, with new lists and with copy-on-write.
+"""
+
+import asyncio
+import copy
+import dataclasses
+import os
+import sys
+import time
+import tracemalloc
+from typing import Any, Iterable
+from dotenv import load_dotenv, find_dotenv
+from agents import Agent, ModelSettings, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, function_tool, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+COW_LIST_FIELDS = ("tools", "handoffs", "input_guardrails", "output_guardrails")
+SETTINGS_FIELDS = frozenset(field.name for field in dataclasses.fields(ModelSettings))
+
+
+def _copy_first(method_name: str):
+    """Wraps a list method that changes the list: copy the shared items in first."""
+    list_method = getattr(list, method_name)
+
+    def method(self: "CowList", *args: Any) -> Any:
+        self._own()
+        return list_method(self, *args)
+
+    method.__name__ = method_name
+    return method
+
+
+class CowList(list):
+    """A list that reads a shared tuple until it is first changed, and only then copies it."""
+
+    __slots__ = ("_shared",)
+
+    def __init__(self, items: Iterable[Any] = ()):
+        super().__init__()
+        self._shared: tuple | None = items._shared if isinstance(items, CowList) and items._shared is not None else tuple(items)
+
+    @property
+    def is_shared(self) -> bool:
+        return self._shared is not None
+
+    def _own(self) -> None:
+        if self._shared is not None:
+            shared, self._shared = self._shared, None
+            list.extend(self, shared)
+
+    def _items(self) -> tuple | list:
+        return self._shared if self._shared is not None else list(list.__iter__(self))
+
+    # Reading: from the shared tuple while there is one
+    def __iter__(self):
+        return iter(self._shared) if self._shared is not None else list.__iter__(self)
+
+    def __reversed__(self):
+        return reversed(self._shared) if self._shared is not None else list.__reversed__(self)
+
+    def __len__(self) -> int:
+        return len(self._shared) if self._shared is not None else list.__len__(self)
+
+    def __getitem__(self, index: Any) -> Any:
+        if self._shared is None:
+            return list.__getitem__(self, index)
+        item = self._shared[index]
+        return list(item) if isinstance(index, slice) else item
+
+    def __contains__(self, item: Any) -> bool:
+        return item in (self._shared if self._shared is not None else list(list.__iter__(self)))
+
+    def __eq__(self, other: Any) -> bool:
+        return list(self._items()) == (list(other) if isinstance(other, CowList) else other)
+
+    def __ne__(self, other: Any) -> bool:
+        return not self == other
+
+    def __lt__(self, other: Any) -> bool:
+        return list(self._items()) < (list(other) if isinstance(other, CowList) else other)
+
+    def __le__(self, other: Any) -> bool:
+        return list(self._items()) <= (list(other) if isinstance(other, CowList) else other)
+
+    def __gt__(self, other: Any) -> bool:
+        return list(self._items()) > (list(other) if isinstance(other, CowList) else other)
+
+    def __ge__(self, other: Any) -> bool:
+        return list(self._items()) >= (list(other) if isinstance(other, CowList) else other)
+
+    def __add__(self, other: Any) -> list:
+        return list(self._items()) + list(other)
+
+    def __radd__(self, other: Any) -> list:
+        return list(other) + list(self._items())
+
+    def __mul__(self, n: int) -> list:
+        return list(self._items()) * n
+
+    __rmul__ = __mul__
+
+    def __repr__(self) -> str:
+        return repr(list(self._items()))
+
+    def copy(self) -> list:
+        return list(self._items())
+
+    def index(self, *args: Any) -> int:
+        return list(self._items()).index(*args)
+
+    def count(self, item: Any) -> int:
+        return self._items().count(item)
+
+    def __reduce_ex__(self, protocol: int):
+        # copy.copy / copy.deepcopy / pickle: rebuild from the items, never from the (empty) list storage
+        return type(self), (tuple(self),)
+
+
+# Changing: copy the shared tuple into the list first
+for _name in ("append", "extend", "insert", "remove", "pop", "clear", "sort", "reverse",
+              "__setitem__", "__delitem__", "__iadd__", "__imul__"):
+    setattr(CowList, _name, _copy_first(_name))
+
+
+class CowModelSettings(ModelSettings):
+    """ModelSettings that reads unset fields from a shared ModelSettings. Setting a field stores only that field."""
+
+    _shared: ModelSettings | None = None
+
+    @classmethod
+    def sharing(cls, shared: ModelSettings) -> "CowModelSettings":
+        settings = cls.__new__(cls)
+        object.__setattr__(settings, "_shared", shared)
+        return settings
+
+    @property
+    def is_shared(self) -> bool:
+        return self._shared is not None and not self.own_fields()
+
+    def __getattribute__(self, name: str) -> Any:
+        if name in SETTINGS_FIELDS:
+            own = object.__getattribute__(self, "__dict__")
+            shared = own.get("_shared")
+            if name not in own and shared is not None:
+                return getattr(shared, name)
+        return object.__getattribute__(self, name)
+
+    def own_fields(self) -> list[str]:
+        return [name for name in self.__dict__ if name in SETTINGS_FIELDS]
+
+
+def shared_settings(settings: ModelSettings) -> ModelSettings:
+    """The read-only ModelSettings a copy-on-write clone can share: the existing one, or a snapshot."""
+    if isinstance(settings, CowModelSettings) and settings.is_shared:
+        return settings._shared
+    return ModelSettings(**{name: getattr(settings, name) for name in SETTINGS_FIELDS})
+
+
+class CowAgent(Agent):
+    """An Agent whose clone() shares lists and model settings copy-on-write. Create it with make_cow_base()."""
+
+    def clone(self, **kwargs: Any) -> "CowAgent":
+        # Every clone gets its own CowList wrappers (around the same shared tuples), never this agent's list objects
+        shared: dict[str, Any] = {field: CowList(getattr(self, field)) for field in COW_LIST_FIELDS if field not in kwargs}
+        if "model_settings" not in kwargs:
+            shared["model_settings"] = CowModelSettings.sharing(shared_settings(self.model_settings))
+        return dataclasses.replace(self, **shared, **kwargs)
+
+
+def make_cow_base(agent: Agent[Any]) -> CowAgent:
+    """A CowAgent copy of `agent`, sharing a snapshot of its lists and settings. `agent` itself is not changed."""
+    values = {field.name: getattr(agent, field.name) for field in dataclasses.fields(agent) if field.init}
+    values.update({field: CowList(values[field]) for field in COW_LIST_FIELDS})
+    values["model_settings"] = CowModelSettings.sharing(shared_settings(agent.model_settings))
+    return CowAgent(**values)
+
+
+def cow_clone(agent: Agent[Any], **overrides: Any) -> CowAgent:
+    """Like agent.clone(...), but lists and model settings are shared copy-on-write. `agent` is not changed."""
+    base = agent if isinstance(agent, CowAgent) else make_cow_base(agent)
+    return base.clone(**overrides)
+
+
+def memory_report(agents: list[Agent[Any]]) -> dict[str, int]:
+    """How many lists are still shared, how many were copied, and the bytes used by the clones' own parts."""
+    report = {"shared_lists": 0, "copied_lists": 0, "plain_lists": 0, "own_settings_fields": 0, "bytes": 0}
+    for agent in agents:
+        for field in COW_LIST_FIELDS:
+            value = getattr(agent, field)
+            kind = "plain_lists" if not isinstance(value, CowList) else "shared_lists" if value.is_shared else "copied_lists"
+            report[kind] += 1
+            report["bytes"] += sys.getsizeof(value)
+        settings = agent.model_settings
+        if isinstance(settings, CowModelSettings):
+            report["own_settings_fields"] += len(settings.own_fields())
+        report["bytes"] += sys.getsizeof(settings) + sys.getsizeof(settings.__dict__)
+    return report
+
+
+@function_tool("get_weather")
+def get_weather(location: str, unit: str) -> str:
+    """Fetch the weather for a given location, returning a short description."""
+    return f"The weather in {location} is 22 degrees {unit}."
+
+
+@function_tool("piaic_student_finder")
+def piaic_student_finder(student_roll: int) -> str:
+    """Find the PIAIC student based on the roll number."""
+    data = {1: "Ammar", 2: "Azeem", 3: "Zain"}
+    return data.get(student_roll, "Not Found")
+
+
+@function_tool("new_tool")
+def new_tool(student_roll: int) -> str:
+    """Find the PIAIC student based on the roll number."""
+    data = {1: "Ammar", 2: "Azeem", 3: "Zain"}
+    return data.get(student_roll, "Not Found")
+
+
+def make_base_agent() -> Agent:
+    return Agent(
+        name="pirate_agent",
+        instructions="Write like a pirate who loves math",
+        model_settings=ModelSettings(temperature=1, max_tokens=1024, top_p=1),
+        model=model,
+        tools=[get_weather, piaic_student_finder],
+    )
+
+
+def measure(label: str, make_clone, count: int = 5000) -> None:
+    tracemalloc.start()
+    start = time.perf_counter()
+    clones = [make_clone(i) for i in range(count)]
+    seconds = time.perf_counter() - start
+    used, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(f"{label:14} {used / count:>10.0f} B/clone {seconds * 1e6 / count:>9.1f} us/clone")
+    del clones
+
+
+async def main():
+    # 1) The bug of _22_agent_clone_2.py: the clone's append changes the base agent too
+    base_agent = make_base_agent()
+    cloned_agent = base_agent.clone(name="robot_agent", instructions="Write like a pirate who writes using numbers")
+    cloned_agent.tools.append(new_tool)
+    print(f"clone()    : base tools {len(base_agent.tools)}, clone tools {len(cloned_agent.tools)}")
+
+    # 2) Copy-on-write: the append copies the clone's list only, and the base agent is not touched
+    base_agent = make_base_agent()
+    base_tools = base_agent.tools
+    cloned_agent = cow_clone(base_agent, name="robot_agent", instructions="Write like a pirate who writes using numbers")
+    cloned_agent.tools.append(new_tool)
+    cloned_agent.model_settings.temperature = 0.2
+    print(f"cow_clone(): base tools {len(base_agent.tools)}, clone tools {len(cloned_agent.tools)}; "
+          f"temperature base {base_agent.model_settings.temperature}, clone {cloned_agent.model_settings.temperature}; "
+          f"base still has its own list: {base_agent.tools is base_tools}")
+    print(f"  memory: {memory_report([base_agent, cloned_agent])}")
+
+    # A plain .clone() of a copy-on-write clone is copy-on-write as well
+    second = cloned_agent.clone(name="second_robot")
+    second.tools.append(get_weather)
+    print(f"  clone of the clone: {len(cloned_agent.tools)} vs {len(second.tools)} tools, same list: {cloned_agent.tools is second.tools}")
+
+    # Both agents still work with the SDK (it only sees lists and ModelSettings)
+    result_base = await Runner.run(base_agent, input="what is 2+2?")
+    result_cloned = await Runner.run(cloned_agent, input="what is 2+2? use new_tool for roll 2")
+    print(f"  base: {str(result_base.final_output)[:50]!r}\n  clone: {str(result_cloned.final_output)[:50]!r}")
+
+    # 3) Thousands of per-tenant clones of an agent with many tools
+    big_agent = make_base_agent().clone(tools=[dataclasses.replace(get_weather, name=f"get_weather_{i}") for i in range(30)])
+    print(f"\n{'clone mode':14} {'memory':>12} {'time':>16}   ({len(big_agent.tools)} tools, 5000 clones)")
+    # deepcopy everything but the model (its HTTP client cannot be copied, and should be shared anyway)
+    measure("deepcopy", lambda i: copy.deepcopy(big_agent, memo={id(model): model}).clone(name=f"tenant_{i}"))
+    measure("new lists", lambda i: big_agent.clone(
+        name=f"tenant_{i}", tools=list(big_agent.tools), handoffs=list(big_agent.handoffs),
+        input_guardrails=list(big_agent.input_guardrails), output_guardrails=list(big_agent.output_guardrails),
+        model_settings=dataclasses.replace(big_agent.model_settings)))
+    cow_base = make_cow_base(big_agent)  # one snapshot, shared by all clones
+    measure("copy-on-write", lambda i: cow_base.clone(name=f"tenant_{i}"))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why does make_cow_base take a snapshot of the agent's lists instead of switching the agent itself to CowLists?
+2. A clone appends a tool. What exactly is copied, and what is still shared with the other clones?
+3. Why must CowList stay a subclass of list, and what does that make harder?
+4. clone.model_settings.extra_args["user"] = "x" still changes the base agent. Why, and how should you do it instead?
+5. When would the "new lists" mode be a better choice than copy-on-write?
+"""
@@ -0,0 +1,258 @@
+"""
+This example demonstrates a pool of ready-made agent clones, keyed by the overrides they were cloned with.
+
+Recap (see _21_agent_clone_1.py):
+- base_agent.clone(name="robot_agent", instructions="Write like a robot") makes a variant of an agent.
+- In a web service this often happens on EVERY request, with the same few overrides again and again
+  ("robot" persona for this tenant, "pirate" persona for that one, ...).
+- Every such clone also re-derives things that do not change between requests:
+  - agent.as_tool(...) inspects the function and builds a pydantic model and a JSON schema for its parameters.
+  - Every Agent in handoffs=[...] is turned into a Handoff (with a strict JSON schema) at the start of EVERY turn.
+  - The tool definitions sent to the model are built again for every LLM call.
+
+Key Concepts:
+- Template pool: pool.get(base_agent, **overrides) returns a clone from an LRU cache keyed by a hash of
+  (base agent, overrides). The same overrides give back the same clone object; nothing is cloned again.
+- Canonical key: plain values (strings, numbers) are hashed by value, ModelSettings by their fields, and objects
+  such as tools and agents by identity. The cached clone keeps them alive, so an identity is never reused while cached.
+- Schemas built once: pool.as_tool(...) caches agent-as-tool FunctionTools, and realized clones get Handoff
+  objects instead of Agents in handoffs=[...], so the SDK skips handoff(...) on every turn.
+- Caches are bounded: clones, agent-as-tool tools, Handoffs and prefixes are each an LRU of max_size entries, so an id() key
+  never outlives the object it points at and the pool does not grow without limit.
+- Request prefix (a diagnostic): pool.request_prefix(agent) caches the JSON of the system prompt and tool definitions
+  of a realized clone, and its hash. The SDK does NOT use this string; it builds its own request on every call.
+  Log the hash to see which clones send the same prefix (and so could share a provider's prompt cache).
+
+Important Note:
+- Only use the pool for overrides that repeat. A pool keyed by per-user text (e.g. instructions with the user's name)
+  just fills up and evicts; use dynamic instructions (see _13_dynamic_instructions.py) for that.
+- Do not change a pooled clone (e.g. agent.tools.append(...)): every request that gets it from the pool would see it.
+
+How it works in this code:
+- handle_request(...) gets a persona clone from the pool for each request and runs it.
+- main() runs a few requests, then times 5000 "clone per request" setups against 5000 pooled ones.
+"""
+
+import asyncio
+import hashlib
+import json
+import os
+import time
+from collections import Counter, OrderedDict
+from typing import Any
+from dotenv import load_dotenv, find_dotenv
+from agents import Agent, FunctionTool, Handoff, ModelSettings, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, Tool, handoff, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+def canonical(value: Any) -> Any:
+    """A JSON-friendly form of an override value: by value for data, by identity for objects."""
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    if isinstance(value, (list, tuple)):
+        return [canonical(item) for item in value]
+    if isinstance(value, dict):
+        return {str(key): canonical(item) for key, item in value.items()}
+    if isinstance(value, ModelSettings):
+        return {"model_settings": value.to_json_dict()}
+    return {"object": type(value).__name__, "id": id(value)}
+
+
+def tool_definition(tool: Tool | Handoff) -> dict[str, Any]:
+    """The name, description and parameter schema of a tool or handoff, as the model sees them."""
+    if isinstance(tool, Handoff):
+        return {"name": tool.tool_name, "description": tool.tool_description, "parameters": tool.input_json_schema}
+    if isinstance(tool, FunctionTool):
+        return {"name": tool.name, "description": tool.description, "parameters": tool.params_json_schema}
+    return {"name": tool.name}  # hosted tools have no schema of their own
+
+
+class AgentTemplatePool:
+    """LRU cache of realized agent clones, plus the tools, handoffs and request prefixes derived from them."""
+
+    def __init__(self, max_size: int = 128):
+        self.max_size = max_size
+        # The base agents, target agents and clones are kept in the values, so their ids stay valid while cached
+        self._clones: OrderedDict[str, tuple[Agent[Any], Agent[Any]]] = OrderedDict()  # overrides hash -> (base, clone)
+        self._tools: OrderedDict[tuple, tuple[Agent[Any], Tool]] = OrderedDict()  # (id(agent), name, description) -> (agent, tool)
+        self._handoffs: OrderedDict[int, tuple[Agent[Any], Handoff]] = OrderedDict()  # id(target agent) -> (agent, Handoff)
+        self._prefixes: OrderedDict[int, tuple[Agent[Any], str, str]] = OrderedDict()  # id(clone) -> (clone, prefix JSON, hash)
+        self.stats: Counter[str] = Counter()
+
+    @staticmethod
+    def key_for(base: Agent[Any], overrides: dict[str, Any]) -> str:
+        payload = json.dumps({"base": id(base), "overrides": canonical(overrides)}, sort_keys=True)
+        return hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+    def get(self, base: Agent[Any], **overrides: Any) -> Agent[Any]:
+        key = self.key_for(base, overrides)
+        cached = self._clones.get(key)
+        if cached is not None:
+            self._clones.move_to_end(key)
+            self.stats["hits"] += 1
+            return cached[1]
+
+        self.stats["misses"] += 1
+        agent = base.clone(**overrides)
+        # A new list, with Agents replaced by their (cached) Handoff objects: the SDK uses a Handoff as it is
+        agent.handoffs = [self.handoff_for(item) if isinstance(item, Agent) else item for item in agent.handoffs]
+        self._clones[key] = (base, agent)
+        if len(self._clones) > self.max_size:
+            _, (_, evicted) = self._clones.popitem(last=False)
+            self._prefixes.pop(id(evicted), None)
+            self.stats["evictions"] += 1
+        return agent
+
+    def _trim(self, cache: OrderedDict) -> None:
+        # Cached clones keep their own references to the tools and Handoffs they use; evicting here is safe
+        while len(cache) > self.max_size:
+            cache.popitem(last=False)
+
+    def handoff_for(self, target: Agent[Any]) -> Handoff:
+        cached = self._handoffs.get(id(target))
+        if cached is None:
+            cached = self._handoffs[id(target)] = (target, handoff(target))
+            self._trim(self._handoffs)
+            self.stats["handoffs_built"] += 1
+        else:
+            self._handoffs.move_to_end(id(target))
+        return cached[1]
+
+    def as_tool(self, agent: Agent[Any], tool_name: str, tool_description: str) -> Tool:
+        key = (id(agent), tool_name, tool_description)
+        cached = self._tools.get(key)
+        if cached is None:
+            cached = self._tools[key] = (agent, agent.as_tool(tool_name=tool_name, tool_description=tool_description))
+            self._trim(self._tools)
+            self.stats["tools_built"] += 1
+        else:
+            self._tools.move_to_end(key)
+        return cached[1]
+
+    def request_prefix(self, agent: Agent[Any]) -> tuple[str, str]:
+        """The serialized system prompt and tool definitions of a realized clone, and their hash (for logs only)."""
+        cached = self._prefixes.get(id(agent))
+        if cached is not None:
+            self._prefixes.move_to_end(id(agent))
+        else:
+            tools = [tool_definition(tool) for tool in agent.tools]
+            tools += [tool_definition(h) for h in agent.handoffs if isinstance(h, Handoff)]
+            system = agent.instructions if isinstance(agent.instructions, str) else None
+            prefix = json.dumps({"system": system, "tools": tools}, sort_keys=True)
+            cached = self._prefixes[id(agent)] = (agent, prefix, hashlib.blake2b(prefix.encode(), digest_size=8).hexdigest())
+            self._trim(self._prefixes)
+            self.stats["prefixes_built"] += 1
+        return cached[1], cached[2]
+
+
+base_agent = Agent(
+    name="pirate_agent",
+    instructions="Write like a pirate",
+    model_settings=ModelSettings(temperature=1, max_tokens=1024, top_p=1),
+    model=model,
+)
+
+math_agent = Agent(
+    name="math_agent",
+    instructions="You solve arithmetic questions and return only the result.",
+    model=model,
+)
+
+support_agent = Agent(
+    name="support_agent",
+    handoff_description="Handles account and billing questions",
+    instructions="You help with account and billing questions.",
+    model=model,
+)
+
+PERSONAS = {
+    "pirate": "Write like a pirate",
+    "robot": "Write like a robot",
+    "poet": "Write like a poet",
+}
+
+pool = AgentTemplatePool(max_size=64)
+
+
+def persona_overrides(persona: str, tools: list[Tool]) -> dict[str, Any]:
+    return {
+        "name": f"{persona}_agent",
+        "instructions": PERSONAS[persona] + ". Use solve_math for arithmetic.",
+        "tools": tools,
+        "handoffs": [support_agent],
+    }
+
+
+async def handle_request(persona: str, user_input: str) -> str:
+    tools = [pool.as_tool(math_agent, "solve_math", "Solve an arithmetic question")]
+    agent = pool.get(base_agent, **persona_overrides(persona, tools))
+    result = await Runner.run(agent, user_input)
+    return str(result.final_output)
+
+
+def turn_setup(agent: Agent[Any]) -> list[Handoff]:
+    """What the SDK derives per turn from the agent that the pool saves: a Handoff for every Agent in handoffs."""
+    return [item if isinstance(item, Handoff) else handoff(item) for item in agent.handoffs]
+
+
+async def main():
+    for persona, question in [("robot", "what is 2+2? use solve_math"), ("pirate", "hello!"), ("robot", "what is 3+3? use solve_math")]:
+        answer = await handle_request(persona, question)
+        print(f"{persona:7} -> {answer[:60]!r}")
+    print(f"pool stats: {dict(pool.stats)}")
+
+    robot = pool.get(base_agent, **persona_overrides("robot", [pool.as_tool(math_agent, "solve_math", "Solve an arithmetic question")]))
+    prefix, prefix_hash = pool.request_prefix(robot)
+    print(f"robot prefix: {len(prefix)} chars, hash {prefix_hash} (same object next time: {pool.request_prefix(robot)[0] is prefix})")
+
+    # Setup cost per request: clone + as_tool + Handoffs, versus the pool. request_prefix is left out on both sides:
+    # the SDK builds the tool definitions itself on every call, with or without the pool.
+    requests = 5000
+    personas = list(PERSONAS) * (requests // len(PERSONAS) + 1)
+
+    start = time.perf_counter()
+    for persona in personas[:requests]:
+        tools = [math_agent.as_tool(tool_name="solve_math", tool_description="Solve an arithmetic question")]
+        turn_setup(base_agent.clone(**persona_overrides(persona, tools)))
+    naive = time.perf_counter() - start
+
+    start = time.perf_counter()
+    for persona in personas[:requests]:
+        tools = [pool.as_tool(math_agent, "solve_math", "Solve an arithmetic question")]
+        turn_setup(pool.get(base_agent, **persona_overrides(persona, tools)))
+    pooled = time.perf_counter() - start
+
+    print(f"\n{'setup per request':24} {'us':>8}")
+    print(f"{'clone per request':24} {naive * 1e6 / requests:>8.1f}")
+    print(f"{'template pool':24} {pooled * 1e6 / requests:>8.1f}")
+    print(f"pool stats: {dict(pool.stats)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why are tools and agents part of the key by identity, while instructions are part of it by value?
+2. What happens if a request appends a tool to an agent it got from the pool?
+3. Why does the pool keep the target agents of cached Handoffs and tools alive, and why is it still safe to evict
+   a Handoff while a cached clone uses it?
+4. A tenant-specific instruction contains the user's name. Should it go through the pool? What would you do instead?
+5. How would you choose max_size, and what does an eviction cost the next request with those overrides?
+"""
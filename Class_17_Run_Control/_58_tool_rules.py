@@ -0,0 +1,260 @@
+"""
+This example demonstrates a rule-based tool_use_behavior: declarative rules decide when tool outputs are the final answer.
+
+Recap (see _23_tool_use_behavior.py):
+- "run_llm_again" (default): after the tools answered, the LLM runs AGAIN to turn the tool outputs into an answer.
+- "stop_on_first_tool" and StopAtTools(stop_at_tool_names=[...]) skip that LLM call, but only by tool NAME, and they
+  return one raw tool output.
+- tool_use_behavior can also be a function (context, tool_results) -> ToolsToFinalOutputResult. That is the hook used here.
+
+Key Concepts:
+- ToolRules([...]) is such a function. It checks its rules in order after every tool turn; the first rule that
+  matches returns the final output, and the LLM call that would have followed is avoided.
+  If no rule matches, the LLM runs again as usual.
+- Rules:
+  - StopWhenSchema(tool_name, Model): the tool output validates against a pydantic model -> the validated object is
+    the final output (e.g. a tool that already returns the structured answer the client wants).
+  - StopWhenAllAnswered(tool_names, template): all of these tools answered in this turn, without errors.
+  - StopWhenReady(): a tool returned UserReady("...") (a str subclass): its output is already final-user-ready text.
+    With a template, it only matches when every tool the template names answered in this turn.
+- Rules keep no state between match() and final_output(): one ToolRules object is shared by all runs of the agent,
+  also concurrent ones.
+- Local templating: a rule can format the final answer with a template such as
+  "{get_weather}\nStudent: {piaic_student_finder}" (str.format with the tool outputs), without another LLM call.
+- Results are grouped per tool name, in call order: a tool called twice in one turn (e.g. weather for two cities)
+  keeps both outputs, and a template field gets them one per line. StopWhenSchema without a template only matches
+  one call, because the final output must be one model object.
+- Stats: ToolRules.stats counts, per rule, how many LLM turns were avoided, and how often no rule matched.
+
+Important Note:
+- The final output must match the agent's output_type. With the default (str) output type, use a template or
+  StopWhenReady; with output_type=Model, use StopWhenSchema with the same model.
+- The function gets the results of ONE tool turn. StopWhenAllAnswered therefore means "answered in the same turn".
+
+How it works in this code:
+- main() asks the _23 question (weather + student) with the default behavior and with ToolRules, and compares LLM calls.
+"""
+
+import asyncio
+import os
+import re
+from abc import ABC, abstractmethod
+from collections import Counter
+from string import Formatter
+from typing import Any
+from dotenv import load_dotenv, find_dotenv
+from pydantic import BaseModel, ValidationError
+from agents import Agent, FunctionToolResult, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, RunContextWrapper, ToolsToFinalOutputResult, function_tool, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+# The text the SDK's default tool error handler returns to the model when a tool raises
+ERROR_PREFIX = "An error occurred while running the tool"
+
+
+class UserReady(str):
+    """Returned by a tool whose output can be shown to the user as it is."""
+
+
+class Rule(ABC):
+    """A rule matches the tool results of one turn and builds the final output from them.
+
+    results maps each tool name to the list of its outputs in this turn (a tool can be called more than once).
+    """
+
+    name = "rule"
+
+    def __init__(self, template: str | None = None):
+        self.template = template
+        # The names a template reads, e.g. {"get_weather"} for "{get_weather.upper}" or "{get_weather}"
+        self.template_fields = {re.split(r"[.\[]", field)[0] for _, field, _, _ in Formatter().parse(template or "") if field}
+
+    @abstractmethod
+    def match(self, results: dict[str, list[Any]]) -> bool:
+        ...
+
+    def final_output(self, results: dict[str, list[Any]]) -> Any:
+        if self.template is None:
+            return "\n".join(str(output) for outputs in results.values() for output in outputs)
+        return self.template.format_map(joined(results))
+
+
+def joined(results: dict[str, list[Any]]) -> dict[str, str]:
+    """One template value per tool: its outputs, one per line when it was called more than once."""
+    return {name: "\n".join(str(output) for output in outputs) for name, outputs in results.items()}
+
+
+class StopWhenSchema(Rule):
+    name = "schema"
+
+    def __init__(self, tool_name: str, model: type[BaseModel], template: str | None = None):
+        super().__init__(template)
+        self.tool_name = tool_name
+        self.model = model
+
+    def validate(self, results: dict[str, list[Any]]) -> list[BaseModel] | None:
+        """Every output of the tool validated into the model, or None if it did not answer or an output does not fit."""
+        outputs = results.get(self.tool_name)
+        if not outputs:
+            return None
+        try:
+            return [self.model.model_validate_json(output) if isinstance(output, str) else self.model.model_validate(output)
+                    for output in outputs]
+        except ValidationError:
+            return None
+
+    def match(self, results: dict[str, list[Any]]) -> bool:
+        validated = self.validate(results)
+        # Without a template the final output is ONE model object: two calls are left to the LLM to combine
+        return validated is not None and (self.template is not None or len(validated) == 1)
+
+    def final_output(self, results: dict[str, list[Any]]) -> Any:
+        # Validated again here instead of kept on self: the rule is shared by concurrent runs
+        validated = self.validate(results)
+        if self.template is None:
+            return validated[0]
+        values = joined(results)
+        return "\n".join(self.template.format_map({**values, **item.model_dump()}) for item in validated)
+
+
+class StopWhenAllAnswered(Rule):
+    name = "all_answered"
+
+    def __init__(self, tool_names: list[str], template: str | None = None):
+        super().__init__(template)
+        self.tool_names = tool_names
+
+    def match(self, results: dict[str, list[Any]]) -> bool:
+        answered = all(results.get(name) and not any(str(output).startswith(ERROR_PREFIX) for output in results[name])
+                       for name in self.tool_names)
+        return answered and self.template_fields <= results.keys()
+
+
+class StopWhenReady(Rule):
+    name = "user_ready"
+
+    def match(self, results: dict[str, list[Any]]) -> bool:
+        ready = any(isinstance(output, UserReady) for outputs in results.values() for output in outputs)
+        return ready and self.template_fields <= results.keys()
+
+    def final_output(self, results: dict[str, list[Any]]) -> Any:
+        if self.template is not None:
+            return super().final_output(results)  # the template may name any tool of this turn
+        ready = {name: [output for output in outputs if isinstance(output, UserReady)] for name, outputs in results.items()}
+        return super().final_output(ready)
+
+
+class ToolRules:
+    """tool_use_behavior made of rules. The first matching rule ends the run with its final output."""
+
+    def __init__(self, rules: list[Rule]):
+        self.rules = rules
+        self.stats: Counter[str] = Counter()
+
+    def __call__(self, context: RunContextWrapper[Any], tool_results: list[FunctionToolResult]) -> ToolsToFinalOutputResult:
+        results: dict[str, list[Any]] = {}
+        for result in tool_results:  # in call order; a tool called twice keeps both outputs
+            results.setdefault(result.tool.name, []).append(result.output)
+        for rule in self.rules:
+            if rule.match(results):
+                self.stats[f"{rule.name}: llm_turns_avoided"] += 1
+                return ToolsToFinalOutputResult(is_final_output=True, final_output=rule.final_output(results))
+        self.stats["no_match: llm_run_again"] += 1
+        return ToolsToFinalOutputResult(is_final_output=False)
+
+
+class Forecast(BaseModel):
+    city: str
+    celsius: float
+    summary: str
+
+
+@function_tool("get_weather")
+def get_weather(location: str, unit: str) -> str:
+    """Fetch the weather for a given location, returning a short description."""
+    return f"The weather in {location} is 22 degrees {unit}."
+
+
+@function_tool("piaic_student_finder")
+def piaic_student_finder(student_roll: int) -> str:
+    """Find the PIAIC student based on the roll number."""
+    data = {1: "Ammar", 2: "Azeem", 3: "Zain"}
+    return data.get(student_roll, "Not Found")
+
+
+@function_tool("get_forecast")
+def get_forecast(city: str) -> str:
+    """Get tomorrow's forecast for a city as JSON."""
+    return Forecast(city=city, celsius=24.5, summary="Sunny with light wind").model_dump_json()
+
+
+@function_tool("get_office_hours")
+def get_office_hours(campus: str) -> str:
+    """Get the office hours of a PIAIC campus, ready to show to the student."""
+    return UserReady(f"The {campus} campus office is open Monday to Friday, 9am to 5pm.")
+
+
+rules = ToolRules([
+    StopWhenReady(),
+    StopWhenAllAnswered(
+        ["get_weather", "piaic_student_finder"],
+        template="Weather: {get_weather}\nStudent with that roll number: {piaic_student_finder}",
+    ),
+    StopWhenSchema("get_forecast", Forecast, template="Tomorrow in {city}: {summary}, {celsius} C."),
+])
+
+tools = [get_weather, piaic_student_finder, get_forecast, get_office_hours]
+
+default_agent = Agent(
+    name="pirate_agent",
+    instructions="you are a helpful assistant",
+    model=model,
+    tools=tools,
+)
+
+rules_agent = default_agent.clone(tool_use_behavior=rules)
+
+questions = [
+    "what is the weather in Islamabad in celsius (get_weather)? and who is student with roll number 2 (piaic_student_finder)?",
+    "use get_forecast for Lahore",
+    "use get_office_hours for the Karachi campus",
+    "use get_weather for Quetta",  # no rule matches: the LLM runs again
+]
+
+
+async def main():
+    for question in questions:
+        default = await Runner.run(default_agent, question)
+        ruled = await Runner.run(rules_agent, question)
+        print(f"Q: {question}")
+        print(f"  default: {len(default.raw_responses)} LLM calls")
+        print(f"  rules  : {len(ruled.raw_responses)} LLM calls -> {str(ruled.final_output)!r}")
+    print(f"\nstats: {dict(rules.stats)}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why must the final output of a rule match the agent's output_type, and what happens with a template when it is a model?
+2. A tool fails for one of the two tools in StopWhenAllAnswered. What does the rule do, and why is that the right choice?
+3. When is it better to let the LLM run again instead of formatting the answer with a local template?
+4. Why is StopWhenReady checked first in this list of rules?
+5. How would you change StopWhenAllAnswered to work across several tool turns instead of one?
+"""
@@ -0,0 +1,244 @@
+"""
+This example demonstrates a run budget: turns, tokens, wall-clock time and cost, checked BEFORE every LLM call.
+
+Recap (see _24_max_turns.py):
+- max_turns is the only limit the SDK has. When a run needs more turns, MaxTurnsExceeded is raised and everything the
+  run already did (tool results, partial answers) is thrown away with it.
+- Tokens, time and money are not limited at all: a runaway run keeps spending until max_turns is reached.
+
+Key Concepts:
+- RunBudget(max_turns, max_input_tokens, max_output_tokens, deadline_seconds, max_cost_usd) is one object that
+  plugs into the run in two places:
+  - RunConfig(call_model_input_filter=budget.check): called right BEFORE every LLM call with the exact input.
+    The budget estimates what this call will cost (input tokens from the input, output tokens and latency from the
+    calls so far) and refuses the call if it would go over a limit. Pre-emptive: the quota is never spent.
+  - hooks=budget (RunHooks.on_llm_end): records the real token usage and latency of every call.
+- A refused call raises BudgetExceeded(reason). It is an AgentsException, so the SDK attaches run_data
+  (the items the run produced so far) to it.
+- run_with_budget(...) turns that into a BudgetedResult: the best-effort partial answer (the last message, or the
+  tool results collected so far), complete=False and a reason code: "max_turns", "max_input_tokens",
+  "max_output_tokens", "deadline" or "max_cost".
+
+Important Note:
+- Use one RunBudget per run: it counts what that run has spent.
+- A call that is already running is not interrupted. The deadline check uses the average call latency, so a run
+  stops before a call that would probably end after the deadline.
+
+How it works in this code:
+- runaway_agent is forced to call a tool on every turn (tool_choice="required", reset_tool_choice=False): it never stops.
+- main() runs it with max_turns (work lost) and then with each budget limit (partial results with a reason).
+"""
+
+import asyncio
+import json
+import os
+import time
+from dataclasses import dataclass, field
+from typing import Any
+from dotenv import load_dotenv, find_dotenv
+from agents import (
+    Agent, AgentsException, ItemHelpers, MaxTurnsExceeded, MessageOutputItem, ModelSettings, Runner, RunConfig, RunHooks,
+    AsyncOpenAI, OpenAIChatCompletionsModel, RunContextWrapper, RunItem, ToolCallOutputItem, function_tool,
+    set_tracing_export_api_key,
+)
+from agents.items import ModelResponse
+from agents.run import CallModelData, ModelInputData
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+def estimate_tokens(item: Any) -> int:
+    """About 4 characters per token, used for the NEXT call (real usage is recorded after each call)."""
+    text = item if isinstance(item, str) else json.dumps(item, ensure_ascii=False, default=str)
+    return len(text) // 4 + 1
+
+
+class BudgetExceeded(AgentsException):
+    def __init__(self, reason: str, message: str):
+        super().__init__(message)
+        self.reason = reason
+        self.message = message
+
+
+class RunBudget(RunHooks):
+    """Limits for ONE run. Pass budget.run_config() as run_config and the budget itself as hooks."""
+
+    def __init__(
+        self,
+        max_turns: int | None = None,
+        max_input_tokens: int | None = None,
+        max_output_tokens: int | None = None,
+        deadline_seconds: float | None = None,
+        max_cost_usd: float | None = None,
+        usd_per_1m_input: float = 0.10,
+        usd_per_1m_output: float = 0.40,
+        default_output_tokens: int = 50,
+    ):
+        self.max_turns = max_turns
+        self.max_input_tokens = max_input_tokens
+        self.max_output_tokens = max_output_tokens
+        self.deadline_seconds = deadline_seconds
+        self.max_cost_usd = max_cost_usd
+        self.usd_per_1m_input = usd_per_1m_input
+        self.usd_per_1m_output = usd_per_1m_output
+        self.default_output_tokens = default_output_tokens
+
+        self.turns = 0
+        self.input_tokens = 0
+        self.output_tokens = 0
+        self.call_seconds: list[float] = []
+        self._started: float | None = None
+        self._call_started = 0.0
+
+    def cost(self, input_tokens: int, output_tokens: int) -> float:
+        return (input_tokens * self.usd_per_1m_input + output_tokens * self.usd_per_1m_output) / 1_000_000
+
+    @property
+    def spent_usd(self) -> float:
+        return self.cost(self.input_tokens, self.output_tokens)
+
+    @property
+    def elapsed(self) -> float:
+        return time.monotonic() - self._started if self._started is not None else 0.0
+
+    def usage(self) -> dict[str, Any]:
+        return {"turns": self.turns, "input_tokens": self.input_tokens, "output_tokens": self.output_tokens,
+                "seconds": round(self.elapsed, 2), "usd": round(self.spent_usd, 6)}
+
+    def run_config(self, **kwargs: Any) -> RunConfig:
+        return RunConfig(call_model_input_filter=self.check, **kwargs)
+
+    def check(self, data: CallModelData[Any]) -> ModelInputData:
+        """call_model_input_filter: refuse the next LLM call if it would go over the budget."""
+        if self._started is None:
+            self._started = time.monotonic()
+        next_input = estimate_tokens(data.model_data.instructions or "") + sum(map(estimate_tokens, data.model_data.input))
+        next_output = self.output_tokens // self.turns if self.turns else self.default_output_tokens
+        next_seconds = sum(self.call_seconds) / len(self.call_seconds) if self.call_seconds else 0.0
+
+        if self.max_turns is not None and self.turns + 1 > self.max_turns:
+            raise BudgetExceeded("max_turns", f"Turn {self.turns + 1} would exceed max_turns={self.max_turns}")
+        if self.max_input_tokens is not None and self.input_tokens + next_input > self.max_input_tokens:
+            raise BudgetExceeded("max_input_tokens", f"~{next_input} more input tokens would exceed {self.max_input_tokens}")
+        if self.max_output_tokens is not None and self.output_tokens + next_output > self.max_output_tokens:
+            raise BudgetExceeded("max_output_tokens", f"~{next_output} more output tokens would exceed {self.max_output_tokens}")
+        if self.deadline_seconds is not None and self.elapsed + next_seconds > self.deadline_seconds:
+            raise BudgetExceeded("deadline", f"A ~{next_seconds:.2f}s call at {self.elapsed:.2f}s would end after {self.deadline_seconds}s")
+        if self.max_cost_usd is not None and self.spent_usd + self.cost(next_input, next_output) > self.max_cost_usd:
+            raise BudgetExceeded("max_cost", f"The next call would bring the cost over ${self.max_cost_usd}")
+
+        self.turns += 1
+        return data.model_data
+
+    async def on_llm_start(self, context: RunContextWrapper, agent: Agent, system_prompt: str | None, input_items: list) -> None:
+        self._call_started = time.monotonic()
+
+    async def on_llm_end(self, context: RunContextWrapper, agent: Agent, response: ModelResponse) -> None:
+        self.call_seconds.append(time.monotonic() - self._call_started)
+        self.input_tokens += response.usage.input_tokens
+        self.output_tokens += response.usage.output_tokens
+
+
+@dataclass
+class BudgetedResult:
+    final_output: Any
+    complete: bool
+    reason: str | None = None
+    usage: dict[str, Any] = field(default_factory=dict)
+    new_items: list[RunItem] = field(default_factory=list)
+
+
+def best_effort_output(items: list[RunItem]) -> str:
+    """The last message of the run, or else the tool results it collected."""
+    messages = [ItemHelpers.text_message_output(item) for item in items if isinstance(item, MessageOutputItem)]
+    if messages and messages[-1]:
+        return messages[-1]
+    outputs = [str(item.output) for item in items if isinstance(item, ToolCallOutputItem)]
+    return "Partial results: " + "; ".join(outputs) if outputs else ""
+
+
+async def run_with_budget(agent: Agent[Any], input: str | list, budget: RunBudget, **kwargs: Any) -> BudgetedResult:
+    # The SDK's own max_turns stays as a backstop above the budget's limit
+    kwargs.setdefault("max_turns", (budget.max_turns or 10) + 1)
+    try:
+        result = await Runner.run(agent, input, run_config=budget.run_config(), hooks=budget, **kwargs)
+        return BudgetedResult(result.final_output, True, None, budget.usage(), result.new_items)
+    except (BudgetExceeded, MaxTurnsExceeded) as e:
+        items = e.run_data.new_items if e.run_data else []
+        reason = e.reason if isinstance(e, BudgetExceeded) else "max_turns"
+        return BudgetedResult(best_effort_output(items), False, reason, budget.usage(), items)
+
+
+@function_tool
+async def search_flights(query: str) -> str:
+    """Search flights for a query."""
+    await asyncio.sleep(0.2)
+    return f"3 flights found for '{query[:30]}'"
+
+
+# A runaway agent: it must call a tool on every turn, so it never produces a final answer
+runaway_agent = Agent(
+    name="travel_agent",
+    instructions="You find flights. Use search_flights.",
+    tools=[search_flights],
+    model_settings=ModelSettings(tool_choice="required"),
+    reset_tool_choice=False,
+    model=model,
+)
+
+helpful_agent = Agent(name="helpful_agent", instructions="You are a helpful assistant.", model=model)
+
+
+async def main():
+    question = "Find me flights from Karachi to Lahore tomorrow"
+
+    # 1) max_turns only: the exception throws the three tool results away
+    try:
+        await Runner.run(runaway_agent, question, max_turns=3)
+    except MaxTurnsExceeded as e:
+        print(f"{"max_turns=3 (SDK)":21} -> MaxTurnsExceeded: {e.message}")
+
+    # 2) The same run with a budget per limit: every run stops early AND returns what it has
+    budgets = {
+        "max_turns=3": RunBudget(max_turns=3),
+        "max_input_tokens=600": RunBudget(max_input_tokens=600),
+        "max_output_tokens=80": RunBudget(max_output_tokens=80),
+        "deadline_seconds=1": RunBudget(deadline_seconds=1.0),
+        "max_cost_usd=0.0002": RunBudget(max_cost_usd=0.0002, usd_per_1m_input=0.30, usd_per_1m_output=2.50),
+    }
+    for label, budget in budgets.items():
+        outcome = await run_with_budget(runaway_agent, question, budget)
+        print(f"{label:21} -> reason={outcome.reason}, usage={outcome.usage}")
+        print(f"{'':21}    partial: {str(outcome.final_output)[:90]!r}")
+
+    # 3) A run that fits its budget is complete, as usual
+    outcome = await run_with_budget(helpful_agent, "What is 2+2?", RunBudget(max_turns=2, max_cost_usd=0.01, deadline_seconds=10))
+    print(f"{'within budget':21} -> complete={outcome.complete}, output={str(outcome.final_output)[:50]!r}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why is the budget checked in call_model_input_filter (before the call) and not only in on_llm_end (after it)?
+2. The output tokens of the next call are unknown before the call. How does the budget estimate them, and when is that wrong?
+3. Why is BudgetExceeded a subclass of AgentsException, and what would be lost if it were a plain Exception?
+4. A client gets a partial answer with reason="deadline". What should the client or the API tell the user?
+5. How would you share ONE budget between a parent run and the nested runs of its agent-as-tool sub-agents?
+"""
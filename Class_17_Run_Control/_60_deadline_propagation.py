@@ -0,0 +1,229 @@
+"""
+This example demonstrates one deadline per request that reaches every LLM call, tool, sub-agent and guardrail of the run.
+
+Recap (see _19_agent_as_tool.py and _37_input_guardrail.py):
+- An agent-as-tool and a guardrail like product_guardrail call Runner.run(...) AGAIN, inside the outer run.
+- A tool like get_weather calls a slow service. Nothing tells it how much time the request has left.
+- The HTTP client of the model has a fixed timeout (10 minutes by default in the openai client), however little
+  time the request has left.
+- So a request with a 3 second SLO can still take minutes.
+
+Key Concepts:
+- Deadline(seconds) is an absolute point in time (time.monotonic() based), so it can be passed on and shrinks by
+  itself: remaining() is what is left NOW.
+- It is carried in a contextvars.ContextVar. Every asyncio task inherits the context of the task that created it,
+  so tool calls, nested Runner.run(...) calls (agent-as-tool, guardrail agents) and HTTP calls made during the run
+  all see the same deadline, without passing it through every function.
+- run_with_deadline(agent, input, seconds) sets the deadline (a nested call can only make it SHORTER) and runs the
+  agent inside asyncio.timeout_at(...). When time runs out, the run task is cancelled, and with it every tool,
+  sub-agent and guardrail still running. The caller gets DeadlineExceeded, at the deadline and not later.
+- DeadlineHTTPClient is the httpx client of the model: it caps the timeout of every HTTP request at the time left,
+  and does not even start a request after the deadline.
+- Tools can read Deadline.current() to give their own I/O the time that is left (and skip work that cannot finish).
+
+How it works in this code:
+- travel_agent has a guardrail agent, a sub-agent tool and a slow get_weather tool.
+- travel_guardrail uses a plain nested Runner.run(...); convert_currency uses run_with_deadline(..., seconds=10).
+  Both get the deadline of the request.
+- main() runs it with enough time, then with too little time (cancelled at the deadline), and shows the timeouts
+  the HTTP client used.
+"""
+
+import asyncio
+import contextvars
+import os
+import time
+from typing import Any
+import httpx
+from dotenv import load_dotenv, find_dotenv
+from pydantic import BaseModel
+from agents import (
+    Agent, AgentsException, GuardrailFunctionOutput, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, RunContextWrapper,
+    TResponseInputItem, function_tool, input_guardrail, set_tracing_export_api_key,
+)
+from openai import DefaultAsyncHttpxClient
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+
+class DeadlineExceeded(AgentsException):
+    pass
+
+
+class Deadline:
+    """An absolute deadline. remaining() is the time left now."""
+
+    _current: contextvars.ContextVar["Deadline | None"] = contextvars.ContextVar("deadline", default=None)
+
+    def __init__(self, seconds: float):
+        self.expires_at = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - time.monotonic())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() == 0.0
+
+    @classmethod
+    def current(cls) -> "Deadline | None":
+        return cls._current.get()
+
+    @classmethod
+    def remaining_or(cls, default: float) -> float:
+        """Time left of the current deadline, or `default` outside of a deadline."""
+        deadline = cls.current()
+        return min(default, deadline.remaining()) if deadline else default
+
+
+class DeadlineHTTPClient(DefaultAsyncHttpxClient):
+    """httpx client for AsyncOpenAI: every request gets at most the time left of the current deadline."""
+
+    def __init__(self, **kwargs: Any):
+        super().__init__(**kwargs)
+        self.applied_timeouts: list[float] = []
+
+    async def send(self, request: httpx.Request, **kwargs: Any) -> httpx.Response:
+        deadline = Deadline.current()
+        if deadline is not None:
+            left = deadline.remaining()
+            if left == 0.0:
+                raise httpx.TimeoutException("Deadline exceeded before the request was sent", request=request)
+            timeouts = dict(request.extensions.get("timeout") or {})
+            for phase in ("connect", "read", "write", "pool"):
+                timeouts[phase] = min(timeouts.get(phase) or left, left)
+            request.extensions["timeout"] = timeouts
+            self.applied_timeouts.append(round(left, 2))
+        return await super().send(request, **kwargs)
+
+
+http_client = DeadlineHTTPClient()
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+    http_client=http_client,
+    max_retries=0,  # a retry after a deadline timeout could never finish in time
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+async def run_with_deadline(agent: Agent[Any], input: str | list[TResponseInputItem], seconds: float, **kwargs: Any):
+    """Runner.run(...) that finishes or raises DeadlineExceeded within `seconds` (or the outer deadline, if shorter)."""
+    outer = Deadline.current()
+    deadline = Deadline(seconds)
+    if outer is not None and outer.expires_at < deadline.expires_at:
+        deadline = outer
+    token = Deadline._current.set(deadline)
+    # asyncio.timeout_at uses the event loop clock; convert the remaining time to it
+    scope = asyncio.timeout_at(asyncio.get_running_loop().time() + deadline.remaining())
+    try:
+        async with scope:
+            return await Runner.run(agent, input, **kwargs)
+    except TimeoutError as e:
+        if not (scope.expired() or deadline.expired):
+            raise  # a tool's or client's own timeout inside the run, not this deadline
+        raise DeadlineExceeded(f"Run of {agent.name} did not finish within its deadline") from e
+    finally:
+        Deadline._current.reset(token)
+
+
+seen_remaining: dict[str, float] = {}  # where the deadline was seen, and the time left there
+
+
+@function_tool
+async def get_weather(city: str) -> str:
+    """Fetch the weather for a city from a (slow) weather service."""
+    seen_remaining["get_weather"] = round(Deadline.remaining_or(float("inf")), 2)
+    # Give the service at most the time that is left; a real client would pass it as its own timeout
+    await asyncio.sleep(min(1.5, Deadline.remaining_or(1.5)))
+    return f"The weather in {city[:20]} is sunny, 22 C."
+
+
+currency_agent = Agent(
+    name="currency_agent",
+    instructions="You convert amounts between currencies.",
+    model=model,
+)
+
+
+@function_tool
+async def convert_currency(request: str) -> str:
+    """Convert an amount between currencies with the currency sub-agent."""
+    seen_remaining["convert_currency (nested run)"] = round(Deadline.remaining_or(float("inf")), 2)
+    # Asks for 10s, but a nested deadline can only be shorter: it gets what the request has left
+    result = await run_with_deadline(currency_agent, request, seconds=10.0)
+    return str(result.final_output)
+
+
+class TravelCheck(BaseModel):
+    is_not_travel_related: bool
+    reasoning: str
+
+
+guardrail_agent = Agent(
+    name="Police",
+    instructions="Check if the user is asking you anything unrelated to travel.",
+    model=model,
+    output_type=TravelCheck,
+)
+
+
+@input_guardrail
+async def travel_guardrail(ctx: RunContextWrapper[None], agent: Agent, input: str | list[TResponseInputItem]) -> GuardrailFunctionOutput:
+    seen_remaining["travel_guardrail (nested run)"] = round(Deadline.remaining_or(float("inf")), 2)
+    result = await Runner.run(guardrail_agent, input, context=ctx.context)
+    return GuardrailFunctionOutput(output_info=result.final_output, tripwire_triggered=result.final_output.is_not_travel_related)
+
+
+travel_agent = Agent(
+    name="travel_agent",
+    instructions="You help travelers. Use get_weather and convert_currency when needed.",
+    tools=[get_weather, convert_currency],
+    input_guardrails=[travel_guardrail],
+    model=model,
+)
+
+question = "use get_weather for Dubai and convert_currency for 100 USD to AED"
+
+
+async def main():
+    # 1) Enough time: every part of the run sees the same, shrinking deadline
+    start = time.perf_counter()
+    result = await run_with_deadline(travel_agent, question, seconds=5.0)
+    print(f"5.0s deadline: done in {time.perf_counter() - start:.2f}s -> {str(result.final_output)[:60]!r}")
+    for where, remaining in seen_remaining.items():
+        print(f"  {where:30} saw {remaining:.2f}s left")
+    print(f"  HTTP timeouts used (s): {http_client.applied_timeouts}")
+
+    # 2) Not enough time: the slow tool is cancelled and the caller gets DeadlineExceeded at the deadline
+    http_client.applied_timeouts.clear()
+    start = time.perf_counter()
+    try:
+        await run_with_deadline(travel_agent, question, seconds=0.8)
+    except DeadlineExceeded as e:
+        print(f"\n0.8s deadline: {e} (after {time.perf_counter() - start:.2f}s)")
+    print(f"  HTTP timeouts used (s): {http_client.applied_timeouts}")
+
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why is the deadline stored as an absolute time instead of a number of seconds?
+2. How does the sub-agent run inside convert_currency get the deadline, even though nobody passes it?
+3. What happens to the guardrail agent's LLM call when the deadline is reached while it is still running?
+4. Why are the HTTP client's retries turned off, and what would you do instead if you want retries?
+5. A tool writes to a database. What can go wrong if it is cancelled at the deadline, and how would you protect it?
+"""
@@ -0,0 +1,223 @@
+"""
+This example demonstrates how to evaluate is_enabled once per role (or session) instead of on every turn.
+
+Recap (see _26_is_enabled_2.py and _35_is_enabled.py):
+- is_enabled=is_user_admin hides delete_user_database from users who are not admins.
+- is_enabled=is_user_registered hides the Cardiologist handoff from patients who are not registered.
+- The SDK calls EVERY is_enabled function of EVERY tool and handoff at the start of EVERY turn, and turns every Agent
+  in handoffs=[...] into a Handoff object again. A real is_enabled often asks a permission service or a database.
+
+Key Concepts:
+- The answer of is_user_admin only depends on context.user_role. So all admins get the same tools, and all other
+  users get the same tools: there are only a few different tool sets, one per role.
+- RoleToolSets(key_fields=("user_role",)) evaluates all is_enabled functions ONCE per key (e.g. per role) and keeps
+  a variant of the agent that only has the enabled tools and handoffs, marked is_enabled=True. During the run the
+  SDK then checks a plain True instead of calling the functions, and the Handoff objects are built once.
+- Variants are keyed by the agent object itself (its id(), with the agent kept alive by the variant), so two
+  different agents with the same name never share a variant.
+- Schema block: the JSON of the enabled tool and handoff definitions is serialized once per variant as well.
+  The SDK does NOT use it: it still builds the tool definitions for every LLM call. What the cache saves per turn
+  is the is_enabled calls and the Handoff building. Use the schema block for logs or to compare what two roles see.
+- Metrics: variants built, variants reused, is_enabled calls made.
+
+Important Note:
+- Declare every context field the is_enabled functions read (for per-session tools add e.g. "session_id").
+  A function that reads an undeclared field gets its first answer cached for everybody with the same key.
+- invalidate(user_role="admin") drops a variant, e.g. after the permissions of a role changed.
+
+How it works in this code:
+- main() runs three turns for admins and users with the original agent and with the cached variants, and counts
+  how often is_user_admin and is_user_registered were called.
+"""
+
+import asyncio
+import dataclasses
+import inspect
+import json
+import os
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+from dotenv import load_dotenv, find_dotenv
+from agents import Agent, Handoff, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, RunContextWrapper, function_tool, handoff, set_tracing_export_api_key
+from agents.models.chatcmpl_converter import Converter
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+@dataclass
+class ToolSetVariant:
+    base: Agent[Any]  # keeps the base agent alive, so its id() in the key is not reused
+    agent: Agent[Any]
+    schema_block: str
+
+
+class RoleToolSets:
+    """Caches, per key of declared context fields, the agent variant with only its enabled tools and handoffs."""
+
+    def __init__(self, key_fields: tuple[str, ...]):
+        if not key_fields:
+            raise ValueError("Declare at least one context field the is_enabled functions depend on")
+        self.key_fields = key_fields
+        self._variants: dict[tuple, ToolSetVariant] = {}  # (id(agent), *field values) -> variant
+        self.stats: Counter[str] = Counter()
+
+    def key_for(self, agent: Agent[Any], context: Any) -> tuple:
+        return (id(agent), *(getattr(context, field) for field in self.key_fields))
+
+    async def agent_for(self, agent: Agent[Any], context: Any) -> Agent[Any]:
+        return (await self.variant_for(agent, context)).agent
+
+    async def variant_for(self, agent: Agent[Any], context: Any) -> ToolSetVariant:
+        key = self.key_for(agent, context)
+        variant = self._variants.get(key)
+        if variant is not None:
+            self.stats["variants_reused"] += 1
+            return variant
+
+        wrapper = RunContextWrapper(context=context)
+        tools = [dataclasses.replace(tool, is_enabled=True) for tool in agent.tools
+                 if await self._enabled(getattr(tool, "is_enabled", True), wrapper, agent)]
+        handoffs = [item if isinstance(item, Handoff) else handoff(item) for item in agent.handoffs]
+        handoffs = [dataclasses.replace(h, is_enabled=True) for h in handoffs
+                    if await self._enabled(h.is_enabled, wrapper, agent)]
+
+        definitions = [Converter.tool_to_openai(tool) for tool in tools]
+        definitions += [Converter.convert_handoff_tool(h) for h in handoffs]
+        variant = ToolSetVariant(agent, agent.clone(tools=tools, handoffs=handoffs), json.dumps(definitions, sort_keys=True))
+        self._variants[key] = variant
+        self.stats["variants_built"] += 1
+        return variant
+
+    async def _enabled(self, is_enabled: Any, wrapper: RunContextWrapper[Any], agent: Agent[Any]) -> bool:
+        if isinstance(is_enabled, bool):
+            return is_enabled
+        self.stats["is_enabled_calls"] += 1
+        result = is_enabled(wrapper, agent)
+        return bool(await result if inspect.isawaitable(result) else result)
+
+    def invalidate(self, **fields: Any) -> int:
+        """Drop the variants that match the given field values (all variants without arguments)."""
+        unknown = set(fields) - set(self.key_fields)
+        if unknown:
+            raise ValueError(f"Cannot invalidate on undeclared fields: {sorted(unknown)}")
+        stale = [key for key in self._variants
+                 if all(dict(zip(self.key_fields, key[1:]))[name] == value for name, value in fields.items())]
+        for key in stale:
+            del self._variants[key]
+        return len(stale)
+
+
+@dataclass
+class UserContext:
+    user_role: str
+    user_registered: str
+
+
+calls: Counter[str] = Counter()  # how often each is_enabled function really ran
+
+
+def is_user_admin(context: RunContextWrapper[UserContext], agent: Agent) -> bool:
+    calls["is_user_admin"] += 1
+    return context.context.user_role == "admin"
+
+
+def is_user_registered(context: RunContextWrapper[UserContext], agent: Agent) -> bool:
+    calls["is_user_registered"] += 1
+    return context.context.user_registered == "true"
+
+
+@function_tool("get_weather")
+def get_weather(location: str, unit: str) -> str:
+    """Fetch the weather for a given location, returning a short description."""
+    return f"The weather in {location} is 22 degrees {unit}."
+
+
+@function_tool(is_enabled=is_user_admin)
+def delete_user_database() -> str:
+    """[ADMIN ONLY] Deletes the entire user database."""
+    return "Database has been deleted."
+
+
+@function_tool(is_enabled=is_user_admin)
+def list_all_users() -> str:
+    """[ADMIN ONLY] Lists all users."""
+    return "Ammar, Azeem, Zain"
+
+
+cardiologist_agent = Agent(
+    name="Cardiologist",
+    handoff_description="Handles cardiac and heart-related patient issues",
+    instructions="You are a cardiologist. Handle the patient's issue.",
+    model=model,
+)
+
+base_agent = Agent(
+    name="pirate_agent",
+    instructions="you are a helpful assistant. Use the tools to answer the questions. If the user is an admin, they can delete the user database.",
+    model=model,
+    tools=[get_weather, delete_user_database, list_all_users],
+    handoffs=[handoff(cardiologist_agent, is_enabled=is_user_registered)],
+)
+
+tool_sets = RoleToolSets(key_fields=("user_role", "user_registered"))
+
+users = [UserContext("admin", "true"), UserContext("user", "true"), UserContext("user", "false"), UserContext("admin", "true")]
+turns = ["Hello!", "what is the weather in Islamabad? use get_weather", "thanks, bye"]
+
+
+async def chat(agent_for_user, context: UserContext) -> None:
+    convo: list = []
+    for message in turns:
+        agent = await agent_for_user(context)
+        result = await Runner.run(agent, convo + [{"role": "user", "content": message}], context=context)
+        convo = result.to_input_list()
+
+
+async def main():
+    async def original(context: UserContext) -> Agent:
+        return base_agent
+
+    for user in users:
+        await chat(original, user)
+    print(f"original agent : is_enabled calls {dict(calls)}")
+
+    calls.clear()
+    for user in users:
+        await chat(lambda context: tool_sets.agent_for(base_agent, context), user)
+    print(f"cached variants: is_enabled calls {dict(calls)}, stats {dict(tool_sets.stats)}")
+
+    for user in users[:3]:
+        variant = await tool_sets.variant_for(base_agent, user)
+        names = [tool.name for tool in variant.agent.tools] + [h.tool_name for h in variant.agent.handoffs]
+        print(f"  {user.user_role:5} registered={user.user_registered:5} -> {names} ({len(variant.schema_block)} chars of schema)")
+
+    print(f"after a permission change, dropped {tool_sets.invalidate(user_role='admin')} admin variant(s)")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why is it safe to cache the result of is_user_admin per user_role, and when would it NOT be safe?
+2. What happens if you forget "user_registered" in key_fields?
+3. How many tool sets does an app with 4 roles and a registered/unregistered flag need at most?
+4. Why are the cached tools and handoffs copied with is_enabled=True instead of keeping the original functions?
+5. A user's role changes in the middle of a conversation. What does the next turn see, and how would you handle it?
+"""
@@ -0,0 +1,267 @@
+"""
+This example demonstrates how to send only the relevant tools to the model when an agent has 100+ tools.
+
+Recap (see _26_is_enabled_2.py):
+- tools=[get_weather, piaic_student_finder, delete_user_database]: the name, description and JSON schema of EVERY
+  enabled tool is sent to the model on EVERY turn.
+- With 3 tools that does not matter. With 100+ tools it is thousands of input tokens per call: slower, more expensive,
+  and the model picks the wrong tool more often.
+
+Key Concepts:
+- Tool retrieval: before a user turn, rank the tools by how well they match the user's message and give the agent only
+  the top-k tools (agent.clone(tools=...)), plus an always-include list (e.g. escalate_to_human).
+- BM25: a classic, local text ranking function. Each tool is a small "document" (its name, description and parameter
+  names); a query word counts more when it is rare among the tools (IDF) and the score saturates for repeated words.
+  No embeddings model, no network call: ranking 100+ tools takes well under a millisecond.
+- Tokens are words split on non-letters and underscores ("get_weather" -> "get", "weather"), lowercased, with a crude
+  plural/verb-form stripping, plus character trigrams of each word so "forecast"/"forecasts" or typos still overlap.
+- Evaluation harness: recorded tool choices (the user message and the tool the model really called, e.g. taken from
+  your traces) are replayed through the retriever. Recall@k = how often the right tool was among the tools sent.
+  Pick the smallest k whose recall you can accept.
+
+How it works in this code:
+- build_catalog() makes 116 tools (the _26 tools plus a generated catalog of "<action>_<domain>" tools).
+- main() prints recall@k and the tool-definition tokens per k for the recorded choices, then runs one turn with
+  the pruned agent.
+"""
+
+import asyncio
+import json
+import math
+import os
+import re
+import time
+from collections import Counter
+from typing import Any
+from dotenv import load_dotenv, find_dotenv
+from agents import Agent, FunctionTool, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, Tool, function_tool, set_tracing_export_api_key
+from agents.models.chatcmpl_converter import Converter
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+def tokenize(text: str) -> list[str]:
+    words = [w for w in re.split(r"[^a-z0-9]+", text.lower()) if w]
+    terms = []
+    for word in words:
+        for suffix in ("ing", "es", "s", "ed"):
+            if len(word) > len(suffix) + 2 and word.endswith(suffix):
+                word = word[: -len(suffix)]
+                break
+        terms.append(word)
+        terms += [f"#{word[i:i + 3]}" for i in range(len(word) - 2)]  # character trigrams
+    return terms
+
+
+def tool_document(tool: Tool) -> str:
+    parameters = " ".join(getattr(tool, "params_json_schema", {}).get("properties", {}))
+    return f"{tool.name} {tool.name} {getattr(tool, 'description', '')} {parameters}"  # the name counts twice
+
+
+def tool_definition_tokens(tools: list[Tool]) -> int:
+    """About 4 characters per token of the tool definitions sent to the model."""
+    return len(json.dumps([Converter.tool_to_openai(tool) for tool in tools])) // 4
+
+
+class ToolRetriever:
+    """BM25 index over tool names, descriptions and parameter names."""
+
+    def __init__(self, tools: list[Tool], k: int = 5, always_include: tuple[str, ...] = (), k1: float = 1.5, b: float = 0.75):
+        self.tools = tools
+        self.k = k
+        self.always_include = [tool for tool in tools if tool.name in always_include]
+        self.k1 = k1
+        self.b = b
+        self._docs = [Counter(tokenize(tool_document(tool))) for tool in tools]
+        self._lengths = [sum(doc.values()) for doc in self._docs]
+        self._avg_length = sum(self._lengths) / len(self._lengths)
+        document_frequency = Counter(term for doc in self._docs for term in doc)
+        n = len(tools)
+        self._idf = {term: math.log(1 + (n - df + 0.5) / (df + 0.5)) for term, df in document_frequency.items()}
+
+    def scores(self, query: str) -> list[float]:
+        terms = [term for term in set(tokenize(query)) if term in self._idf]
+        result = []
+        for doc, length in zip(self._docs, self._lengths):
+            score = 0.0
+            for term in terms:
+                tf = doc.get(term, 0)
+                if tf:
+                    score += self._idf[term] * tf * (self.k1 + 1) / (tf + self.k1 * (1 - self.b + self.b * length / self._avg_length))
+            result.append(score)
+        return result
+
+    def select(self, query: str, k: int | None = None) -> list[Tool]:
+        scores = self.scores(query)
+        ranked = sorted(range(len(self.tools)), key=lambda i: scores[i], reverse=True)
+        selected = [self.tools[i] for i in ranked[: k or self.k] if scores[i] > 0]
+        return selected + [tool for tool in self.always_include if tool not in selected]
+
+    def agent_for(self, agent: Agent[Any], query: str) -> Agent[Any]:
+        """A clone of the agent with only the tools relevant to this user message."""
+        return agent.clone(tools=self.select(query))
+
+
+def evaluate(retriever: ToolRetriever, recorded: list[dict[str, Any]], ks: tuple[int, ...] = (1, 3, 5, 10)) -> None:
+    """Recall@k of the retriever against recorded tool choices: [{"query": ..., "tool": ...}, ...]."""
+    all_tokens = tool_definition_tokens(retriever.tools)
+    print(f"{'k':>4} {'recall':>8} {'tool tokens/turn':>17} {'vs all tools':>13} {'select us':>10}")
+    for k in ks:
+        hits, tokens, seconds = 0, 0, 0.0
+        for record in recorded:
+            start = time.perf_counter()
+            selected = retriever.select(record["query"], k)
+            seconds += time.perf_counter() - start
+            hits += record["tool"] in {tool.name for tool in selected}
+            tokens += tool_definition_tokens(selected)
+        print(f"{k:>4} {hits / len(recorded):>8.0%} {tokens // len(recorded):>17} {tokens / len(recorded) / all_tokens:>13.0%} "
+              f"{seconds * 1e6 / len(recorded):>10.0f}")
+    misses = [r for r in recorded if r["tool"] not in {t.name for t in retriever.select(r["query"], ks[-1])}]
+    for record in misses:
+        print(f"  missed at k={ks[-1]}: {record['query']!r} -> {record['tool']}")
+
+
+@function_tool("get_weather")
+def get_weather(location: str, unit: str) -> str:
+    """Fetch the weather for a given location, returning a short description."""
+    return f"The weather in {location} is 22 degrees {unit}."
+
+
+@function_tool("piaic_student_finder")
+def piaic_student_finder(student_roll: int) -> str:
+    """Find the PIAIC student based on the roll number."""
+    data = {1: "Ammar", 2: "Azeem", 3: "Zain"}
+    return data.get(student_roll, "Not Found")
+
+
+@function_tool
+def delete_user_database() -> str:
+    """[ADMIN ONLY] Deletes the entire user database."""
+    return "Database has been deleted."
+
+
+@function_tool
+def escalate_to_human(reason: str) -> str:
+    """Hand the conversation to a human support agent when no other tool can help."""
+    return "A human agent will contact you shortly."
+
+
+ACTIONS = {
+    "get": "Get the details of one {d} by its id",
+    "list": "List the {d}s of the current user, newest first",
+    "create": "Create a new {d}",
+    "update": "Change the fields of an existing {d}",
+    "delete": "Delete a {d} permanently",
+    "search": "Search {d}s by free text",
+    "cancel": "Cancel a {d} that is still open",
+    "export": "Export {d}s to a CSV file",
+}
+DOMAINS = {
+    "invoice": "invoice (bill) sent to a customer",
+    "flight": "flight booking (airline ticket)",
+    "hotel": "hotel room reservation",
+    "calendar_event": "calendar event or meeting",
+    "email": "email message in the mailbox",
+    "order": "shop order of products",
+    "payment": "card payment or refund",
+    "support_ticket": "customer support ticket (complaint)",
+    "course": "PIAIC course and its schedule",
+    "assignment": "course assignment and its due date",
+    "subscription": "monthly subscription plan",
+    "shipment": "parcel shipment and its tracking",
+    "contact": "address book contact (phone number)",
+    "document": "shared document or file",
+}
+
+
+def generated_tool(action: str, domain: str) -> FunctionTool:
+    description = ACTIONS[action].format(d=domain.replace("_", " ")) + f". A {domain.replace('_', ' ')} is a {DOMAINS[domain]}."
+
+    async def invoke(ctx: Any, arguments: str) -> str:
+        return f"{action}_{domain} called with {arguments}"
+
+    return FunctionTool(
+        name=f"{action}_{domain}",
+        description=description,
+        params_json_schema={
+            "type": "object",
+            "properties": {"id": {"type": "string"}, "query": {"type": "string"}},
+            "required": ["id", "query"],
+            "additionalProperties": False,
+        },
+        on_invoke_tool=invoke,
+    )
+
+
+def build_catalog() -> list[Tool]:
+    generated = [generated_tool(action, domain) for domain in DOMAINS for action in ACTIONS]
+    return [get_weather, piaic_student_finder, delete_user_database, escalate_to_human, *generated]
+
+
+# Tool choices recorded from real conversations: what the user said, and the tool the model called
+RECORDED_CHOICES = [
+    {"query": "what is the weather in Islamabad in celsius?", "tool": "get_weather"},
+    {"query": "will it rain in Lahore tomorrow", "tool": "get_weather"},
+    {"query": "who is student with roll number 2?", "tool": "piaic_student_finder"},
+    {"query": "wipe the whole user database", "tool": "delete_user_database"},
+    {"query": "cancel my flight to Dubai", "tool": "cancel_flight"},
+    {"query": "book a hotel room in Karachi for two nights", "tool": "create_hotel"},
+    {"query": "show me my last invoices", "tool": "list_invoice"},
+    {"query": "I want a refund for my card payment", "tool": "cancel_payment"},
+    {"query": "where is my parcel? tracking please", "tool": "get_shipment"},
+    {"query": "schedule a meeting with Ali on Monday", "tool": "create_calendar_event"},
+    {"query": "when is the assignment due for the agents course", "tool": "get_assignment"},
+    {"query": "find the email from the bank about my statement", "tool": "search_email"},
+    {"query": "change the delivery address of my order 42", "tool": "update_order"},
+    {"query": "export all support tickets to csv", "tool": "export_support_ticket"},
+    {"query": "what is Azeem's phone number", "tool": "search_contact"},
+    {"query": "stop my monthly subscription", "tool": "cancel_subscription"},
+    {"query": "I have a complaint about the last delivery", "tool": "create_support_ticket"},
+    {"query": "delete the shared file budget.xlsx", "tool": "delete_document"},
+    {"query": "list the PIAIC courses I am enrolled in", "tool": "list_course"},
+    {"query": "nothing works, let me talk to a person", "tool": "escalate_to_human"},
+]
+
+
+async def main():
+    catalog = build_catalog()
+    retriever = ToolRetriever(catalog, k=5, always_include=("escalate_to_human",))
+    print(f"{len(catalog)} tools, {tool_definition_tokens(catalog)} tokens of tool definitions per turn without retrieval\n")
+    evaluate(retriever, RECORDED_CHOICES)
+
+    # One turn with the pruned agent: the model only sees the top-5 tools (+ escalate_to_human)
+    agent = Agent(name="assistant", instructions="You are a helpful assistant. Use the tools.", tools=catalog, model=model)
+    query = "cancel my flight to Dubai (cancel_flight)"
+    pruned = retriever.agent_for(agent, query)
+    result = await Runner.run(pruned, query)
+    print(f"\nsent tools: {[tool.name for tool in pruned.tools]}")
+    print(f"answer: {str(result.final_output)[:70]!r}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why does a rare word like "flight" count more than a common word like "get" when ranking the tools?
+2. A user writes "I want my money back". Which tool should be chosen, and why might BM25 miss it?
+3. Why is escalate_to_human always included, whatever the query says?
+4. The retriever selects tools once per user turn. What can go wrong when the model needs a different tool in a
+   later step of the same run?
+5. How would you collect the recorded tool choices for the evaluation from your traces?
+"""
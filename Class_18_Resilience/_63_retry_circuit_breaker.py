@@ -0,0 +1,403 @@
+"""
+This example demonstrates a resilience layer for model and tool calls: jittered exponential backoff, a retry budget
+and circuit breakers with half-open probing.
+
+Recap (see _27_errors.py):
+- divide catches ZeroDivisionError itself, and the SDK turns any other tool exception into an error message for the
+  model. That is about BAD INPUT: trying again gives the same error.
+- Transient errors are different: a 429 (rate limit), a 5xx or a timeout from the provider may succeed a moment later.
+  Today one such error from OpenAIChatCompletionsModel fails the whole run.
+
+Key Concepts:
+- is_transient(error): only 408/409/429/5xx, timeouts and connection errors are retried. A 400 is not.
+- RetryPolicy: exponential backoff with FULL jitter, delay = random(0, min(max_delay, base_delay * 2**attempt)).
+  The jitter spreads the retries of many clients over time, so they do not all hit the provider again at once.
+  A Retry-After header from the provider is respected.
+- RetryBudget(ratio=0.2, max_tokens=burst): every call adds 0.2 retry tokens, every retry spends one. Retries can add
+  at most ~20% extra load (plus a small burst). During a big outage the budget runs dry and calls fail fast, instead
+  of multiplying the load (retry storm).
+- CircuitBreaker per provider and per tool:
+  - closed: calls go through; failure_threshold consecutive transient failures -> open.
+  - open: calls are rejected at once (CircuitOpenError), without touching the provider.
+  - half_open: after recovery_seconds ONE probe call is let through. Success -> closed, failure -> open again.
+    A cancelled probe gives no answer: the next call becomes the probe.
+  - allow() returns a ticket (the breaker's generation) or None. A result only counts when its ticket is still the
+    current generation: a slow call admitted while the breaker was closed cannot close it again after it opened.
+    Only the half-open probe closes an open breaker.
+- Resilience is the shared layer: resilience.call(name, fn) applies the policy, and the budget and breaker of `name`.
+  snapshot() exposes the state and metrics of every breaker (attempts, retries, failures, rejected, ...).
+- ResilientModel(model, "gemini", resilience) wraps any Model (get_response and stream_response), so the agents do not
+  change. @resilient(resilience, "tool_name") wraps a tool function; when its breaker is open, the model gets a short
+  "unavailable" message instead of waiting for a dead service.
+
+Important Note:
+- The openai client retries by itself (max_retries=2 by default). Set max_retries=0 when this layer owns the retries,
+  otherwise every retry of the layer becomes up to 3 HTTP requests.
+- A stream is only retried until its first event. After that the caller already has part of the answer.
+- Size retry_burst to the number of calls that can fail at the same moment (here: 40 concurrent runs). The budget
+  refills by only `ratio` per call, so a burst smaller than the concurrency runs dry during a partial outage and
+  calls fail that one more retry would have saved (with retry_burst=20 this demo completed 34/40 runs instead of
+  39/40). That is the trade-off: a small burst protects the provider, a large one protects the success rate.
+
+How it works in this code:
+- main() starts a local stand-in (Local_LLM_Server/local_llm_server.py) on port 8002 and changes its fault rate with
+  POST /admin/faults: a partial outage (30% 503), a full outage, and a recovery. For each, it compares no retries,
+  the client's own retries and the resilience layer: successful runs and HTTP requests the provider received.
+- The get_exchange_rate tool shows a tool breaker opening while its service is down, and closing again.
+"""
+
+import asyncio
+import functools
+import inspect
+import os
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable
+import httpx
+import openai
+from dotenv import load_dotenv, find_dotenv
+from agents import Agent, AgentsException, Model, Runner, RunConfig, AsyncOpenAI, OpenAIChatCompletionsModel, function_tool, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+    max_retries=0,  # the resilience layer owns the retries
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+TRANSIENT_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+class TransientToolError(Exception):
+    """Raised by a tool when its service failed in a way that may work on a retry."""
+
+
+class CircuitOpenError(AgentsException):
+    def __init__(self, name: str):
+        super().__init__(f"Circuit '{name}' is open: call rejected without trying")
+        self.name = name
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, TimeoutError, ConnectionError, TransientToolError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in TRANSIENT_STATUS
+
+
+def retry_after(error: BaseException) -> float | None:
+    response = getattr(error, "response", None)
+    try:
+        return float(response.headers["retry-after"]) if response is not None else None
+    except (KeyError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    max_attempts: int = 4
+    base_delay: float = 0.1
+    max_delay: float = 5.0
+
+    def delay(self, attempt: int, error: BaseException | None = None) -> float:
+        """Full jitter: anywhere between 0 and the exponential backoff of this attempt."""
+        backoff = random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+        return max(backoff, retry_after(error) or 0.0) if error is not None else backoff
+
+
+class RetryBudget:
+    """Retries may add at most `ratio` extra calls: each call deposits `ratio` tokens, each retry spends one."""
+
+    def __init__(self, ratio: float = 0.2, max_tokens: float = 10.0):
+        self.ratio = ratio
+        self.max_tokens = max_tokens
+        self.tokens = max_tokens
+
+    def deposit(self) -> None:
+        self.tokens = min(self.max_tokens, self.tokens + self.ratio)
+
+    def try_spend(self) -> bool:
+        if self.tokens < 1.0:
+            return False
+        self.tokens -= 1.0
+        return True
+
+
+class CircuitBreaker:
+    CLOSED, OPEN, HALF_OPEN = "closed", "open", "half_open"
+
+    def __init__(self, name: str, failure_threshold: int = 5, recovery_seconds: float = 2.0):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.state = self.CLOSED
+        self.failures = 0
+        self.opened_at = 0.0
+        self.generation = 0  # bumped on every state change
+        self._probe_in_flight = False
+        self.transitions: list[str] = []
+
+    def allow(self) -> int | None:
+        """A ticket for one call, or None if the call is rejected."""
+        if self.state == self.OPEN and time.monotonic() - self.opened_at >= self.recovery_seconds:
+            self._move(self.HALF_OPEN)
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                return None
+            self._probe_in_flight = True  # exactly one probe
+        return None if self.state == self.OPEN else self.generation
+
+    def record_success(self, ticket: int) -> None:
+        if ticket != self.generation:
+            return  # admitted before the last state change: says nothing about the current state
+        self.failures = 0
+        self._probe_in_flight = False
+        if self.state != self.CLOSED:
+            self._move(self.CLOSED)
+
+    def release_probe(self, ticket: int) -> None:
+        """The call ended without an answer (e.g. it was cancelled): let the next call probe instead."""
+        if ticket == self.generation:
+            self._probe_in_flight = False
+
+    def record_failure(self, ticket: int) -> None:
+        if ticket != self.generation:
+            return
+        self.failures += 1
+        self._probe_in_flight = False
+        if self.state == self.HALF_OPEN or (self.state == self.CLOSED and self.failures >= self.failure_threshold):
+            self.opened_at = time.monotonic()
+            self._move(self.OPEN)
+
+    def _move(self, state: str) -> None:
+        self.transitions.append(f"{self.state}->{state}")
+        self.state = state
+        self.generation += 1
+
+
+class Resilience:
+    """One retry policy, and one retry budget and circuit breaker per provider or tool name."""
+
+    def __init__(self, policy: RetryPolicy | None = None, retry_ratio: float = 0.2, retry_burst: float = 10.0,
+                 failure_threshold: int = 5, recovery_seconds: float = 2.0):
+        self.policy = policy or RetryPolicy()
+        self.retry_ratio = retry_ratio
+        self.retry_burst = retry_burst
+        self.failure_threshold = failure_threshold
+        self.recovery_seconds = recovery_seconds
+        self.breakers: dict[str, CircuitBreaker] = {}
+        self.budgets: dict[str, RetryBudget] = {}
+        self.stats: dict[str, Counter[str]] = {}
+
+    def breaker(self, name: str) -> CircuitBreaker:
+        if name not in self.breakers:
+            self.breakers[name] = CircuitBreaker(name, self.failure_threshold, self.recovery_seconds)
+            self.budgets[name] = RetryBudget(self.retry_ratio, self.retry_burst)
+            self.stats[name] = Counter()
+        return self.breakers[name]
+
+    async def call(self, name: str, fn: Callable[[], Awaitable[Any]]) -> Any:
+        breaker = self.breaker(name)
+        budget = self.budgets[name]
+        stats = self.stats[name]
+        stats["calls"] += 1
+        budget.deposit()
+        last_error: BaseException | None = None
+        for attempt in range(self.policy.max_attempts):
+            ticket = breaker.allow()
+            if ticket is None:
+                if last_error is not None:
+                    raise last_error  # a retry was not let through: the caller gets the real provider error
+                stats["rejected"] += 1
+                raise CircuitOpenError(name)
+            stats["attempts"] += 1
+            try:
+                result = await fn()
+            except Exception as e:
+                if not is_transient(e):
+                    breaker.record_success(ticket)  # the provider answered; the request itself was bad
+                    raise
+                breaker.record_failure(ticket)
+                stats["transient_failures"] += 1
+                last_error = e
+                if attempt + 1 == self.policy.max_attempts:
+                    raise
+                if breaker.state == breaker.OPEN:
+                    raise  # this failure opened the breaker: no retry, and no retry token spent
+                if not budget.try_spend():
+                    stats["budget_exhausted"] += 1
+                    raise
+                stats["retries"] += 1
+                await asyncio.sleep(self.policy.delay(attempt, e))
+            except BaseException:
+                breaker.release_probe(ticket)  # cancelled: no answer about the provider's health
+                raise
+            else:
+                breaker.record_success(ticket)
+                stats["succeeded"] += 1
+                return result
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {name: {"state": breaker.state, **self.stats[name]} for name, breaker in self.breakers.items()}
+
+
+class ResilientModel(Model):
+    """Any Model, with the retries and the circuit breaker of its provider."""
+
+    def __init__(self, model: Model, provider: str, resilience: Resilience):
+        self.model = model
+        self.provider = provider
+        self.resilience = resilience
+
+    async def get_response(self, *args: Any, **kwargs: Any):
+        return await self.resilience.call(self.provider, lambda: self.model.get_response(*args, **kwargs))
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        stream: AsyncIterator[Any] | None = None
+
+        async def first_event() -> Any:
+            nonlocal stream
+            stream = self.model.stream_response(*args, **kwargs)
+            return await anext(stream)
+
+        # Retried until the first event; after that the caller already has part of the answer
+        yield await self.resilience.call(self.provider, first_event)
+        async for event in stream:
+            yield event
+
+
+def resilient(resilience: Resilience, name: str):
+    """Decorator for a tool function: retries, budget and a breaker per tool. Use it below @function_tool."""
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            async def attempt() -> Any:
+                result = fn(*args, **kwargs)
+                return await result if inspect.isawaitable(result) else result
+
+            try:
+                return await resilience.call(f"tool:{name}", attempt)
+            except CircuitOpenError:
+                return f"{name} is unavailable right now. Answer without it, or ask the user to try again later."
+
+        return wrapper
+
+    return decorator
+
+
+resilience = Resilience(RetryPolicy(max_attempts=4, base_delay=0.05, max_delay=1.0), retry_ratio=0.2, retry_burst=40,
+                        failure_threshold=5, recovery_seconds=1.0)
+
+rates_service_up = True
+
+
+@function_tool
+@resilient(resilience, "get_exchange_rate")
+async def get_exchange_rate(currency: str) -> str:
+    """Get today's exchange rate of a currency to PKR."""
+    if not rates_service_up:
+        raise TransientToolError("rates service returned 503")
+    return f"1 {currency[:10]} = 280 PKR"
+
+
+STAND_IN_URL = "http://127.0.0.1:8002"
+
+
+async def set_faults(fault_rate: float) -> None:
+    async with httpx.AsyncClient() as client:
+        await client.post(f"{STAND_IN_URL}/admin/faults", json={"fault_rate": fault_rate, "fault_status": 503})
+
+
+async def server_requests() -> int:
+    async with httpx.AsyncClient() as client:
+        return (await client.get(f"{STAND_IN_URL}/health")).json()["requests"]
+
+
+async def load(agent: Agent, runs: int = 40) -> tuple[int, int, float]:
+    """Run `runs` concurrent requests; returns (succeeded, HTTP requests the provider received, wall seconds)."""
+    before, start = await server_requests(), time.perf_counter()
+    results = await asyncio.gather(*(Runner.run(agent, "Hello!", run_config=RunConfig(tracing_disabled=True))
+                                     for _ in range(runs)), return_exceptions=True)
+    succeeded = sum(not isinstance(result, BaseException) for result in results)
+    return succeeded, await server_requests() - before, time.perf_counter() - start
+
+
+async def main():
+    server_path = Path(__file__).resolve().parent.parent / "Local_LLM_Server" / "local_llm_server.py"
+    stand_in = subprocess.Popen([sys.executable, str(server_path), "--port", "8002", "--ttft-ms", "20", "--seed", "7"],
+                                stdout=subprocess.DEVNULL)
+    await asyncio.sleep(1.0)
+    try:
+        def agent_with(max_retries: int, wrap: bool) -> Agent:
+            client = AsyncOpenAI(api_key="local", base_url=f"{STAND_IN_URL}/v1/", max_retries=max_retries)
+            local_model: Model = OpenAIChatCompletionsModel(model="local-model", openai_client=client)
+            if wrap:
+                local_model = ResilientModel(local_model, "stand_in", resilience)
+            return Agent(name="assistant", instructions="You are a helpful assistant.", model=local_model)
+
+        strategies = {
+            "no retries": agent_with(0, wrap=False),
+            "client retries (3)": agent_with(3, wrap=False),
+            "resilience layer": agent_with(0, wrap=True),
+        }
+        print(f"{'outage':18} {'strategy':20} {'ok':>6} {'HTTP requests':>14} {'wall':>7}")
+        for outage, fault_rate in (("partial (30% 503)", 0.3), ("full (100% 503)", 1.0)):
+            await set_faults(fault_rate)
+            for label, agent in strategies.items():
+                ok, requests, wall = await load(agent)
+                print(f"{outage:18} {label:20} {ok:>3}/40 {requests:>14} {wall:>6.2f}s")
+
+        # Recovery: the open breaker rejects at once, then one half-open probe closes it again
+        breaker = resilience.breaker("stand_in")
+        print(f"\nprovider breaker during the outage: {breaker.state}, {resilience.snapshot()['stand_in']}")
+        await set_faults(0.0)
+        ok, requests, _ = await load(strategies["resilience layer"], runs=5)
+        print(f"right after the outage ended: {ok}/5 ok, {requests} HTTP requests (still open, fail fast)")
+        await asyncio.sleep(resilience.recovery_seconds)
+        for i in range(5):  # one at a time: the first run is the half-open probe
+            await Runner.run(strategies["resilience layer"], "Hello!", run_config=RunConfig(tracing_disabled=True))
+            print(f"after recovery_seconds, run {i + 1}: ok, breaker {breaker.state}")
+        print(f"provider breaker transitions: {breaker.transitions}")
+
+        # Tool breaker: the rates service goes down, the tool fails fast, then recovers
+        global rates_service_up
+        tool_agent = strategies["resilience layer"].clone(tools=[get_exchange_rate])
+        for service_up in (False, False, False, True):
+            rates_service_up = service_up
+            if service_up:
+                await asyncio.sleep(resilience.recovery_seconds)
+            result = await Runner.run(tool_agent, "use get_exchange_rate for USD", run_config=RunConfig(tracing_disabled=True))
+            print(f"\nrates service up={service_up}: {str(result.final_output)[:90]!r}")
+        print(f"tool breaker: {resilience.snapshot()['tool:get_exchange_rate']}, transitions {resilience.breaker('tool:get_exchange_rate').transitions}")
+    finally:
+        stand_in.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why is a 429 retried but a 400 is not? What would retrying a 400 cost?
+2. Why does full jitter help more than a fixed delay when 1000 clients see the same 503 at the same moment?
+3. During the full outage, why did the resilience layer send far fewer HTTP requests than the client's own retries?
+   In the partial outage, why can it still lose a few runs that the client's own retries complete?
+4. Why does the half-open state let only ONE probe call through?
+5. A tool's breaker is open. Is it better to return a message to the model or to fail the whole run? When would you choose each?
+"""
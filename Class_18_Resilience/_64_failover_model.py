@@ -0,0 +1,296 @@
+"""
+This example demonstrates a failover Model: an ordered list of OpenAI-compatible providers, health checks, failover
+within one request and automatic failback.
+
+Recap (see _63_retry_circuit_breaker.py and _06_global_level.py):
+- Every lesson uses ONE AsyncOpenAI client pointed at Gemini. Retries and a circuit breaker help against short,
+  partial faults, but when that provider is down, every run fails (or fails fast).
+- An Agent only needs something that implements the Model interface (get_response / stream_response).
+
+Key Concepts:
+- Provider(name, client, model_name): one OpenAI-compatible endpoint and model, e.g. Gemini first, then another
+  provider or a self-hosted model as backup.
+- FailoverModel([primary, backup, ...]) is a Model. For every LLM call it tries the healthy providers in order.
+  A transient error (429, 5xx, timeout, connection error) moves THIS call on to the next provider at once, so the
+  run does not fail and does not wait. Non-transient errors (e.g. 400) are raised: another provider would not help.
+- Health: failure_threshold consecutive failures mark a provider unhealthy; later calls skip it (no time lost on a
+  provider that is down). If all providers are unhealthy, they are still tried in order as a last resort.
+- Continuous health checks: a background task probes every unhealthy provider (and healthy ones without recent
+  traffic) with a tiny request every check_interval seconds. A successful probe marks it healthy again, and because
+  routing always prefers the first healthy provider, traffic fails back to the primary automatically.
+  The health task starts with the first call (or with `async with FailoverModel(...)`, which also stops it on exit),
+  so failback also works for Agent(model=FailoverModel(...)) without a context manager.
+  A probe that fails with a non-transient error (e.g. 401) is counted in stats["probe_errors"] and in the events.
+- Streaming fails over until the first event; after that the caller already has part of the answer.
+- Metrics per provider (served, failures, probes, latency) and a list of health events.
+
+Important Note:
+- Use max_retries=0 on the provider clients: failing over is faster than retrying a provider that is down.
+- Probes cost a request each (max_tokens=1). Keep check_interval in seconds, not milliseconds.
+- The providers may answer differently (other model). Test your agents and output types with every provider.
+
+How it works in this code:
+- main() starts two local stand-ins (Local_LLM_Server/local_llm_server.py) on ports 8003 ("primary") and 8004
+  ("backup"), then runs traffic while the primary is healthy, while it injects faults (POST /admin/faults), and after
+  it recovered, and prints which provider served the calls.
+"""
+
+import asyncio
+import os
+import subprocess
+import sys
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, AsyncIterator
+import httpx
+import openai
+from dotenv import load_dotenv, find_dotenv
+from agents import Agent, Model, Runner, RunConfig, AsyncOpenAI, OpenAIChatCompletionsModel, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+    max_retries=0,  # fail over instead of retrying
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+TRANSIENT_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_transient(error: BaseException) -> bool:
+    if isinstance(error, (openai.APITimeoutError, openai.APIConnectionError, TimeoutError, ConnectionError)):
+        return True
+    return isinstance(error, openai.APIStatusError) and error.status_code in TRANSIENT_STATUS
+
+
+@dataclass
+class Provider:
+    name: str
+    client: AsyncOpenAI
+    model_name: str
+    healthy: bool = True
+    consecutive_failures: int = 0
+    last_seen: float = 0.0  # time.monotonic() of the last call or probe
+    latency_ewma: float | None = None
+    stats: Counter[str] = field(default_factory=Counter)
+
+    def __post_init__(self):
+        self.model = OpenAIChatCompletionsModel(model=self.model_name, openai_client=self.client)
+
+
+class FailoverModel(Model):
+    """Tries healthy providers in order; fails over within a call and fails back after a successful probe."""
+
+    def __init__(self, providers: list[Provider], failure_threshold: int = 2, check_interval: float = 1.0,
+                 probe_timeout: float = 5.0, alpha: float = 0.2):
+        if not providers:
+            raise ValueError("FailoverModel needs at least one provider")
+        self.providers = providers
+        self.failure_threshold = failure_threshold
+        self.check_interval = check_interval
+        self.probe_timeout = probe_timeout
+        self.alpha = alpha
+        self.stats: Counter[str] = Counter()
+        self.events: list[str] = []
+        self._started = time.monotonic()
+        self._health_task: asyncio.Task | None = None
+
+    async def __aenter__(self) -> "FailoverModel":
+        self._ensure_health_task()
+        return self
+
+    async def __aexit__(self, *exc: Any) -> None:
+        if self._health_task is not None:
+            self._health_task.cancel()
+            self._health_task = None
+
+    def _ensure_health_task(self) -> None:
+        # Started on first use, so the model also fails back when it is not used with `async with`
+        if self._health_task is None or self._health_task.done():
+            self._health_task = asyncio.create_task(self._health_loop())
+
+    def route(self) -> list[Provider]:
+        """Healthy providers in order, then the unhealthy ones as a last resort."""
+        return [p for p in self.providers if p.healthy] + [p for p in self.providers if not p.healthy]
+
+    def _event(self, message: str) -> None:
+        self.events.append(f"{time.monotonic() - self._started:6.2f}s {message}")
+
+    def _record(self, provider: Provider, ok: bool, seconds: float | None = None) -> None:
+        provider.last_seen = time.monotonic()
+        if ok:
+            provider.consecutive_failures = 0
+            if seconds is not None:
+                ewma = provider.latency_ewma
+                provider.latency_ewma = seconds if ewma is None else self.alpha * seconds + (1 - self.alpha) * ewma
+            if not provider.healthy:
+                provider.healthy = True
+                self._event(f"{provider.name} healthy again")
+        else:
+            provider.consecutive_failures += 1
+            provider.stats["failures"] += 1
+            if provider.healthy and provider.consecutive_failures >= self.failure_threshold:
+                provider.healthy = False
+                self._event(f"{provider.name} unhealthy after {provider.consecutive_failures} failures")
+
+    async def get_response(self, *args: Any, **kwargs: Any):
+        self._ensure_health_task()
+        last_error: BaseException | None = None
+        for attempt, provider in enumerate(self.route()):
+            if attempt:
+                self.stats["failovers"] += 1
+            start = time.monotonic()
+            try:
+                response = await provider.model.get_response(*args, **kwargs)
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                self._record(provider, ok=False)
+                last_error = e
+                continue
+            self._record(provider, ok=True, seconds=time.monotonic() - start)
+            provider.stats["served"] += 1
+            return response
+        self.stats["all_providers_failed"] += 1
+        raise last_error
+
+    async def stream_response(self, *args: Any, **kwargs: Any) -> AsyncIterator[Any]:
+        self._ensure_health_task()
+        last_error: BaseException | None = None
+        for attempt, provider in enumerate(self.route()):
+            if attempt:
+                self.stats["failovers"] += 1
+            start = time.monotonic()
+            stream = provider.model.stream_response(*args, **kwargs)
+            try:
+                first = await anext(stream)
+            except Exception as e:
+                if not is_transient(e):
+                    raise
+                self._record(provider, ok=False)
+                last_error = e
+                continue
+            self._record(provider, ok=True, seconds=time.monotonic() - start)
+            provider.stats["served"] += 1
+            # Failover only until the first event; after that the caller already has part of the answer
+            yield first
+            async for event in stream:
+                yield event
+            return
+        self.stats["all_providers_failed"] += 1
+        raise last_error
+
+    async def probe(self, provider: Provider) -> bool:
+        provider.stats["probes"] += 1
+        try:
+            await asyncio.wait_for(provider.client.chat.completions.create(
+                model=provider.model_name, messages=[{"role": "user", "content": "ping"}], max_tokens=1,
+            ), self.probe_timeout)
+        except Exception as e:
+            if not is_transient(e):
+                # Not a health signal (e.g. a bad API key), but it must not disappear silently
+                self.stats["probe_errors"] += 1
+                provider.stats["probe_errors"] += 1
+                self._event(f"{provider.name} probe failed: {type(e).__name__}")
+                return False
+            self._record(provider, ok=False)
+            return False
+        self._record(provider, ok=True)
+        return True
+
+    async def _health_loop(self) -> None:
+        while True:
+            await asyncio.sleep(self.check_interval)
+            now = time.monotonic()
+            due = [p for p in self.providers if not p.healthy or now - p.last_seen >= self.check_interval]
+            await asyncio.gather(*(self.probe(p) for p in due), return_exceptions=True)
+
+    def snapshot(self) -> dict[str, dict[str, Any]]:
+        return {p.name: {"healthy": p.healthy, "latency_ms": round((p.latency_ewma or 0) * 1000, 1), **p.stats}
+                for p in self.providers}
+
+
+PORTS = {"primary": 8003, "backup": 8004}
+
+
+async def set_faults(port: int, fault_rate: float) -> None:
+    async with httpx.AsyncClient() as client:
+        await client.post(f"http://127.0.0.1:{port}/admin/faults", json={"fault_rate": fault_rate, "fault_status": 503})
+
+
+async def server_requests() -> dict[str, int]:
+    async with httpx.AsyncClient() as client:
+        return {name: (await client.get(f"http://127.0.0.1:{port}/health")).json()["requests"] for name, port in PORTS.items()}
+
+
+async def traffic(agent: Agent, label: str, runs: int = 20) -> None:
+    before = await server_requests()
+    served_before = {name: stats.get("served", 0) for name, stats in agent.model.snapshot().items()}
+    ok = 0
+    for _ in range(runs):  # one after another, like steady user traffic
+        try:
+            await Runner.run(agent, "Hello!", run_config=RunConfig(tracing_disabled=True))
+            ok += 1
+        except Exception:
+            pass
+    after = await server_requests()
+    served = {name: stats.get("served", 0) - served_before[name] for name, stats in agent.model.snapshot().items()}
+    requests = {name: after[name] - before[name] for name in PORTS}
+    print(f"{label:28} ok {ok:>2}/{runs}  served by {served}  HTTP requests {requests}")
+
+
+async def main():
+    server_path = Path(__file__).resolve().parent.parent / "Local_LLM_Server" / "local_llm_server.py"
+    stand_ins = [subprocess.Popen([sys.executable, str(server_path), "--port", str(port), "--ttft-ms", "20"], stdout=subprocess.DEVNULL)
+                 for port in PORTS.values()]
+    await asyncio.sleep(1.0)
+    try:
+        providers = [Provider(name, AsyncOpenAI(api_key="local", base_url=f"http://127.0.0.1:{port}/v1/", max_retries=0), "local-model")
+                     for name, port in PORTS.items()]
+        async with FailoverModel(providers, failure_threshold=2, check_interval=0.5) as failover_model:
+            agent = Agent(name="assistant", instructions="You are a helpful assistant.", model=failover_model)
+
+            await traffic(agent, "primary healthy")
+            await set_faults(PORTS["primary"], 1.0)
+            await traffic(agent, "primary down (100% 503)")
+            await set_faults(PORTS["primary"], 0.3)
+            await traffic(agent, "primary flaky (30% 503)")
+            await set_faults(PORTS["primary"], 0.0)
+            await asyncio.sleep(1.5)  # the health checks notice the recovery
+            await traffic(agent, "primary recovered")
+
+            print(f"\nfailovers within a request: {failover_model.stats['failovers']}, "
+                  f"requests that failed on all providers: {failover_model.stats['all_providers_failed']}")
+            print(f"providers: {failover_model.snapshot()}")
+            print("health events:")
+            for event in failover_model.events:
+                print(f"  {event}")
+    finally:
+        for stand_in in stand_ins:
+            stand_in.terminate()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why does a 503 move the call to the backup provider, but a 400 is raised to the caller?
+2. The primary is unhealthy. Why is it still tried when the backup fails as well?
+3. How does traffic get back to the primary after an outage, without any code calling "fail back"?
+4. Why is a stream only failed over before its first event?
+5. Your backup is a different model than the primary. What could break in agents with an output_type or tools?
+"""
@@ -0,0 +1,222 @@
+"""
+This example demonstrates a fast validation path for structured output types: schemas and validators built once
+per type and reused on every turn and every run.
+
+Recap (see _28_structured_output_1.py, _29_structured_output_2.py, _37_input_guardrail.py and _38_output_guradrail.py):
+- output_type=WeatherAnswer / MeetingMinutes / ProductGuardrailOutput / AIOutput: the model answers with JSON and the
+  SDK validates it into the pydantic model.
+- With output_type=SomeModel the SDK builds a NEW AgentOutputSchema(SomeModel) at the start of the run and again on
+  every turn: a new pydantic TypeAdapter, the JSON schema, and its strict version. A run with one tool call builds it
+  3 times. For a nested model like MeetingMinutes, building costs more CPU than validating a 30 KB answer.
+- Guardrail agents run on every request, so their output types are validated (and their schemas built) at the full
+  request rate.
+
+Key Concepts:
+- Agent(output_type=...) also accepts an AgentOutputSchemaBase object. The SDK then uses that object as it is, on every
+  turn and every run.
+- output_schema(MeetingMinutes) returns ONE FastOutputSchema per (type, strict) pair, built the first time it is asked
+  for: the TypeAdapter (the compiled pydantic-core validator) and the strict JSON schema are reused from then on.
+- schema_json: the strict schema pre-serialized once (compact, sorted keys). Use it for logs, cache keys or to compare
+  schema versions, instead of json.dumps(...) per request.
+- validate_json(...) validates the JSON text (str or bytes) in one step with the cached TypeAdapter. The SDK's own
+  AgentOutputSchema.validate_json also validates in one step (type_adapter.validate_json), so reusing the schema is
+  the whole win: validation itself is the same work.
+- A validation error is recorded on the current trace span and raised as ModelBehaviorError, like the SDK does. The
+  SDK's message contains the whole raw JSON answer; this one has the error count, the first error and only the first
+  200 characters of the JSON.
+
+Important Note:
+- The benchmark shows str and bytes input cost the same: pydantic-core parses both directly. The difference between
+  the "SDK per turn" and "cached" columns is only the schema that is no longer rebuilt.
+- Microbenchmark numbers depend on the machine; compare the columns, not the absolute values.
+
+How it works in this code:
+- main() benchmarks the four lesson output types and MeetingMinutes with 10, 100 and 1000 action items, then runs the
+  guardrail and meeting agents several times with the cached schemas and shows that each schema was built once.
+"""
+
+import asyncio
+import json
+import os
+import timeit
+from collections import Counter
+from typing import Any, List, Optional
+from dotenv import load_dotenv, find_dotenv
+from pydantic import BaseModel, ValidationError
+from agents import Agent, AgentOutputSchema, ModelBehaviorError, Runner, AsyncOpenAI, OpenAIChatCompletionsModel, SpanError, get_current_span, set_tracing_export_api_key
+
+_: bool = load_dotenv(find_dotenv())
+
+set_tracing_export_api_key(os.getenv("OPENAI_API_KEY", ""))
+
+gemini_api_key: str = os.getenv("GEMINI_API_KEY", "")
+
+# Set LOCAL_LLM_BASE_URL (e.g. http://127.0.0.1:8001/v1/) to use the local stand-in instead of Gemini
+external_client: AsyncOpenAI = AsyncOpenAI(
+    api_key=gemini_api_key or "local",
+    base_url=os.getenv("LOCAL_LLM_BASE_URL", "https://generativelanguage.googleapis.com/v1beta/openai/"),
+)
+
+model: OpenAIChatCompletionsModel = OpenAIChatCompletionsModel(
+    model="gemini-2.0-flash",
+    openai_client=external_client
+)
+
+
+class FastOutputSchema(AgentOutputSchema):
+    """AgentOutputSchema with a pre-serialized schema and single-step JSON validation. Get it from output_schema()."""
+
+    builds: Counter[str] = Counter()  # how often a schema was built, per type name
+
+    def __init__(self, output_type: type[Any], strict_json_schema: bool = True):
+        super().__init__(output_type, strict_json_schema)
+        FastOutputSchema.builds[self.name()] += 1
+        self.schema_json: bytes = json.dumps(self._output_schema, separators=(",", ":"), sort_keys=True).encode()
+
+    def validate_json(self, json_str: str | bytes) -> Any:
+        if self._is_wrapped:
+            return super().validate_json(json_str if isinstance(json_str, str) else json_str.decode())
+        try:
+            return self._type_adapter.validate_json(json_str)
+        except ValidationError as e:
+            span = get_current_span()
+            if span is not None:  # the same span error the SDK attaches
+                span.set_error(SpanError(message="Invalid JSON provided", data={}))
+            excerpt = json_str[:200] if isinstance(json_str, str) else json_str[:200].decode(errors="replace")
+            raise ModelBehaviorError(f"Invalid JSON for {self.name()}: {e.error_count()} error(s), first: {e.errors()[0]['msg']}; "
+                                     f"JSON starts with: {excerpt}") from e
+
+
+_schemas: dict[tuple[Any, bool], FastOutputSchema] = {}
+
+
+def output_schema(output_type: type[Any], strict_json_schema: bool = True) -> FastOutputSchema:
+    """The one FastOutputSchema of this output type, built on first use."""
+    key = (output_type, strict_json_schema)
+    schema = _schemas.get(key)
+    if schema is None:
+        schema = _schemas[key] = FastOutputSchema(output_type, strict_json_schema)
+    return schema
+
+
+class WeatherAnswer(BaseModel):
+    location: str
+    temperature_c: float
+    summary: str
+
+
+class ActionItem(BaseModel):
+    task: str
+    assignee: str
+    due_date: Optional[str] = None
+    priority: str = "medium"
+
+
+class Decision(BaseModel):
+    topic: str
+    decision: str
+    rationale: Optional[str] = None
+
+
+class MeetingMinutes(BaseModel):
+    meeting_title: str
+    date: str
+    attendees: List[str]
+    agenda_items: List[str]
+    key_decisions: List[Decision]
+    action_items: List[ActionItem]
+    next_meeting_date: Optional[str] = None
+    meeting_duration_minutes: int
+
+
+class ProductGuardrailOutput(BaseModel):
+    is_not_product_related: bool
+    reasoning: str
+
+
+class AIOutput(BaseModel):
+    reasoning: str
+    is_not_ai: bool
+
+
+def minutes_json(action_items: int) -> str:
+    return MeetingMinutes(
+        meeting_title="Marketing Strategy Meeting",
+        date="2024-01-15",
+        attendees=[f"Attendee {i}" for i in range(max(4, action_items // 10))],
+        agenda_items=[f"Agenda item {i}" for i in range(max(3, action_items // 20))],
+        key_decisions=[Decision(topic=f"Topic {i}", decision="Increase the social media budget by 20 percent",
+                                rationale="The Q4 campaign had the best return on social channels") for i in range(max(2, action_items // 4))],
+        action_items=[ActionItem(task=f"Prepare the launch plan for region {i}", assignee=f"Person {i % 7}",
+                                 due_date="2024-02-01", priority="high") for i in range(action_items)],
+        next_meeting_date="2024-01-22",
+        meeting_duration_minutes=90,
+    ).model_dump_json()
+
+
+PAYLOADS = [
+    ("WeatherAnswer", WeatherAnswer, WeatherAnswer(location="Islamabad", temperature_c=22.5, summary="Sunny").model_dump_json()),
+    ("ProductGuardrailOutput", ProductGuardrailOutput, ProductGuardrailOutput(is_not_product_related=False, reasoning="Asks about a product").model_dump_json()),
+    ("AIOutput", AIOutput, AIOutput(reasoning="Mentions machine learning", is_not_ai=False).model_dump_json()),
+    *[(f"MeetingMinutes x{n}", MeetingMinutes, minutes_json(n)) for n in (10, 100, 1000)],
+]
+
+
+def microseconds(fn, number: int) -> float:
+    return min(timeit.repeat(fn, number=number, repeat=5)) / number * 1e6
+
+
+def benchmark() -> None:
+    print(f"{'output type':24} {'KB':>6} {'SDK per turn':>13} {'cached str':>11} {'cached bytes':>13}  (us per answer)")
+    for label, output_type, text in PAYLOADS:
+        data = text.encode()
+        schema = output_schema(output_type)
+        number = max(20, 20_000 // (len(text) // 100 + 1))
+        sdk_per_turn = microseconds(lambda: AgentOutputSchema(output_type).validate_json(text), number)
+        cached_str = microseconds(lambda: output_schema(output_type).validate_json(text), number)
+        cached_bytes = microseconds(lambda: schema.validate_json(data), number)
+        print(f"{label:24} {len(data) / 1024:>6.1f} {sdk_per_turn:>13.1f} {cached_str:>11.1f} {cached_bytes:>13.1f}")
+
+
+meeting_agent = Agent(
+    name="MeetingSecretary",
+    instructions="Extract structured meeting minutes from meeting transcripts.",
+    output_type=output_schema(MeetingMinutes),
+    model=model,
+)
+
+guardrail_agent = Agent(
+    name="Police",
+    instructions="Check if the user is asking you anything unrelated to our software products.",
+    output_type=output_schema(ProductGuardrailOutput),
+    model=model,
+)
+
+
+async def main():
+    benchmark()
+
+    for _ in range(3):
+        minutes = await Runner.run(meeting_agent, "Marketing Strategy Meeting - January 15, 2024. Attendees: Sarah, John.")
+        check = await Runner.run(guardrail_agent, "How do I reset my password in your app?")
+    print(f"\nmeeting_agent -> {type(minutes.final_output).__name__}, guardrail_agent -> {type(check.final_output).__name__}")
+    print(f"schemas built (benchmark + 6 runs): {dict(FastOutputSchema.builds)}")
+    print(f"pre-serialized MeetingMinutes schema: {len(output_schema(MeetingMinutes).schema_json)} bytes")
+
+    try:
+        output_schema(WeatherAnswer).validate_json(b'{"location": "Lahore", "temperature_c": "hot"}')
+    except ModelBehaviorError as e:
+        print(f"invalid answer -> ModelBehaviorError: {e}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
+
+"""
+Scenario-based Questions:
+1. Why can building the output schema cost more CPU than validating the answer itself?
+2. The SDK already validates the JSON text in one step. Where exactly does the time in the "SDK per turn" column go?
+3. Why is it safe to share one FastOutputSchema between many agents and concurrent runs?
+4. You add a field to MeetingMinutes while the app is running (e.g. hot reload). What happens to the cached schema?
+5. How would you use schema_json to notice that two deployments send different output schemas to the model?
+"""
@@ -0,0 +1,311 @@
+"""
+Local LLM stand-in: a tiny OpenAI-compatible Chat Completions server for offline demos, benchmarks and load tests.
+
+Why?
+- Every lesson talks to a real provider through AsyncOpenAI(base_url=...). Load tests and benchmarks against a real
+  provider are slow, cost quota and are not repeatable.
+- This server speaks the same /v1/chat/completions protocol (normal and streaming), so the lessons can point
+  AsyncOpenAI at it and use OpenAIChatCompletionsModel exactly like with Gemini.
+- It only uses the Python standard library.
+
+How it answers:
+- If the last message is a tool result, it answers with text that includes the tool outputs.
+- Otherwise, if tools are offered and the user message mentions a tool by name (e.g. "translate_to_spanish",
+  or "cardiologist" for the handoff tool "transfer_to_cardiologist"),
+  it calls every mentioned tool in one turn (parallel tool calls). With tool_choice="required" it calls the first tool,
+  even right after a tool result (the SDK resets tool_choice once the agent has used a tool).
+  Arguments are generated from the tool's JSON schema. A tool with a single string parameter receives the
+  user's message, other string arguments named input/query/message/text do too.
+- Otherwise, if a JSON schema response_format is requested (output_type), it returns JSON that matches the schema.
+- Otherwise, it returns a text reply of --tokens words.
+
+Knobs (all optional):
+- --ttft-ms: delay before the first token, --token-ms: delay between streamed tokens
+- --fault-rate / --fault-status: answer a share of requests with an HTTP error (e.g. 503 or 429)
+- POST /admin/faults {"fault_rate": 1.0, "fault_status": 503}: change the fault injection while the server runs
+  (start or end an outage in a demo)
+
+Usage:
+    python Local_LLM_Server/local_llm_server.py --port 8001
+    # then in a lesson:
+    AsyncOpenAI(api_key="local", base_url="http://127.0.0.1:8001/v1/")
+"""
+
+import argparse
+import asyncio
+import json
+import random
+import time
+import uuid
+from dataclasses import dataclass
+from typing import Any
+
+
+@dataclass
+class ServerConfig:
+    host: str = "127.0.0.1"
+    port: int = 8001
+    tokens: int = 40
+    ttft_ms: float = 50.0
+    token_ms: float = 5.0
+    fault_rate: float = 0.0
+    fault_status: int = 503
+    seed: int | None = None
+
+
+def message_text(message: dict) -> str:
+    content = message.get("content") or ""
+    if isinstance(content, list):
+        return " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+    return str(content)
+
+
+def fake_value(schema: dict, defs: dict, name: str, text: str) -> Any:
+    """Builds a value that matches a (strict) JSON schema."""
+    if "$ref" in schema:
+        schema = defs[schema["$ref"].split("/")[-1]]
+    if "anyOf" in schema:
+        non_null = [option for option in schema["anyOf"] if option.get("type") != "null"]
+        return fake_value(non_null[0], defs, name, text) if non_null else None
+    if "enum" in schema:
+        return schema["enum"][0]
+    kind = schema.get("type")
+    if isinstance(kind, list):
+        kind = next((k for k in kind if k != "null"), "null")
+    if kind == "object":
+        return {
+            key: fake_value(sub_schema, defs, key, text)
+            for key, sub_schema in schema.get("properties", {}).items()
+        }
+    if kind == "array":
+        return [fake_value(schema.get("items", {}), defs, f"{name} {i}", text) for i in (1, 2)]
+    if kind == "integer":
+        return 42
+    if kind == "number":
+        return 21.5
+    if kind == "boolean":
+        return False
+    if kind == "null":
+        return None
+    return text if name in ("input", "query", "message", "text") else f"{name}".replace("_", " ")
+
+
+class LocalLLMServer:
+    def __init__(self, config: ServerConfig):
+        self.config = config
+        self.random = random.Random(config.seed)
+        self.requests = 0
+        self.faults = 0
+        self._server: asyncio.Server | None = None
+
+    async def start(self) -> None:
+        self._server = await asyncio.start_server(
+            self._handle_connection, self.config.host, self.config.port, backlog=4096
+        )
+
+    async def serve_forever(self) -> None:
+        await self.start()
+        print(f"Local LLM stand-in listening on http://{self.config.host}:{self.config.port}/v1/")
+        async with self._server:
+            await self._server.serve_forever()
+
+    async def stop(self) -> None:
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    # ---------------- HTTP plumbing ----------------
+
+    async def _handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path, _ = request_line.decode("latin-1").split(" ", 2)
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b"\r\n", b"\n", b""):
+                        break
+                    key, _, value = line.decode("latin-1").partition(":")
+                    headers[key.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get("content-length", 0)))
+                keep_alive = await self._route(method, path.split("?")[0], body, writer)
+                if not keep_alive or headers.get("connection", "").lower() == "close":
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _send_json(self, writer: asyncio.StreamWriter, status: int, payload: dict) -> bool:
+        body = json.dumps(payload).encode()
+        writer.write(
+            f"HTTP/1.1 {status} {'OK' if status == 200 else 'Error'}\r\n"
+            f"Content-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body
+        )
+        await writer.drain()
+        return True
+
+    async def _route(self, method: str, path: str, body: bytes, writer: asyncio.StreamWriter) -> bool:
+        if method == "GET" and path in ("/health", "/v1/health"):
+            return await self._send_json(writer, 200, {"status": "ok", "requests": self.requests, "faults": self.faults})
+        if method == "GET" and path == "/v1/models":
+            return await self._send_json(writer, 200, {"object": "list", "data": [{"id": "local-model", "object": "model"}]})
+        if method == "POST" and path == "/v1/chat/completions":
+            return await self._chat_completions(json.loads(body or b"{}"), writer)
+        if method == "POST" and path == "/admin/faults":
+            changes = json.loads(body or b"{}")
+            self.config.fault_rate = float(changes.get("fault_rate", self.config.fault_rate))
+            self.config.fault_status = int(changes.get("fault_status", self.config.fault_status))
+            return await self._send_json(writer, 200, {"fault_rate": self.config.fault_rate, "fault_status": self.config.fault_status})
+        return await self._send_json(writer, 404, {"error": {"message": f"Unknown route {method} {path}"}})
+
+    # ---------------- Chat Completions ----------------
+
+    def _plan_reply(self, request: dict) -> tuple[str | None, list[dict]]:
+        """Returns (text, tool_calls) for the request."""
+        messages = request.get("messages", [])
+        last = messages[-1] if messages else {"role": "user", "content": ""}
+        user_text = next((message_text(m) for m in reversed(messages) if m.get("role") == "user"), "")
+        tools = [tool["function"] for tool in request.get("tools", []) if tool.get("type") == "function"]
+
+        if tools and (last.get("role") != "tool" or request.get("tool_choice") == "required"):
+            text = user_text.lower()
+            # Handoff tools ("transfer_to_cardiologist") also match when only the agent is mentioned ("cardiologist")
+            mentioned = [tool for tool in tools if tool["name"].lower() in text or tool["name"].lower().removeprefix("transfer_to_") in text]
+            if not mentioned and request.get("tool_choice") == "required":
+                mentioned = tools[:1]
+            if mentioned:
+                calls = []
+                for tool in mentioned:
+                    parameters = tool.get("parameters") or {"type": "object", "properties": {}}
+                    properties = parameters.get("properties", {})
+                    if len(properties) == 1 and next(iter(properties.values())).get("type") == "string":
+                        arguments = {next(iter(properties)): user_text}  # e.g. get_weather(city) gets the message
+                    else:
+                        arguments = fake_value(parameters, parameters.get("$defs", {}), tool["name"], user_text)
+                    calls.append({
+                        "id": f"call_{uuid.uuid4().hex[:12]}",
+                        "type": "function",
+                        "function": {"name": tool["name"], "arguments": json.dumps(arguments)},
+                    })
+                return None, calls
+
+        response_format = request.get("response_format") or {}
+        if response_format.get("type") == "json_schema":
+            schema = response_format["json_schema"]["schema"]
+            return json.dumps(fake_value(schema, schema.get("$defs", {}), "value", user_text)), []
+
+        if last.get("role") == "tool":
+            outputs = [message_text(m) for m in messages if m.get("role") == "tool"]
+            prefix = "Here is what the tools said: " + " | ".join(outputs[-8:]) + "."
+        else:
+            prefix = f"Local reply to: {user_text[:60]}."
+        words = prefix.split(" ")
+        filler = ["lorem", "ipsum", "dolor", "sit", "amet", "consectetur", "adipiscing", "elit"]
+        while len(words) < self.config.tokens:
+            words.append(filler[len(words) % len(filler)])
+        return " ".join(words), []
+
+    async def _chat_completions(self, request: dict, writer: asyncio.StreamWriter) -> bool:
+        self.requests += 1
+        if self.config.fault_rate and self.random.random() < self.config.fault_rate:
+            self.faults += 1
+            await asyncio.sleep(self.config.ttft_ms / 1000)
+            return await self._send_json(
+                writer, self.config.fault_status, {"error": {"message": "Injected fault", "type": "server_error"}}
+            )
+
+        text, tool_calls = self._plan_reply(request)
+        prompt_tokens = sum(len(message_text(m).split()) for m in request.get("messages", []))
+        completion_id = f"chatcmpl-{uuid.uuid4().hex[:16]}"
+        model_name = request.get("model", "local-model")
+        await asyncio.sleep(self.config.ttft_ms / 1000)
+
+        if not request.get("stream"):
+            completion_tokens = len(text.split()) if text else 10 * len(tool_calls)
+            message: dict[str, Any] = {"role": "assistant", "content": text}
+            if tool_calls:
+                message["tool_calls"] = tool_calls
+            return await self._send_json(writer, 200, {
+                "id": completion_id,
+                "object": "chat.completion",
+                "created": int(time.time()),
+                "model": model_name,
+                "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_calls else "stop"}],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+            })
+
+        writer.write(
+            b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+            b"Transfer-Encoding: chunked\r\n\r\n"
+        )
+
+        async def send(payload: dict | str) -> None:
+            data = payload if isinstance(payload, str) else json.dumps(payload)
+            chunk = f"data: {data}\n\n".encode()
+            writer.write(f"{len(chunk):x}\r\n".encode() + chunk + b"\r\n")
+            await writer.drain()
+
+        def chunk(delta: dict, finish_reason: str | None = None) -> dict:
+            return {
+                "id": completion_id,
+                "object": "chat.completion.chunk",
+                "created": int(time.time()),
+                "model": model_name,
+                "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+            }
+
+        completion_tokens = 0
+        if tool_calls:
+            for index, call in enumerate(tool_calls):
+                await send(chunk({"role": "assistant", "tool_calls": [{"index": index, **call}]}))
+                completion_tokens += 10
+            await send(chunk({}, "tool_calls"))
+        else:
+            # JSON output is streamed in small slices, text output word by word
+            if text.startswith(("{", "[")):
+                pieces = [text[i:i + 8] for i in range(0, len(text), 8)]
+            else:
+                words = text.split(" ")
+                pieces = [word + " " for word in words[:-1]] + words[-1:]
+            for i, piece in enumerate(pieces):
+                if i and self.config.token_ms:
+                    await asyncio.sleep(self.config.token_ms / 1000)
+                await send(chunk({"role": "assistant", "content": piece} if i == 0 else {"content": piece}))
+            completion_tokens = len(pieces)
+            await send(chunk({}, "stop"))
+
+        if (request.get("stream_options") or {}).get("include_usage"):
+            await send({
+                "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()),
+                "model": model_name, "choices": [],
+                "usage": {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens},
+            })
+        await send("[DONE]")
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+        return True
+
+
+def parse_args() -> ServerConfig:
+    parser = argparse.ArgumentParser(description="OpenAI-compatible local LLM stand-in")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8001)
+    parser.add_argument("--tokens", type=int, default=40, help="words in a text reply")
+    parser.add_argument("--ttft-ms", type=float, default=50.0, help="delay before the first token")
+    parser.add_argument("--token-ms", type=float, default=5.0, help="delay between streamed tokens")
+    parser.add_argument("--fault-rate", type=float, default=0.0, help="share of requests answered with an error (0..1)")
+    parser.add_argument("--fault-status", type=int, default=503, help="HTTP status used for injected faults")
+    parser.add_argument("--seed", type=int, default=None)
+    args = parser.parse_args()
+    return ServerConfig(**vars(args))
+
+
+if __name__ == "__main__":
+    try:
+        asyncio.run(LocalLLMServer(parse_args()).serve_forever())
+    except KeyboardInterrupt:
+        pass